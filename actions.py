@@ -0,0 +1,200 @@
+# actions.py
+"""
+Opérations sur titres (dividendes, divisions d'actions) et ajustement des cours pour l'application
+Finance Viewer.
+
+Les séries en stockage sont celles du fournisseur : ajustées des divisions, pas des dividendes.
+Les opérations sur titres sont téléchargées une fois par symbole, puis appliquées localement
+en une passe vectorisée (produit cumulé des facteurs, de la dernière barre vers la première) :
+- cours ajustés : dividendes réinvestis, relativement à la fin de la période affichée
+- cours bruts : divisions d'actions annulées, pour retrouver les cours historiques réellement cotés
+Passer d'un mode à l'autre ne relance aucun téléchargement.
+"""
+
+import io
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from backends import shared_backend
+from provider import download_actions
+
+# Durée de validité des opérations sur titres en cache (en secondes)
+ACTIONS_TTL_SECONDS = 24 * 60 * 60
+
+# Suffixes et préfixes des symboles sans opérations sur titres (devises, cryptos, contrats à terme, indices)
+NO_ACTIONS_SUFFIXES = ("=X", "-USD", "=F")
+NO_ACTIONS_PREFIXES = ("^",)
+
+
+def has_corporate_actions(ticker_symbol):
+    """
+    Indique si un actif peut verser des dividendes ou diviser ses actions.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        bool: True pour les actions (et fonds), False pour les devises, cryptos, contrats à terme et indices
+    """
+    return not (ticker_symbol.endswith(NO_ACTIONS_SUFFIXES) or ticker_symbol.startswith(NO_ACTIONS_PREFIXES))
+
+
+class CorporateActionsCache:
+    """
+    Opérations sur titres par symbole, téléchargées une seule fois par période de validité.
+    Sûr entre threads ; partagé entre réplicas si un cache partagé est configuré.
+    """
+
+    def __init__(self, downloader=download_actions, shared_backend=None, ttl=ACTIONS_TTL_SECONDS):
+        """
+        Args:
+            downloader (callable): Fonction (symbole) -> DataFrame des opérations sur titres
+            shared_backend: Cache partagé entre réplicas (None : mémoire du processus uniquement)
+            ttl (float): Durée de validité en secondes
+        """
+        self.downloader = downloader
+        self.shared_backend = shared_backend
+        self.ttl = ttl
+        self._entries = {}
+        self._ticker_locks = defaultdict(threading.Lock)
+
+    def get(self, ticker_symbol):
+        """
+        Renvoie les opérations sur titres d'un actif.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            DataFrame: Colonnes Dividends et Stock Splits, index de dates sans fuseau horaire
+        """
+        if not has_corporate_actions(ticker_symbol):
+            return empty_actions()
+        with self._ticker_locks[ticker_symbol]:
+            entry = self._entries.get(ticker_symbol)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                entry = (time.time(), self._load(ticker_symbol))
+                self._entries[ticker_symbol] = entry
+        return entry[1]
+
+    def _load(self, ticker_symbol):
+        # Cache partagé d'abord, puis fournisseur ; le verrou du symbole est détenu par l'appelant
+        key = f"actions:{ticker_symbol}"
+        if self.shared_backend is not None:
+            try:
+                blob = self.shared_backend.get(key)
+            except Exception:
+                blob = None
+            if blob is not None:
+                return pd.read_csv(io.BytesIO(blob), index_col=0, parse_dates=True)
+        actions = normalize_actions(self.downloader(ticker_symbol))
+        if self.shared_backend is not None:
+            try:
+                self.shared_backend.set(key, actions.to_csv().encode("utf-8"), self.ttl)
+            except Exception:
+                pass
+        return actions
+
+
+def empty_actions():
+    """
+    Returns:
+        DataFrame: Opérations sur titres vides
+    """
+    return pd.DataFrame({"Dividends": [], "Stock Splits": []}, index=pd.DatetimeIndex([], name="Date"))
+
+
+def normalize_actions(actions):
+    """
+    Met les opérations sur titres du fournisseur au format du cache (dates sans fuseau, triées).
+
+    Args:
+        actions (DataFrame): Réponse du fournisseur
+
+    Returns:
+        DataFrame: Colonnes Dividends et Stock Splits (0 si aucune opération), index Date
+    """
+    if actions is None or actions.empty:
+        return empty_actions()
+    actions = actions.reindex(columns=["Dividends", "Stock Splits"]).fillna(0.0).astype(float)
+    index = pd.DatetimeIndex(actions.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    actions.index = index.normalize().rename("Date")
+    return actions.sort_index()
+
+
+def adjustment_factors(index, closes, actions, adjusted=True):
+    """
+    Calcule le facteur multiplicatif des prix de chaque barre en une passe vectorisée : chaque
+    opération place son facteur sur la veille de sa date d'effet, puis le produit cumulé est pris
+    de la dernière barre vers la première.
+
+    Args:
+        index (DatetimeIndex): Dates des barres (triées)
+        closes (ndarray): Clôtures ajustées des divisions (celles du fournisseur)
+        actions (DataFrame): Opérations sur titres (voir normalize_actions)
+        adjusted (bool): True pour réinvestir les dividendes, False pour annuler les divisions
+
+    Returns:
+        ndarray: Facteur de chaque barre (1 si aucune opération ne la concerne)
+    """
+    bar_count = len(index)
+    factors = np.ones(bar_count)
+    if bar_count == 0 or actions.empty:
+        return factors
+    bar_times = (index.tz_localize(None) if index.tz is not None else index).as_unit("ns").asi8
+    action_times = actions.index.as_unit("ns").asi8
+    # Première barre à la date d'effet ou après : l'opération concerne les barres précédentes
+    positions = np.searchsorted(bar_times, action_times, side="left")
+
+    if adjusted:
+        # Dividendes de la période : facteur 1 - dividende / clôture de la veille
+        dividends = actions["Dividends"].to_numpy()
+        selected = (dividends > 0) & (positions > 0) & (positions < bar_count)
+        previous_closes = np.asarray(closes, dtype=float)[positions[selected] - 1]
+        event_factors = 1.0 - dividends[selected] / previous_closes
+    else:
+        # Divisions postérieures à la barre (y compris après la période) : prix multipliés par le ratio
+        ratios = actions["Stock Splits"].to_numpy()
+        selected = (ratios > 0) & (positions > 0)
+        event_factors = ratios[selected]
+    event_positions = np.minimum(positions[selected], bar_count) - 1
+
+    # Plusieurs opérations peuvent tomber sur la même barre
+    np.multiply.at(factors, event_positions, np.where(np.isfinite(event_factors), event_factors, 1.0))
+    return np.cumprod(factors[::-1])[::-1]
+
+
+def adjust_frame(data, actions, adjusted=True):
+    """
+    Applique les opérations sur titres aux prix (et, pour les cours bruts, aux volumes) d'une série.
+
+    Args:
+        data (DataFrame): Série du fournisseur (Open, High, Low, Close, Volume)
+        actions (DataFrame): Opérations sur titres (voir normalize_actions)
+        adjusted (bool): True pour les cours ajustés, False pour les cours bruts
+
+    Returns:
+        DataFrame: Copie ajustée de la série (la série elle-même si aucune opération ne la concerne)
+    """
+    if data.empty or actions.empty:
+        return data
+    factors = adjustment_factors(data.index, data['Close'].to_numpy(), actions, adjusted)
+    if np.all(factors == 1.0):
+        return data
+    adjusted_data = data.copy()
+    price_columns = ['Open', 'High', 'Low', 'Close']
+    adjusted_data[price_columns] = data[price_columns].to_numpy(dtype=float) * factors[:, None]
+    if not adjusted:
+        # Avant une division, le nombre d'actions échangées était plus faible d'autant
+        adjusted_data['Volume'] = np.round(data['Volume'].to_numpy(dtype=float) / factors)
+    return adjusted_data
+
+
+# Cache partagé par toutes les sessions du processus
+actions_cache = CorporateActionsCache(shared_backend=shared_backend)
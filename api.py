@@ -0,0 +1,284 @@
+# api.py
+"""
+API de données locale, en lecture seule, pour l'application Finance Viewer.
+
+Les autres outils (notebooks, scripts de risque) lisent les séries du stockage de l'application
+au lieu d'interroger eux-mêmes le fournisseur : une plage déjà couverte est servie directement,
+et seules les dates manquantes sont téléchargées, une seule fois pour tous les clients.
+
+Routes (GET uniquement) :
+- /catalog                                   : actifs de assets.py (catalogue, nom, symbole, devise)
+- /series/<symbole>?start=&end=              : barres OHLCV quotidiennes de la plage (fin exclue)
+      adjusted=0 : cours bruts (défaut : ajustés, comme dans l'application)
+      currency=EUR : prix convertis dans une autre devise
+- /summaries?tickers=AAPL,MSFT               : résumés précalculés (dernière clôture, performances...)
+Chaque réponse est un flux Arrow IPC (application/vnd.apache.arrow.stream), ou du JSON avec
+format=json, un en-tête Accept: application/json, ou si pyarrow n'est pas installé.
+
+Lancement autonome : python api.py --port 8502 ; dans le processus de l'application (même stockage) :
+FINANCE_VIEWER_API_PORT=8502 streamlit run app.py
+"""
+
+import argparse
+import io
+import json
+import os
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from actions import actions_cache, adjust_frame
+from assets import asset_catalogs
+from crossrates import cross_rates
+from currencies import CONVERTIBLE_CURRENCIES, native_currency
+from pipeline import convert_frame, fetch_data
+
+# Port de l'API lancée avec l'application (vide : pas d'API)
+API_PORT = os.environ.get("FINANCE_VIEWER_API_PORT", "")
+API_HOST = os.environ.get("FINANCE_VIEWER_API_HOST", "127.0.0.1")
+
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+JSON_CONTENT_TYPE = "application/json"
+
+# Période servie par défaut (en jours avant aujourd'hui)
+DEFAULT_PERIOD_DAYS = 365
+
+
+class ApiError(Exception):
+    """
+    Erreur de requête, renvoyée au client avec son code HTTP.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def catalog_frame():
+    """
+    Returns:
+        DataFrame: Une ligne par actif (Catalogue, Nom, Symbole, Devise)
+    """
+    rows = [
+        {"Catalogue": catalog, "Nom": name, "Symbole": ticker, "Devise": native_currency(ticker)}
+        for catalog, assets in asset_catalogs.items()
+        for name, ticker in assets.items()
+    ]
+    return pd.DataFrame(rows, columns=["Catalogue", "Nom", "Symbole", "Devise"])
+
+
+def parse_date(value, default):
+    """
+    Args:
+        value (str): Date au format AAAA-MM-JJ (None pour la valeur par défaut)
+        default (date): Valeur par défaut
+
+    Returns:
+        date: Date lue
+    """
+    if value is None:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"Date invalide : {value} (format attendu : AAAA-MM-JJ)")
+
+
+def series_frame(ticker_symbol, query):
+    """
+    Lit une plage d'une série depuis le stockage, ajustée et convertie comme dans l'application.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        query (dict): Paramètres de la requête (start, end, adjusted, currency)
+
+    Returns:
+        DataFrame: Colonnes Open, High, Low, Close, Volume, index Date
+    """
+    end_date = parse_date(query.get("end"), date.today() + timedelta(days=1))
+    start_date = parse_date(query.get("start"), end_date - timedelta(days=DEFAULT_PERIOD_DAYS))
+    if start_date >= end_date:
+        raise ApiError(400, "La date de début doit précéder la date de fin.")
+    currency = query.get("currency")
+    if currency is not None and currency not in CONVERTIBLE_CURRENCIES:
+        raise ApiError(400, f"Devise non prise en charge : {currency}")
+    adjusted = query.get("adjusted", "1") not in ("0", "false")
+
+    data = fetch_data(ticker_symbol, start_date, end_date)
+    data = adjust_frame(data, actions_cache.get(ticker_symbol), adjusted)
+    data = convert_frame(data, ticker_symbol, start_date, end_date, currency)
+    return data[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def summaries_frame(query):
+    """
+    Args:
+        query (dict): Paramètres de la requête (tickers : symboles séparés par des virgules)
+
+    Returns:
+        DataFrame: Résumés des symboles déjà chargés (voir CrossRateEngine.summary_table), index Symbole
+    """
+    tickers = query.get("tickers")
+    table = cross_rates.summary_table(tickers.split(",") if tickers else None)
+    return table.rename_axis("Symbole")
+
+
+def encode_arrow(data):
+    """
+    Sérialise un DataFrame en flux Arrow IPC.
+
+    Args:
+        data (DataFrame): Données à servir (l'index est conservé comme colonne)
+
+    Returns:
+        bytes: Flux Arrow IPC
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(data, preserve_index=data.index.name is not None)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def encode_json(data):
+    """
+    Sérialise un DataFrame en JSON (une liste d'objets, dates au format ISO, NaN -> null).
+
+    Args:
+        data (DataFrame): Données à servir
+
+    Returns:
+        bytes: Document JSON
+    """
+    if data.index.name is not None:
+        data = data.reset_index()
+    return data.to_json(orient="records", date_format="iso", force_ascii=False).encode("utf-8")
+
+
+def arrow_available():
+    """
+    Returns:
+        bool: True si pyarrow est installé
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Traitement des requêtes GET de l'API (une requête par thread).
+    """
+
+    server_version = "FinanceViewerAPI/1.0"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        parts = [unquote(part) for part in parsed.path.strip("/").split("/") if part]
+        try:
+            if parts == ["catalog"]:
+                data = catalog_frame()
+            elif len(parts) == 2 and parts[0] == "series":
+                data = series_frame(parts[1], query)
+            elif parts == ["summaries"]:
+                data = summaries_frame(query)
+            else:
+                raise ApiError(404, f"Route inconnue : {parsed.path}")
+            self._send_frame(data, query)
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+        except Exception as e:
+            self._send_error(500, f"Une erreur s'est produite : {e}")
+
+    def _method_not_allowed(self):
+        self._send_error(405, "Méthode non autorisée (API en lecture seule).")
+
+    do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = _method_not_allowed
+
+    def _wants_json(self, query):
+        if query.get("format") == "json":
+            return True
+        if query.get("format") == "arrow":
+            return False
+        accept = self.headers.get("Accept", "")
+        return (JSON_CONTENT_TYPE in accept and ARROW_CONTENT_TYPE not in accept) or not arrow_available()
+
+    def _send_frame(self, data, query):
+        if self._wants_json(query):
+            self._send(200, JSON_CONTENT_TYPE, encode_json(data))
+        else:
+            self._send(200, ARROW_CONTENT_TYPE, encode_arrow(data))
+
+    def _send_error(self, status, message):
+        self._send(status, JSON_CONTENT_TYPE, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"))
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête sur la sortie d'erreur de l'application
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_api_server(host=API_HOST, port=API_PORT):
+    """
+    Démarre l'API dans un thread du processus (une seule fois par processus) : elle partage alors
+    le stockage des séries et l'index des résumés de l'application.
+
+    Args:
+        host (str): Adresse d'écoute
+        port (int): Port d'écoute
+
+    Returns:
+        ThreadingHTTPServer: Serveur démarré
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), ApiRequestHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="finance-viewer-api", daemon=True).start()
+        return _server
+
+
+def main(argv=None):
+    """
+    Lance l'API seule (stockage propre au processus, partagé avec les réplicas via FINANCE_VIEWER_CACHE_URL).
+
+    Args:
+        argv (list): Arguments de la ligne de commande (None : sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="API de données locale de Finance Viewer (lecture seule).")
+    parser.add_argument("--host", default=API_HOST, help="Adresse d'écoute (défaut : 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(API_PORT or 8502), help="Port d'écoute (défaut : 8502)")
+    options = parser.parse_args(argv)
+    server = ThreadingHTTPServer((options.host, options.port), ApiRequestHandler)
+    server.daemon_threads = True
+    print(f"API Finance Viewer : http://{options.host}:{options.port}/catalog")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
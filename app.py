@@ -3,18 +3,40 @@
 Application Finance Viewer - Interface pour visualiser et télécharger des données financières
 """
 
+# Le profil de démarrage doit être actif avant les autres imports
+from profiling import (
+    PROFILE_IMPORTS, PROFILE_QUERY_PARAM, PROFILE_RERUNS, import_timer, profile_rerun, tag_rerun
+)
+
+import os
+import getpass
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
+from functools import partial
 import traceback
 
 # Importer les données et utilitaires
 from assets import (
     stock_categories, stock_assets, crypto_assets,
-    currency_assets, resource_assets, index_categories, index_assets
+    currency_assets, resource_assets, index_categories, index_assets, all_assets
+)
+from utils import clean_text, format_volume, EXPORT_FORMATS
+from pipeline import (
+    fetch_data, resample_data, compute_kpis, display_profile, format_display_data, format_price, generate_export,
+    load_close_matrix, fetch_live_data, kpis_from_data, build_display_table, ticker_summary, fetch_requests,
+    fetch_history, prefetch_data, watchlist_table, GRANULARITIES, MAX_HISTORY_START, SPARKLINE_DAYS
+)
+from currencies import CONVERTIBLE_CURRENCIES, cross_legs, fx_route, minor_unit_factor, native_currency
+from crossrates import cross_rates
+from quality import summarize_flags
+from actions import has_corporate_actions
+from memory import SHOW_MEMORY_USAGE, memory_governor
+from store import series_store
+from watchlists import watchlist_store
+from portfolio import (
+    REBALANCING_FREQUENCIES, backtest, periods_per_year, portfolio_statistics, rebase_prices, returns_matrix
 )
-from utils import clean_text, create_excel, format_volume
 
 # Configuration de la page
 st.set_page_config(
@@ -23,137 +45,425 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Nombre de lignes au-delà duquel l'export Excel est préparé avec une barre de progression
+LARGE_EXPORT_ROWS = 2000
+
+# Intervalles d'actualisation proposés en mode direct (en secondes)
+LIVE_REFRESH_SECONDS = [5, 10, 15, 30, 60, 120, 300]
+
+# Composition proposée à l'ouverture du mode portefeuille
+DEFAULT_PORTFOLIO = ["Actions - Apple", "Actions - Microsoft", "Crypto - Bitcoin", "Ressources - Or"]
+
+# Sélection proposée à l'ouverture de la comparaison
+DEFAULT_COMPARISON = ["Indices - CAC 40", "Actions - LVMH", "Devises - EUR/USD", "Ressources - Or"]
+
+# Composition proposée à la création d'une liste de suivi
+DEFAULT_WATCHLIST = [
+    "Crypto - Bitcoin", "Actions - Apple", "Actions - LVMH", "Devises - EUR/USD", "Ressources - Or", "Indices - CAC 40"
+]
+
+# Entrée du sélecteur de listes pour en créer une nouvelle
+NEW_WATCHLIST = "+ Nouvelle liste"
+
+# API de données locale dans le processus de l'application (voir api.py)
+if os.environ.get("FINANCE_VIEWER_API_PORT"):
+    from api import start_api_server
+    start_api_server()
+
 # Titre de l'application
 st.title("Finance Viewer")
 
 # Création des onglets principaux pour types d'actifs
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Crypto", "Actions", "Devises", "Ressources", "Indices"])
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(
+    ["Crypto", "Actions", "Devises", "Ressources", "Indices", "Portefeuille", "Comparaison", "Listes de suivi"]
+)
 
 
-def display_standard_asset_data(assets, tab_key):
+def display_download_buttons(ticker_symbol, selected_asset, start_date_input, end_date_input, tab_key, row_count,
+                             display_currency=None, granularity="Quotidienne", adjusted=True):
     """
-    Affiche les données pour un type d'actif standard (crypto, devises, ressources)
+    Affiche un bouton de téléchargement par format d'export (XLSX, CSV, Parquet, Feather).
+    Les fichiers ne sont générés qu'au clic : un affichage sans téléchargement ne coûte aucune sérialisation.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        selected_asset (str): Nom de l'actif sélectionné
+        start_date_input (date): Date de début de la période
+        end_date_input (date): Date de fin de la période
+        tab_key (str): Clé unique pour les widgets Streamlit
+        row_count (int): Nombre de lignes de la période
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        granularity (str): Granularité des barres (clé de GRANULARITIES)
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+    """
+    # Nettoyer le nom du fichier
+    clean_name = clean_text(selected_asset)
+    if display_currency is not None:
+        clean_name = f"{clean_name}_{display_currency}"
+    if GRANULARITIES[granularity] is not None:
+        clean_name = f"{clean_name}_{clean_text(granularity)}"
+    if not adjusted:
+        clean_name = f"{clean_name}_bruts"
+    clean_start = clean_text(start_date_input)
+    clean_end = clean_text(end_date_input)
+
+    download_cols = st.columns(len(EXPORT_FORMATS))
+
+    for download_col, (export_format, (extension, mime)) in zip(download_cols, EXPORT_FORMATS.items()):
+        with download_col:
+            # Le XLSX conserve la clé historique du bouton
+            button_key = f"download_{tab_key}" if export_format == "XLSX" else f"download_{tab_key}_{extension}"
+            file_name = f"{clean_name}_{clean_start}_{clean_end}.{extension}"
+            label = f"Télécharger les données ({export_format})"
+            export_args = (ticker_symbol, start_date_input, end_date_input, clean_name, export_format, display_currency,
+                           granularity, adjusted)
+
+            # Export Excel d'une longue période : préparation explicite avec barre de progression
+            if export_format == "XLSX" and row_count > LARGE_EXPORT_ROWS:
+                prepared_key = f"prepared_{button_key}"
+                if st.session_state.get(prepared_key) != file_name:
+                    if not st.button(f"Préparer l'export ({export_format})", key=f"prepare_{button_key}"):
+                        continue
+                    progress_bar = st.progress(0.0, text="Génération du fichier Excel...")
+                    generate_export(*export_args, progress_callback=lambda fraction: progress_bar.progress(fraction))
+                    progress_bar.empty()
+                    st.session_state[prepared_key] = file_name
+
+            # Génération différée : le callable n'est exécuté qu'au clic (et servi depuis le cache ensuite)
+            st.download_button(
+                label=label,
+                data=partial(generate_export, *export_args),
+                file_name=file_name,
+                mime=mime,
+                key=button_key
+            )
+
+
+def select_display_currency(ticker_symbol, tab_key):
+    """
+    Affiche le sélecteur de devise d'affichage d'un actif
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        tab_key (str): Clé unique pour les widgets Streamlit
+
+    Returns:
+        str: Devise d'affichage choisie (None pour la devise de cotation)
+    """
+    source_currency = native_currency(ticker_symbol)
+    # Seules les devises reliées par les paires de currency_assets sont proposées ; la devise de cotation
+    # elle-même l'est pour un actif coté en centièmes (pence, cents, agorot)
+    minor_units = minor_unit_factor(ticker_symbol) != 1.0
+    options = [None] + [
+        currency for currency in CONVERTIBLE_CURRENCIES
+        if (currency != source_currency or minor_units) and fx_route(source_currency, currency) is not None
+    ]
+    return st.selectbox(
+        "Devise d'affichage",
+        options=options,
+        format_func=lambda currency: f"Devise d'origine ({source_currency})" if currency is None else currency,
+        key=f"currency_{tab_key}",
+        disabled=len(options) == 1,
+        help=None if len(options) > 1 else f"Aucune paire de devises disponible pour convertir {source_currency}."
+    )
+
+
+def display_asset_body(data, kpis, display_data, profile, tab_key, granularity="Quotidienne", summary=None,
+                       total_return=False):
+    """
+    Affiche les indicateurs clés, le graphique des cours et le tableau historique d'un actif
+
+    Args:
+        data (DataFrame): Série de l'actif avec ses colonnes dérivées
+        kpis (dict): Indicateurs clés (latest_close, variation, latest_volume)
+        display_data (DataFrame): Tableau formaté
+        profile (dict): Profil d'affichage des prix
+        tab_key (str): Clé unique pour les widgets Streamlit
+        granularity (str): Granularité des barres (clé de GRANULARITIES)
+        summary (dict): Résumé précalculé de l'actif (None pour ne pas l'afficher)
+        total_return (bool): True si les cours affichés sont ajustés des dividendes (variation dividendes réinvestis)
+    """
+    # Anomalies de qualité détectées sur la série
+    quality_summary = summarize_flags(data['Quality_Flags'].to_numpy())
+    if quality_summary:
+        details = ", ".join(f"{label} ({count})" for label, count in quality_summary.items())
+        st.warning(f"Anomalies détectées dans les données : {details}. "
+                   "Les lignes concernées sont signalées dans la colonne Qualité du tableau et des exports.")
+
+    # Affichage des indicateurs clés
+    st.subheader("Indicateurs clés")
+
+    metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
+
+    with metrics_col1:
+        formatted_close = format_price(kpis["latest_close"], profile)
+        st.metric(profile["close_label"], formatted_close)
+
+    with metrics_col2:
+        formatted_variation = f"{kpis['variation']:.2f}%"
+        variation_label = "Variation (dividendes réinvestis)" if total_return else "Variation"
+        st.metric(variation_label, formatted_variation, delta=formatted_variation)
+
+    with metrics_col3:
+        vol_str = format_volume(kpis["latest_volume"])
+        volume_label = "Volume (dernier jour)" if GRANULARITIES[granularity] is None else "Volume (dernière période)"
+        st.metric(volume_label, vol_str)
+
+    # Résumé précalculé de la série (lu dans l'index, sans calcul)
+    if summary is not None:
+        summary_cols = st.columns(len(summary["returns"]) + 2)
+        for summary_col, (label, value) in zip(summary_cols, summary["returns"].items()):
+            with summary_col:
+                st.metric(f"Perf. {label}", "N/A" if pd.isna(value) else f"{value:.2f}%")
+
+        with summary_cols[-2]:
+            st.metric("Plus haut / bas 52 sem.",
+                      f"{format_price(summary['high_52w'], profile)} / {format_price(summary['low_52w'], profile)}")
+
+        with summary_cols[-1]:
+            st.metric("Volume moyen (3 mois)", format_volume(summary["average_volume"]))
+
+        st.caption(
+            f"Résumé au {summary['last_date'].strftime('%d/%m/%Y')}, sur les cours cotés dans la devise de cotation "
+            "(performances hors dividendes)."
+        )
+
+    # Graphique des cours de clôture ; import local comme pour les autres dépendances lourdes, bien que
+    # Streamlit charge déjà plotly à son propre import (thème de st.plotly_chart) s'il est installé
+    import plotly.graph_objects as go
+    figure = go.Figure(go.Scatter(x=data.index, y=data['Close'], name="Clôture"))
+    figure.update_layout(
+        height=350, margin=dict(l=0, r=0, t=30, b=0),
+        yaxis_tickprefix=profile["prefix"], yaxis_ticksuffix=profile["suffix"]
+    )
+    st.plotly_chart(figure, key=f"chart_{tab_key}")
+
+    # Tableau des données
+    st.subheader("Données historiques")
+    st.dataframe(display_data)
+
+
+def display_live_asset_body(ticker_symbol, start_date_input, profile, display_currency, tab_key,
+                            granularity="Quotidienne", adjusted=True):
+    """
+    Corps de la vue d'un actif en mode direct (exécuté comme fragment Streamlit) : seules les barres
+    postérieures à la dernière barre en stockage sont téléchargées à chaque actualisation.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date_input (date): Date de début de la période
+        profile (dict): Profil d'affichage des prix
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        tab_key (str): Clé unique pour les widgets Streamlit
+        granularity (str): Granularité des barres (clé de GRANULARITIES)
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+    """
+    data = fetch_live_data(ticker_symbol, start_date_input, display_currency, granularity, adjusted)
+    summary = ticker_summary(ticker_symbol) if display_currency is None else None
+    display_asset_body(data, kpis_from_data(data, summary), build_display_table(data, profile), profile, tab_key,
+                       granularity, summary, adjusted and has_corporate_actions(ticker_symbol))
+    st.caption(f"Dernière actualisation : {datetime.now().strftime('%H:%M:%S')}")
+
+
+def display_cross_rate_check(ticker_symbol, start_date_input, end_date_input, tab_key):
+    """
+    Indique qu'une paire croisée est calculée à partir de ses paires en dollar, et propose de comparer
+    le calcul à la paire cotée (seul cas où celle-ci est téléchargée).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date_input (date): Date de début de la période
+        end_date_input (date): Date de fin de la période
+        tab_key (str): Clé unique pour les widgets Streamlit
+    """
+    legs = cross_legs(ticker_symbol)
+    if legs is None:
+        return
+    caption_col, check_col = st.columns([3, 1])
+    with caption_col:
+        st.caption(
+            f"Paire croisée calculée à partir de {legs[0][0]} et {legs[1][0]} "
+            "(plus haut et plus bas estimés), sans téléchargement de la paire cotée."
+        )
+    with check_col:
+        check = st.button("Comparer avec la paire cotée", key=f"fx_check_{tab_key}")
+    if check:
+        with st.spinner("Téléchargement de la paire cotée..."):
+            result = cross_rates.consistency(ticker_symbol, start_date_input, end_date_input)
+        if result["dates"] == 0:
+            st.warning(f"Aucune date commune avec la paire cotée {ticker_symbol}.")
+        else:
+            st.info(
+                f"Écart des clôtures avec {ticker_symbol} sur {result['dates']} dates : "
+                f"{result['mean_deviation']:.3f} % en moyenne, {result['max_deviation']:.3f} % au plus."
+            )
+
+
+def load_max_history(ticker_symbol, start_date_input, end_date_input, display_currency):
+    """
+    Télécharge par tranches l'historique complet d'un actif (et des paires de change de la conversion),
+    avec une barre de progression. Les tranches en échec sont signalées et redemandées à la
+    prochaine exécution ; les autres restent en cache.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date_input (date): Date de début de l'historique
+        end_date_input (date): Date de fin de l'historique
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+
+    Returns:
+        date: Début de la partie récente de l'historique entièrement téléchargée (à afficher)
+    """
+    progress_bar = st.empty()
+
+    def report_progress(completed, total):
+        progress_bar.progress(completed / total, text=f"Historique : tranche {completed}/{total}")
+
+    failed_chunks = fetch_history(
+        fetch_requests(ticker_symbol, start_date_input, end_date_input, display_currency), report_progress
+    )
+    progress_bar.empty()
+    if failed_chunks:
+        st.warning(
+            "Tranches non téléchargées (nouvelle tentative à la prochaine actualisation) : "
+            + ", ".join(f"{ticker} {chunk_start:%Y}-{chunk_end:%Y}" for ticker, chunk_start, chunk_end in failed_chunks)
+        )
+        # Afficher la partie postérieure à la tranche en échec la plus récente, sans la redemander d'un bloc
+        return max(chunk_end for _, _, chunk_end in failed_chunks)
+    return start_date_input
+
+
+def display_asset_view(assets, tab_key, profile_name, select_label="Choisissez un actif"):
+    """
+    Affiche la vue d'un actif : sélection, indicateurs clés, tableau historique et téléchargements.
+    Commune à toutes les classes d'actifs, qui ne diffèrent que par leur profil d'affichage.
 
     Args:
         assets (dict): Dictionnaire des actifs {nom: symbole}
         tab_key (str): Clé unique pour les widgets Streamlit
+        profile_name (str): Profil d'affichage des prix (clé de FORMAT_PROFILES)
+        select_label (str): Libellé du sélecteur d'actif
     """
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        selected_asset = st.selectbox("Choisissez un actif", list(assets.keys()), key=f"select_{tab_key}")
+        selected_asset = st.selectbox(select_label, list(assets.keys()), key=f"select_{tab_key}")
+
+    # Historique maximal : les dates choisies sont ignorées (le bouton est affiché plus bas)
+    max_history = st.session_state.get(f"max_history_{tab_key}", False)
 
     with col2:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=365)
-        start_date_input = st.date_input("Date de début", value=start_date, key=f"start_{tab_key}")
+        start_date_input = st.date_input(
+            "Date de début", value=start_date, key=f"start_{tab_key}", disabled=max_history
+        )
 
     with col3:
-        end_date_input = st.date_input("Date de fin", value=end_date, key=f"end_{tab_key}")
+        end_date_input = st.date_input("Date de fin", value=end_date, key=f"end_{tab_key}", disabled=max_history)
+
+    if max_history:
+        start_date_input, end_date_input = MAX_HISTORY_START, end_date
 
-    # Récupération des données
     ticker_symbol = assets[selected_asset]
+    tag_rerun(ticker=ticker_symbol, start=start_date_input, end=end_date_input)
+
+    with col4:
+        display_currency = select_display_currency(ticker_symbol, tab_key)
+
+    # Granularité des barres (agrégées localement), ajustement des cours (appliqué localement),
+    # historique maximal et mode direct (actualisation des dernières barres uniquement)
+    granularity_col, adjusted_col, history_col, live_col1, live_col2 = st.columns([1, 1, 1, 1, 2])
+
+    with granularity_col:
+        granularity = st.selectbox("Granularité", list(GRANULARITIES.keys()), key=f"granularity_{tab_key}")
+
+    with adjusted_col:
+        adjustable = has_corporate_actions(ticker_symbol)
+        adjusted = st.toggle(
+            "Cours ajustés", value=True, key=f"adjusted_{tab_key}", disabled=not adjustable,
+            help="Dividendes réinvestis sur la période ; désactivé, les cours sont ceux réellement cotés "
+                 "(avant divisions d'actions)." if adjustable else "Aucune opération sur titres pour cet actif."
+        ) or not adjustable
+
+    with history_col:
+        st.toggle(
+            "Historique maximal", key=f"max_history_{tab_key}",
+            help="Toute la série disponible, téléchargée par tranches de dix ans ; "
+                 "les tranches déjà reçues sont conservées en cas d'échec."
+        )
+
+    with live_col1:
+        live_mode = st.toggle(
+            "Mode direct", key=f"live_{tab_key}",
+            help="Actualise périodiquement les indicateurs, le graphique et le tableau jusqu'à aujourd'hui."
+        )
+
+    with live_col2:
+        if live_mode:
+            refresh_seconds = st.select_slider(
+                "Actualisation (secondes)", options=LIVE_REFRESH_SECONDS, value=30, key=f"live_interval_{tab_key}"
+            )
+
+    # Récupération des données
     try:
-        # Récupérer les données
-        data = yf.download(ticker_symbol, start=start_date_input, end=end_date_input, interval="1d")
+        if max_history:
+            start_date_input = load_max_history(ticker_symbol, start_date_input, end_date_input, display_currency)
+
+        # Série, paires de change et opérations sur titres téléchargées en parallèle
+        prefetch_data(fetch_requests(ticker_symbol, start_date_input, end_date_input, display_currency))
+        data = fetch_data(ticker_symbol, start_date_input, end_date_input)
 
         if data.empty:
             st.error(f"Aucune donnée disponible pour {selected_asset} dans la période sélectionnée.")
+            return
+
+        profile = display_profile(profile_name, ticker_symbol, display_currency)
+
+        if live_mode:
+            # Seul ce fragment est ré-exécuté à chaque actualisation, pas le reste de la page
+            st.fragment(display_live_asset_body, run_every=refresh_seconds)(
+                ticker_symbol, start_date_input, profile, display_currency, tab_key, granularity, adjusted
+            )
         else:
-            # S'assurer que les données ne sont pas vides
-            if not data.empty and len(data) > 0:
-                # Extraction des valeurs
-                latest_close_value = float(data['Close'].iloc[-1])
-                first_close_value = float(data['Close'].iloc[0])
-                variation_value = ((latest_close_value - first_close_value) / first_close_value) * 100
-                latest_volume_value = float(data['Volume'].iloc[-1])
-
-                # Affichage des indicateurs clés
-                st.subheader("Indicateurs clés")
-
-                metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
-
-                with metrics_col1:
-                    formatted_close = f"${latest_close_value:.2f}" if tab_key != "currency" else f"{latest_close_value:.4f}"
-                    st.metric("Prix de clôture", formatted_close)
-
-                with metrics_col2:
-                    formatted_variation = f"{variation_value:.2f}%"
-                    formatted_delta = f"{variation_value:.2f}%"
-                    st.metric("Variation", formatted_variation, delta=formatted_delta)
-
-                with metrics_col3:
-                    vol_str = format_volume(latest_volume_value)
-                    st.metric("Volume (dernier jour)", vol_str)
-
-                # Tableau des données
-                st.subheader("Données historiques")
-
-                # Calculer la variation quotidienne
-                data['Daily_Change'] = data['Close'].pct_change() * 100
-
-                # Créer un DataFrame pour l'affichage avec l'index recréé sans l'heure
-                display_data = pd.DataFrame(index=[d.date() for d in data.index])
-
-                # Convertir les valeurs numpy en valeurs Python natives
-                open_values = [float(x) for x in data['Open'].to_numpy()]
-                high_values = [float(x) for x in data['High'].to_numpy()]
-                low_values = [float(x) for x in data['Low'].to_numpy()]
-                close_values = [float(x) for x in data['Close'].to_numpy()]
-
-                # Formater les prix
-                if tab_key == "currency":
-                    # Format spécial pour les devises (4 décimales)
-                    display_data['Open'] = [f"{x:.4f}" for x in open_values]
-                    display_data['High'] = [f"{x:.4f}" for x in high_values]
-                    display_data['Low'] = [f"{x:.4f}" for x in low_values]
-                    display_data['Close'] = [f"{x:.4f}" for x in close_values]
-                else:
-                    # Format standard avec dollar sign
-                    display_data['Open'] = [f"${x:.2f}" for x in open_values]
-                    display_data['High'] = [f"${x:.2f}" for x in high_values]
-                    display_data['Low'] = [f"${x:.2f}" for x in low_values]
-                    display_data['Close'] = [f"${x:.2f}" for x in close_values]
-
-                # Formater la variation avec gestion des NaN
-                daily_changes = []
-                for x in data['Daily_Change'].to_numpy():
-                    if pd.isna(x):
-                        daily_changes.append("N/A")
-                    else:
-                        daily_changes.append(f"{float(x):.2f}%")
-                display_data['Variation (%)'] = daily_changes
-
-                # Formater le volume
-                volumes = []
-                for vol in data['Volume'].to_numpy():
-                    volumes.append(format_volume(vol))
-                display_data['Volume'] = volumes
-
-                # Affichage du tableau avec filtres
-                st.dataframe(display_data)
-
-                # Créer un excel et proposer le téléchargement
-                excel_data = create_excel(data, clean_text(selected_asset))
-                clean_name = clean_text(selected_asset)
-                clean_start = clean_text(start_date_input)
-                clean_end = clean_text(end_date_input)
-
-                st.download_button(
-                    label="Télécharger les données (XLSX)",
-                    data=excel_data,
-                    file_name=f"{clean_name}_{clean_start}_{clean_end}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    key=f"download_{tab_key}"
-                )
-            else:
-                st.error(f"Aucune donnée n'a été récupérée pour {selected_asset}.")
+            display_asset_body(
+                resample_data(ticker_symbol, start_date_input, end_date_input, display_currency, granularity,
+                              adjusted),
+                compute_kpis(ticker_symbol, start_date_input, end_date_input, display_currency, granularity, adjusted),
+                format_display_data(ticker_symbol, start_date_input, end_date_input, profile_name, display_currency,
+                                    granularity, adjusted),
+                profile,
+                tab_key,
+                granularity,
+                # Le résumé est exprimé dans la devise de cotation
+                ticker_summary(ticker_symbol) if display_currency is None else None,
+                adjusted and adjustable
+            )
+
+        display_cross_rate_check(ticker_symbol, start_date_input, end_date_input, tab_key)
+
+        # Proposer le téléchargement dans les différents formats
+        display_download_buttons(ticker_symbol, selected_asset, start_date_input, end_date_input, tab_key, len(data),
+                                 display_currency, granularity, adjusted)
 
     except Exception as e:
         st.error(f"Une erreur s'est produite lors de la récupération des données : {e}")
         st.error(f"Traceback détaillé: {traceback.format_exc()}")
 
 
+def display_standard_asset_data(assets, tab_key):
+    """
+    Affiche les données pour un type d'actif standard (crypto, devises, ressources)
+
+    Args:
+        assets (dict): Dictionnaire des actifs {nom: symbole}
+        tab_key (str): Clé unique pour les widgets Streamlit
+    """
+    # Format spécial pour les devises (4 décimales), devise de cotation pour les autres
+    profile_name = "fx" if tab_key == "currency" else "price"
+    display_asset_view(assets, tab_key, profile_name)
+
+
 def display_stock_data():
     """
     Affiche les données des actions avec filtrage par secteur
@@ -169,123 +479,13 @@ def display_stock_data():
     )
 
     # Filtrer les actions en fonction du secteur
-    filtered_stocks = {}
-
     if selected_sector == "Tous les secteurs":
         filtered_stocks = stock_assets
     else:
         # Filtrer les actions du secteur sélectionné
         filtered_stocks = stock_categories[selected_sector]
 
-    # Sélection d'une action
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        selected_asset = st.selectbox("Choisissez une action", list(filtered_stocks.keys()), key="select_stock")
-
-    with col2:
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=365)
-        start_date_input = st.date_input("Date de début", value=start_date, key="start_stock")
-
-    with col3:
-        end_date_input = st.date_input("Date de fin", value=end_date, key="end_stock")
-
-    # Récupération des données
-    ticker_symbol = filtered_stocks[selected_asset]
-    try:
-        # Récupérer les données avec un intervalle quotidien explicite
-        data = yf.download(ticker_symbol, start=start_date_input, end=end_date_input, interval="1d")
-
-        if data.empty:
-            st.error(f"Aucune donnée disponible pour {selected_asset} dans la période sélectionnée.")
-        else:
-            # S'assurer que les données ne sont pas vides
-            if not data.empty and len(data) > 0:
-                # Extraction des valeurs
-                latest_close_value = float(data['Close'].iloc[-1])
-                first_close_value = float(data['Close'].iloc[0])
-                variation_value = ((latest_close_value - first_close_value) / first_close_value) * 100
-                latest_volume_value = float(data['Volume'].iloc[-1])
-
-                # Affichage des indicateurs clés
-                st.subheader("Indicateurs clés")
-
-                metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
-
-                with metrics_col1:
-                    formatted_close = f"${latest_close_value:.2f}"
-                    st.metric("Prix de clôture", formatted_close)
-
-                with metrics_col2:
-                    formatted_variation = f"{variation_value:.2f}%"
-                    formatted_delta = f"{variation_value:.2f}%"
-                    st.metric("Variation", formatted_variation, delta=formatted_delta)
-
-                with metrics_col3:
-                    vol_str = format_volume(latest_volume_value)
-                    st.metric("Volume (dernier jour)", vol_str)
-
-                # Tableau des données
-                st.subheader("Données historiques")
-
-                # Calculer la variation quotidienne
-                data['Daily_Change'] = data['Close'].pct_change() * 100
-
-                # Créer un DataFrame pour l'affichage avec l'index recréé sans l'heure
-                display_data = pd.DataFrame(index=[d.date() for d in data.index])
-
-                # Convertir les valeurs numpy en valeurs Python natives
-                open_values = [float(x) for x in data['Open'].to_numpy()]
-                high_values = [float(x) for x in data['High'].to_numpy()]
-                low_values = [float(x) for x in data['Low'].to_numpy()]
-                close_values = [float(x) for x in data['Close'].to_numpy()]
-
-                # Formater les prix
-                display_data['Open'] = [f"${x:.2f}" for x in open_values]
-                display_data['High'] = [f"${x:.2f}" for x in high_values]
-                display_data['Low'] = [f"${x:.2f}" for x in low_values]
-                display_data['Close'] = [f"${x:.2f}" for x in close_values]
-
-                # Formater la variation avec gestion des NaN
-                daily_changes = []
-                for x in data['Daily_Change'].to_numpy():
-                    if pd.isna(x):
-                        daily_changes.append("N/A")
-                    else:
-                        daily_changes.append(f"{float(x):.2f}%")
-                display_data['Variation (%)'] = daily_changes
-
-                # Formater le volume
-                volumes = []
-                for vol in data['Volume'].to_numpy():
-                    volumes.append(format_volume(vol))
-                display_data['Volume'] = volumes
-
-                # Affichage du tableau avec filtres
-                st.dataframe(display_data)
-
-                # Créer un excel avec les colonnes inversées et le format pourcentage pour la variation
-                excel_data = create_excel(data, clean_text(selected_asset))
-
-                # Nettoyer le nom du fichier
-                clean_name = clean_text(selected_asset)
-                clean_start = clean_text(start_date_input)
-                clean_end = clean_text(end_date_input)
-
-                st.download_button(
-                    label="Télécharger les données (XLSX)",
-                    data=excel_data,
-                    file_name=f"{clean_name}_{clean_start}_{clean_end}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    key="download_stock"
-                )
-            else:
-                st.error(f"Aucune donnée n'a été récupérée pour {selected_asset}.")
-
-    except Exception as e:
-        st.error(f"Une erreur s'est produite lors de la récupération des données : {e}")
-        st.error(f"Traceback détaillé: {traceback.format_exc()}")
+    display_asset_view(filtered_stocks, "stock", "price", "Choisissez une action")
 
 
 def display_indices_data():
@@ -303,137 +503,435 @@ def display_indices_data():
     )
 
     # Filtrer les indices en fonction du pays
-    filtered_indices = {}
-
     if selected_country == "Tous les pays":
         filtered_indices = index_assets
     else:
         # Filtrer les indices du pays sélectionné
         filtered_indices = index_categories[selected_country]
 
-    # Sélection d'un indice
-    col1, col2, col3 = st.columns(3)
+    # Les indices sont affichés en points
+    display_asset_view(filtered_indices, "index", "points", "Choisissez un indice")
+
+
+def display_portfolio():
+    """
+    Affiche le constructeur de portefeuille multi-actifs : pondérations, rééquilibrage,
+    valeur liquidative, drawdown et contributions par actif
+    """
+    selected_labels = st.multiselect(
+        "Actifs du portefeuille",
+        options=list(all_assets.keys()),
+        default=DEFAULT_PORTFOLIO,
+        key="portfolio_assets"
+    )
+
+    if not selected_labels:
+        st.info("Sélectionnez au moins un actif pour construire le portefeuille.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        selected_asset = st.selectbox("Choisissez un indice", list(filtered_indices.keys()), key="select_index")
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=365)
+        start_date_input = st.date_input("Date de début", value=start_date, key="start_portfolio")
 
     with col2:
+        end_date_input = st.date_input("Date de fin", value=end_date, key="end_portfolio")
+
+    with col3:
+        rebalancing = st.selectbox("Rééquilibrage", list(REBALANCING_FREQUENCIES.keys()), key="rebalancing_portfolio")
+
+    with col4:
+        portfolio_currency = st.selectbox(
+            "Devise du portefeuille", CONVERTIBLE_CURRENCIES,
+            index=CONVERTIBLE_CURRENCIES.index("USD"), key="currency_portfolio"
+        )
+
+    # Pondérations modifiables (équipondéré par défaut) ; la clé change avec la composition
+    weights_table = pd.DataFrame({
+        "Actif": selected_labels,
+        "Poids (%)": [100.0 / len(selected_labels)] * len(selected_labels)
+    })
+    edited_weights = st.data_editor(
+        weights_table,
+        disabled=["Actif"],
+        hide_index=True,
+        key=f"portfolio_weights_{hash(tuple(selected_labels))}"
+    )
+
+    # Poids par symbole (un même symbole peut apparaître dans plusieurs catalogues)
+    weights_by_ticker = {}
+    for label, weight in zip(edited_weights["Actif"], edited_weights["Poids (%)"].fillna(0.0)):
+        ticker_symbol = all_assets[label]
+        weights_by_ticker[ticker_symbol] = weights_by_ticker.get(ticker_symbol, 0.0) + float(weight)
+    tag_rerun(portfolio="+".join(weights_by_ticker), start=start_date_input, end=end_date_input)
+
+    try:
+        prices, missing = load_close_matrix(
+            tuple(weights_by_ticker.keys()), start_date_input, end_date_input, portfolio_currency
+        )
+
+        if missing:
+            st.warning(f"Actifs exclus (aucune donnée ou conversion impossible) : {', '.join(missing)}")
+
+        if len(prices) < 2:
+            st.error("Pas assez de données communes aux actifs sélectionnés dans la période.")
+            return
+
+        weights = [weights_by_ticker[ticker_symbol] for ticker_symbol in prices.columns]
+        if sum(weights) <= 0:
+            st.error("La somme des poids doit être strictement positive.")
+            return
+
+        # Passe vectorisée sur la matrice des rendements : seule cette étape dépend des poids
+        result = backtest(returns_matrix(prices), weights, REBALANCING_FREQUENCIES[rebalancing])
+        statistics = portfolio_statistics(result)
+
+        st.subheader("Indicateurs clés")
+
+        metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
+
+        with metrics_col1:
+            formatted_return = f"{statistics['total_return']:.2f}%"
+            st.metric("Performance", formatted_return, delta=formatted_return)
+
+        with metrics_col2:
+            st.metric("Volatilité annualisée", f"{statistics['annualized_volatility']:.2f}%")
+
+        with metrics_col3:
+            st.metric("Drawdown maximal", f"{statistics['max_drawdown']:.2f}%")
+
+        # Valeur liquidative (base 100) et drawdown
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        figure = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+        figure.add_trace(go.Scatter(x=result["nav"].index, y=result["nav"], name="Valeur liquidative"), row=1, col=1)
+        figure.add_trace(
+            go.Scatter(x=result["drawdown"].index, y=result["drawdown"] * 100, name="Drawdown (%)", fill="tozeroy"),
+            row=2, col=1
+        )
+        figure.update_layout(height=550, margin=dict(l=0, r=0, t=30, b=0))
+        st.plotly_chart(figure)
+
+        # Contributions par actif
+        st.subheader("Contributions par actif")
+        total_weight = sum(weights)
+        contributions = pd.DataFrame({
+            "Poids (%)": [weight / total_weight * 100 for weight in weights],
+            "Contribution (%)": result["contributions"].to_numpy()
+        }, index=prices.columns)
+        st.dataframe(contributions.style.format("{:.2f}"))
+
+    except Exception as e:
+        st.error(f"Une erreur s'est produite lors du calcul du portefeuille : {e}")
+        st.error(f"Traceback détaillé: {traceback.format_exc()}")
+
+
+def display_comparison():
+    """
+    Affiche la comparaison de plusieurs actifs, tous onglets confondus, rebasés à 100
+    """
+    selected_labels = st.multiselect(
+        "Actifs à comparer",
+        options=list(all_assets.keys()),
+        default=DEFAULT_COMPARISON,
+        key="comparison_assets"
+    )
+
+    if not selected_labels:
+        st.info("Sélectionnez au moins un actif à comparer.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=365)
-        start_date_input = st.date_input("Date de début", value=start_date, key="start_index")
+        start_date_input = st.date_input("Date de début", value=start_date, key="start_comparison")
+
+    with col2:
+        end_date_input = st.date_input("Date de fin", value=end_date, key="end_comparison")
 
     with col3:
-        end_date_input = st.date_input("Date de fin", value=end_date, key="end_index")
+        comparison_currency = st.selectbox(
+            "Devise commune",
+            options=[None] + CONVERTIBLE_CURRENCIES,
+            format_func=lambda currency: "Devises d'origine" if currency is None else currency,
+            key="currency_comparison"
+        )
+
+    # Libellé affiché pour chaque symbole
+    labels_by_ticker = {}
+    for label in selected_labels:
+        labels_by_ticker.setdefault(all_assets[label], label)
+    tag_rerun(comparison="+".join(labels_by_ticker), start=start_date_input, end=end_date_input)
 
-    # Récupération des données
-    ticker_symbol = filtered_indices[selected_asset]
     try:
-        # Récupérer les données avec un intervalle quotidien explicite
-        data = yf.download(ticker_symbol, start=start_date_input, end=end_date_input, interval="1d")
+        # Téléchargements parallèles des seules séries absentes du cache, puis alignement vectorisé
+        prices, missing = load_close_matrix(
+            tuple(labels_by_ticker.keys()), start_date_input, end_date_input, comparison_currency
+        )
+
+        if missing:
+            st.warning(f"Actifs exclus (aucune donnée ou conversion impossible) : {', '.join(missing)}")
+
+        if prices.empty:
+            st.error("Aucune donnée commune aux actifs sélectionnés dans la période.")
+            return
+
+        rebased = rebase_prices(prices).rename(columns=labels_by_ticker)
+
+        import plotly.graph_objects as go
+        figure = go.Figure()
+        for label in rebased.columns:
+            figure.add_trace(go.Scatter(x=rebased.index, y=rebased[label], name=label))
+        figure.add_hline(y=100, line_dash="dot", line_color="gray")
+        figure.update_layout(height=500, margin=dict(l=0, r=0, t=30, b=0), yaxis_title="Base 100")
+        st.plotly_chart(figure)
+
+        # Performances de la période
+        st.subheader("Performances de la période")
+        daily_returns = returns_matrix(prices).rename(columns=labels_by_ticker)
+        period_returns = pd.DataFrame({
+            "Performance (%)": (rebased.iloc[-1] / 100 - 1) * 100,
+            "Volatilité annualisée (%)": daily_returns.std() * (periods_per_year(daily_returns.index) ** 0.5) * 100,
+            "Drawdown maximal (%)": (rebased / rebased.cummax() - 1).min() * 100
+        })
+        st.dataframe(period_returns.sort_values("Performance (%)", ascending=False).style.format("{:.2f}"))
 
-        if data.empty:
-            st.error(f"Aucune donnée disponible pour {selected_asset} dans la période sélectionnée.")
+    except Exception as e:
+        st.error(f"Une erreur s'est produite lors de la comparaison : {e}")
+        st.error(f"Traceback détaillé: {traceback.format_exc()}")
+
+
+def authenticated_user_name():
+    """
+    Returns:
+        str: Identité de l'utilisateur connecté (authentification Streamlit), None sans authentification
+    """
+    try:
+        if st.user.is_logged_in:
+            return st.user.get("email") or st.user.get("name")
+    except Exception:
+        pass
+    return None
+
+
+def default_user_name():
+    """
+    Returns:
+        str: Utilisateur connecté (authentification Streamlit), sinon utilisateur du système
+    """
+    user_name = authenticated_user_name()
+    if user_name:
+        return user_name
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "local"
+
+
+def display_watchlists():
+    """
+    Affiche les listes de suivi enregistrées de l'utilisateur : édition, puis tableau de synthèse
+    de la liste choisie, actualisée en une seule vague de téléchargements parallèles
+    """
+    user_col, list_col = st.columns([1, 2])
+
+    with user_col:
+        user_name = authenticated_user_name()
+        if user_name:
+            # Authentification active : listes de l'utilisateur connecté uniquement
+            st.text_input("Utilisateur", value=user_name, disabled=True)
         else:
-            # S'assurer que les données ne sont pas vides
-            if not data.empty and len(data) > 0:
-                # Extraction des valeurs
-                latest_close_value = float(data['Close'].iloc[-1])
-                first_close_value = float(data['Close'].iloc[0])
-                variation_value = ((latest_close_value - first_close_value) / first_close_value) * 100
-                latest_volume_value = float(data['Volume'].iloc[-1])
-
-                # Affichage des indicateurs clés
-                st.subheader("Indicateurs clés")
-
-                metrics_col1, metrics_col2, metrics_col3 = st.columns(3)
-
-                with metrics_col1:
-                    formatted_close = f"{latest_close_value:.2f} pts"
-                    st.metric("Clôture", formatted_close)
-
-                with metrics_col2:
-                    formatted_variation = f"{variation_value:.2f}%"
-                    formatted_delta = f"{variation_value:.2f}%"
-                    st.metric("Variation", formatted_variation, delta=formatted_delta)
-
-                with metrics_col3:
-                    vol_str = format_volume(latest_volume_value)
-                    st.metric("Volume (dernier jour)", vol_str)
-
-                # Tableau des données
-                st.subheader("Données historiques")
-
-                # Calculer la variation quotidienne
-                data['Daily_Change'] = data['Close'].pct_change() * 100
-
-                # Créer un DataFrame pour l'affichage avec l'index recréé sans l'heure
-                display_data = pd.DataFrame(index=[d.date() for d in data.index])
-
-                # Convertir les valeurs numpy en valeurs Python natives
-                open_values = [float(x) for x in data['Open'].to_numpy()]
-                high_values = [float(x) for x in data['High'].to_numpy()]
-                low_values = [float(x) for x in data['Low'].to_numpy()]
-                close_values = [float(x) for x in data['Close'].to_numpy()]
-
-                # Formater les prix pour les indices (en points)
-                display_data['Open'] = [f"{x:.2f} pts" for x in open_values]
-                display_data['High'] = [f"{x:.2f} pts" for x in high_values]
-                display_data['Low'] = [f"{x:.2f} pts" for x in low_values]
-                display_data['Close'] = [f"{x:.2f} pts" for x in close_values]
-
-                # Formater la variation avec gestion des NaN
-                daily_changes = []
-                for x in data['Daily_Change'].to_numpy():
-                    if pd.isna(x):
-                        daily_changes.append("N/A")
-                    else:
-                        daily_changes.append(f"{float(x):.2f}%")
-                display_data['Variation (%)'] = daily_changes
-
-                # Formater le volume
-                volumes = []
-                for vol in data['Volume'].to_numpy():
-                    volumes.append(format_volume(vol))
-                display_data['Volume'] = volumes
-
-                # Affichage du tableau avec filtres
-                st.dataframe(display_data)
-
-                # Créer un excel avec les colonnes inversées et le format pourcentage pour la variation
-                excel_data = create_excel(data, clean_text(selected_asset))
-
-                # Nettoyer le nom du fichier
-                clean_name = clean_text(selected_asset)
-                clean_start = clean_text(start_date_input)
-                clean_end = clean_text(end_date_input)
-
-                st.download_button(
-                    label="Télécharger les données (XLSX)",
-                    data=excel_data,
-                    file_name=f"{clean_name}_{clean_start}_{clean_end}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    key="download_index"
-                )
-            else:
-                st.error(f"Aucune donnée n'a été récupérée pour {selected_asset}.")
+            user_name = st.text_input("Utilisateur", value=default_user_name(), key="watchlist_user")
 
+    try:
+        watchlists = watchlist_store.load(user_name)
     except Exception as e:
-        st.error(f"Une erreur s'est produite lors de la récupération des données : {e}")
+        st.error(f"Impossible de lire les listes de suivi de {user_name} : {e}")
+        return
+
+    # Liste à sélectionner après un enregistrement (le sélecteur ne peut être modifié qu'avant son affichage)
+    if "watchlist_pending" in st.session_state:
+        st.session_state["watchlist_name"] = st.session_state.pop("watchlist_pending")
+
+    with list_col:
+        options = [NEW_WATCHLIST] + sorted(watchlists)
+        if st.session_state.get("watchlist_name") not in options:
+            st.session_state["watchlist_name"] = options[1] if watchlists else NEW_WATCHLIST
+        selected_name = st.selectbox("Liste de suivi", options, key="watchlist_name")
+
+    creating = selected_name == NEW_WATCHLIST
+    saved_labels = [label for label in watchlists.get(selected_name, DEFAULT_WATCHLIST) if label in all_assets]
+
+    with st.expander("Créer une liste" if creating else "Modifier la liste", expanded=creating):
+        edited_name = st.text_input(
+            "Nom de la liste", value="" if creating else selected_name, key=f"watchlist_edit_name_{selected_name}"
+        )
+        edited_labels = st.multiselect(
+            "Actifs", options=list(all_assets.keys()), default=saved_labels,
+            key=f"watchlist_edit_labels_{selected_name}"
+        )
+        save_col, delete_col = st.columns(2)
+        with save_col:
+            if st.button("Enregistrer", key="watchlist_save", disabled=not edited_labels):
+                try:
+                    watchlist_store.save(user_name, edited_name, edited_labels)
+                    if not creating and edited_name.strip() != selected_name:
+                        # Liste renommée
+                        watchlist_store.delete(user_name, selected_name)
+                    st.session_state["watchlist_pending"] = edited_name.strip()
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+        with delete_col:
+            if not creating and st.button("Supprimer", key="watchlist_delete"):
+                watchlist_store.delete(user_name, selected_name)
+                st.session_state["watchlist_pending"] = NEW_WATCHLIST
+                st.rerun()
+
+    if creating:
+        st.info("Enregistrez une liste pour afficher son tableau de synthèse.")
+        return
+
+    labels_by_ticker = {}
+    for label in saved_labels:
+        labels_by_ticker.setdefault(all_assets[label], label)
+    tag_rerun(watchlist=selected_name)
+
+    try:
+        table = watchlist_table(list(labels_by_ticker.keys())).rename(index=labels_by_ticker)
+        return_columns = [column for column in table.columns if column.startswith("Perf.")]
+        st.dataframe(
+            table,
+            column_config={
+                "Date": st.column_config.DateColumn("Date", format="DD/MM/YYYY"),
+                "Clôture": st.column_config.NumberColumn("Clôture", format="%.4f"),
+                **{column: st.column_config.NumberColumn(column, format="%.2f") for column in return_columns},
+                "Tendance": st.column_config.LineChartColumn(f"Tendance ({SPARKLINE_DAYS} jours)"),
+            },
+        )
+        missing = [labels_by_ticker[ticker] for ticker in labels_by_ticker if ticker_summary(ticker) is None]
+        if missing:
+            st.warning(f"Aucune donnée disponible pour : {', '.join(missing)}")
+        st.caption("Clôtures et performances dans la devise de cotation de chaque actif.")
+
+    except Exception as e:
+        st.error(f"Une erreur s'est produite lors de l'actualisation de la liste : {e}")
         st.error(f"Traceback détaillé: {traceback.format_exc()}")
 
 
-# Affichage des données selon l'onglet sélectionné
-with tab1:
-    display_standard_asset_data(crypto_assets, "crypto")
+def display_startup_profile():
+    """
+    Affiche dans la barre latérale le coût des imports du démarrage (mode FINANCE_VIEWER_PROFILE_IMPORTS)
+    """
+    with st.sidebar.expander("Profil de démarrage", expanded=False):
+        st.caption("Durées des premiers imports de modules (en ms), par durée cumulée décroissante.")
+        report = pd.DataFrame(import_timer.report(), columns=["Module", "Durée propre (ms)", "Durée cumulée (ms)"])
+        st.dataframe(report.set_index("Module").round(1))
+        lazy_modules = import_timer.loaded(["yfinance", "openpyxl"])
+        st.caption("Dépendances chargées : " + ", ".join(
+            f"{name} ({'oui' if loaded else 'non'})" for name, loaded in lazy_modules.items()
+        ) + " ; plotly est chargé par Streamlit dès son import, indépendamment des graphiques affichés.")
 
-with tab2:
-    display_stock_data()  # Fonction spéciale pour les actions avec filtrage par secteur
 
-with tab3:
-    display_standard_asset_data(currency_assets, "currency")
+def display_memory_usage():
+    """
+    Affiche dans la barre latérale l'occupation mémoire de chaque réserve et le budget (mode FINANCE_VIEWER_DEBUG)
+    """
+    with st.sidebar.expander("Mémoire", expanded=False):
+        usage = memory_governor.usage()
+        st.dataframe(pd.DataFrame(
+            {"Taille (Mo)": [size / 1024 ** 2 for size in usage.values()]}, index=list(usage.keys())
+        ).round(2))
+        total_mb = sum(usage.values()) / 1024 ** 2
+        budget = memory_governor.budget_bytes
+        st.caption(
+            f"Total : {total_mb:.1f} Mo"
+            + (f" / budget {budget / 1024 ** 2:.0f} Mo" if budget else " (sans budget)")
+            + f" — {memory_governor.stats['evictions']} évictions, "
+            f"{memory_governor.stats['evicted_bytes'] / 1024 ** 2:.1f} Mo libérés"
+        )
+        st.caption(
+            f"Séries : {len(series_store)} en mémoire, {series_store.stats['evictions']} évincées, "
+            f"{series_store.stats['spill_hits']} rechargées du disque"
+        )
+        st.caption(
+            f"Paires croisées : {cross_rates.stats['derived']} lectures calculées, "
+            f"{cross_rates.stats['direct']} téléchargées en repli"
+        )
+
+
+def display_rerun_profile(profile):
+    """
+    Affiche dans la barre latérale le résumé du profil de l'exécution (voir profiling.profile_rerun)
+
+    Args:
+        profile (RerunProfile): Profil de l'exécution
+    """
+    with st.sidebar.expander("Profil de l'exécution", expanded=True):
+        st.caption(f"{profile.duration * 1000:.0f} ms — {profile.label() or 'aucune vue étiquetée'}")
+        st.caption(f"Profil : {profile.paths[0]} — résumé : {profile.paths[1]}")
+        report = pd.DataFrame(
+            profile.top_functions(15, "tottime"),
+            columns=["Fonction", "Appels", "Durée propre (ms)", "Durée cumulée (ms)"]
+        )
+        st.dataframe(report.set_index("Fonction").round(1))
+
+
+def main():
+    """
+    Affiche les données selon l'onglet sélectionné
+    """
+    with tab1:
+        display_standard_asset_data(crypto_assets, "crypto")
+
+    with tab2:
+        display_stock_data()  # Fonction spéciale pour les actions avec filtrage par secteur
+
+    with tab3:
+        display_standard_asset_data(currency_assets, "currency")
+
+    with tab4:
+        display_standard_asset_data(resource_assets, "resource")
+
+    with tab5:
+        display_indices_data()  # Fonction spéciale pour les indices avec filtrage par pays
+
+    with tab6:
+        display_portfolio()
+
+    with tab7:
+        display_comparison()
+
+    with tab8:
+        display_watchlists()
+
+
+# Profil d'une seule exécution (?profile=1, retiré ensuite de l'URL) ou de toutes (FINANCE_VIEWER_PROFILE_RERUNS)
+if PROFILE_RERUNS or st.query_params.get(PROFILE_QUERY_PARAM, "0") not in ("", "0"):
+    rerun_profile = None
+    try:
+        with profile_rerun() as rerun_profile:
+            main()
+    finally:
+        # Aussi quand main() relance la page (st.rerun) : seule cette exécution est profilée
+        if PROFILE_QUERY_PARAM in st.query_params:
+            del st.query_params[PROFILE_QUERY_PARAM]
+        if rerun_profile is not None:
+            display_rerun_profile(rerun_profile)
+        else:
+            st.sidebar.caption("Exécution non profilée : un autre profil est en cours.")
+else:
+    main()
+
+if PROFILE_IMPORTS:
+    display_startup_profile()
 
-with tab4:
-    display_standard_asset_data(resource_assets, "resource")
+# Budget mémoire appliqué une fois la page construite (les tables de cette exécution sont les plus récentes)
+memory_governor.enforce()
 
-with tab5:
-    display_indices_data()  # Fonction spéciale pour les indices avec filtrage par pays
+if SHOW_MEMORY_USAGE:
+    display_memory_usage()
@@ -692,3 +692,18 @@ for country, indices in index_categories.items():
     for name, ticker in indices.items():
         index_assets[name] = ticker
 
+
+# Catalogues d'actifs par onglet
+asset_catalogs = {
+    "Crypto": crypto_assets,
+    "Actions": stock_assets,
+    "Devises": currency_assets,
+    "Ressources": resource_assets,
+    "Indices": index_assets
+}
+
+# Dictionnaire plat de tous les actifs, indexé par "Catalogue - Nom"
+all_assets = {}
+for catalog, assets in asset_catalogs.items():
+    for name, ticker in assets.items():
+        all_assets[f"{catalog} - {name}"] = ticker
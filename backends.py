@@ -0,0 +1,334 @@
+# backends.py
+"""
+Caches partagés entre processus pour l'application Finance Viewer.
+
+Plusieurs réplicas derrière un répartiteur de charge partagent les séries téléchargées et les
+exports générés via un même stockage clé -> octets, choisi par l'URL FINANCE_VIEWER_CACHE_URL :
+- memory://                      : stockage du processus (référence, sans partage)
+- sqlite:///chemin/cache.db      : fichier SQLite en mode WAL sur un volume partagé
+- redis://hôte:port/base         : tout serveur compatible avec le protocole Redis
+Sans URL, aucun cache partagé n'est utilisé.
+
+Chaque backend offre une mise à jour atomique (lecture-fusion-écriture) : des écrivains
+concurrents ne perdent jamais les données les uns des autres.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import unquote, urlparse
+
+# Intervalle minimal entre deux suppressions des entrées expirées d'un fichier SQLite (en secondes)
+SQLITE_PURGE_INTERVAL_SECONDS = 60
+
+# Nombre maximal de tentatives d'une mise à jour Redis en conflit avec un autre écrivain
+REDIS_UPDATE_RETRIES = 20
+
+
+class MemoryBackend:
+    """
+    Stockage clé -> octets du processus, sûr entre threads.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Renvoie la valeur d'une clé.
+
+        Args:
+            key (str): Clé recherchée
+
+        Returns:
+            bytes: Valeur, ou None si la clé est absente ou expirée
+        """
+        with self._lock:
+            value, expires_at = self._entries.get(key, (None, None))
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Enregistre la valeur d'une clé.
+
+        Args:
+            key (str): Clé
+            value (bytes): Valeur
+            ttl (float): Durée de validité en secondes (None : sans expiration)
+        """
+        with self._lock:
+            self._entries[key] = (value, None if ttl is None else time.time() + ttl)
+
+    def update(self, key, merge):
+        """
+        Remplace atomiquement la valeur d'une clé par merge(valeur actuelle).
+
+        Args:
+            key (str): Clé
+            merge (callable): Fonction (octets ou None) -> octets
+        """
+        with self._lock:
+            current, _ = self._entries.get(key, (None, None))
+            self._entries[key] = (merge(current), None)
+
+
+class SQLiteBackend:
+    """
+    Stockage clé -> octets dans un fichier SQLite en mode WAL : lectures concurrentes sans blocage,
+    un écrivain à la fois (les autres attendent jusqu'au délai d'attente).
+    Une connexion par thread, SQLite ne partageant pas ses connexions entre threads.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        """
+        Args:
+            path (str): Chemin du fichier SQLite
+            timeout (float): Attente maximale du verrou d'écriture (en secondes)
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._purged_at = 0.0
+        self._purge_lock = threading.Lock()
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        # Les entrées expirées sont retrouvées par l'index, sans parcourir la table et ses valeurs
+        connection.execute("CREATE INDEX IF NOT EXISTS cache_entries_expires_at ON cache_entries (expires_at)")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Transactions explicites uniquement (BEGIN IMMEDIATE pour les mises à jour)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """
+        Renvoie la valeur d'une clé.
+
+        Args:
+            key (str): Clé recherchée
+
+        Returns:
+            bytes: Valeur, ou None si la clé est absente ou expirée
+        """
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        """
+        Enregistre la valeur d'une clé (et supprime au passage les entrées expirées, au plus une fois
+        par SQLITE_PURGE_INTERVAL_SECONDS).
+
+        Args:
+            key (str): Clé
+            value (bytes): Valeur
+            ttl (float): Durée de validité en secondes (None : sans expiration)
+        """
+        now = time.time()
+        with self._purge_lock:
+            purge = now - self._purged_at >= SQLITE_PURGE_INTERVAL_SECONDS
+            if purge:
+                self._purged_at = now
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if purge:
+                connection.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(value), None if ttl is None else now + ttl)
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def update(self, key, merge):
+        """
+        Remplace atomiquement la valeur d'une clé par merge(valeur actuelle).
+
+        Args:
+            key (str): Clé
+            merge (callable): Fonction (octets ou None) -> octets
+        """
+        connection = self._connection()
+        # Le verrou d'écriture est pris dès la lecture : aucune écriture concurrente ne peut s'intercaler
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT value FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, NULL)",
+                (key, sqlite3.Binary(merge(bytes(row[0]) if row else None)))
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+
+class RedisBackend:
+    """
+    Stockage clé -> octets sur un serveur compatible avec le protocole Redis (RESP).
+    Client minimal sans dépendance : une connexion par thread, mises à jour optimistes (WATCH/MULTI/EXEC).
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=10.0):
+        """
+        Args:
+            host (str): Hôte du serveur
+            port (int): Port du serveur
+            db (int): Numéro de la base
+            password (str): Mot de passe (None si aucun)
+            timeout (float): Délai d'attente des opérations réseau (en secondes)
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            connection = (sock, sock.makefile("rb"))
+            self._local.connection = connection
+            if self.password is not None:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", self.db)
+        return connection
+
+    def _command(self, *args):
+        # Encodage RESP : tableau de chaînes binaires
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        sock, reader = self._connection()
+        try:
+            sock.sendall(b"".join(parts))
+            return self._read_reply(reader)
+        except OSError:
+            # Connexion rompue : elle sera rouverte au prochain appel
+            self._local.connection = None
+            sock.close()
+            raise
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connexion fermée par le serveur Redis.")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RuntimeError(f"Erreur du serveur Redis : {payload.decode('utf-8')}")
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise RuntimeError(f"Réponse Redis inattendue : {line!r}")
+
+    def get(self, key):
+        """
+        Renvoie la valeur d'une clé.
+
+        Args:
+            key (str): Clé recherchée
+
+        Returns:
+            bytes: Valeur, ou None si la clé est absente ou expirée
+        """
+        return self._command("GET", key)
+
+    def set(self, key, value, ttl=None):
+        """
+        Enregistre la valeur d'une clé.
+
+        Args:
+            key (str): Clé
+            value (bytes): Valeur
+            ttl (float): Durée de validité en secondes (None : sans expiration)
+        """
+        if ttl is None:
+            self._command("SET", key, value)
+        else:
+            self._command("SET", key, value, "PX", int(ttl * 1000))
+
+    def update(self, key, merge):
+        """
+        Remplace atomiquement la valeur d'une clé par merge(valeur actuelle). La transaction est
+        rejouée si un autre écrivain a modifié la clé entre la lecture et l'écriture.
+
+        Args:
+            key (str): Clé
+            merge (callable): Fonction (octets ou None) -> octets
+        """
+        for _ in range(REDIS_UPDATE_RETRIES):
+            self._command("WATCH", key)
+            try:
+                value = merge(self._command("GET", key))
+            except Exception:
+                self._command("UNWATCH")
+                raise
+            self._command("MULTI")
+            self._command("SET", key, value)
+            if self._command("EXEC") is not None:
+                return
+        raise RuntimeError(f"Mise à jour de {key} abandonnée après {REDIS_UPDATE_RETRIES} conflits.")
+
+
+def backend_from_url(url):
+    """
+    Crée le cache partagé décrit par une URL.
+
+    Args:
+        url (str): URL du cache (memory://, sqlite:///chemin, redis://[:mot_de_passe@]hôte:port/base)
+
+    Returns:
+        Backend de cache partagé, ou None si l'URL est vide
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend()
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(unquote(parsed.netloc + parsed.path))
+    if parsed.scheme == "redis":
+        return RedisBackend(
+            host=parsed.hostname or "localhost", port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None
+        )
+    raise ValueError(f"Cache partagé non pris en charge : {url}")
+
+
+# Cache partagé par les réplicas (None : chaque processus ne garde que son cache en mémoire)
+shared_backend = backend_from_url(os.environ.get("FINANCE_VIEWER_CACHE_URL", ""))
@@ -0,0 +1,203 @@
+# cache.py
+"""
+Caches en mémoire pour l'application Finance Viewer.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from backends import shared_backend
+from memory import memory_governor
+
+
+def fingerprint_frame(data):
+    """
+    Calcule une empreinte du contenu d'un DataFrame (index, colonnes et valeurs).
+    Deux DataFrames de même contenu ont la même empreinte, quel que soit leur identité.
+
+    Args:
+        data (DataFrame): Données à identifier
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    # Hachage vectorisé ligne par ligne (index compris)
+    hasher.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    hasher.update(repr(list(data.columns)).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class LRUCache:
+    """
+    Cache borné à éviction LRU (moins récemment utilisé), sûr entre threads.
+    Streamlit exécute chaque session dans son propre thread : les accès sont protégés par un verrou.
+    Peut être inscrit comme réserve du budget mémoire (voir memory.py).
+    """
+
+    def __init__(self, max_entries, max_bytes=None, size_of=len):
+        """
+        Args:
+            max_entries (int): Nombre maximal d'entrées
+            max_bytes (int): Taille totale maximale en octets (None pour ne pas borner)
+            size_of (callable): Fonction donnant la taille d'une valeur en octets
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Renvoie la valeur associée à une clé et la marque comme récemment utilisée.
+
+        Args:
+            key: Clé recherchée
+            default: Valeur renvoyée si la clé est absente
+
+        Returns:
+            Valeur en cache ou default
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._touch(key)
+
+    def set(self, key, value):
+        """
+        Ajoute ou remplace une entrée puis évince les plus anciennes au-delà des limites.
+
+        Args:
+            key: Clé de l'entrée
+            value: Valeur à mettre en cache
+        """
+        size = self.size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, time.time())
+            self.total_bytes += size
+            self._evict()
+
+    def get_or_create(self, key, factory):
+        """
+        Renvoie la valeur en cache, ou la crée avec factory() et la met en cache.
+
+        Args:
+            key: Clé de l'entrée
+            factory (callable): Fonction sans argument produisant la valeur
+
+        Returns:
+            Valeur en cache ou nouvellement créée
+        """
+        with self._lock:
+            if key in self._entries:
+                return self._touch(key)
+        # La création se fait hors verrou pour ne pas bloquer les autres sessions
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def clear(self):
+        """
+        Vide le cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def memory_usage(self):
+        """
+        Returns:
+            int: Taille totale des entrées en octets
+        """
+        return self.total_bytes
+
+    def oldest_access(self):
+        """
+        Returns:
+            float: Instant du dernier accès à l'entrée la moins récemment utilisée (None si le cache est vide)
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            return next(iter(self._entries.values()))[2]
+
+    def evict_oldest(self):
+        """
+        Évince l'entrée la moins récemment utilisée.
+
+        Returns:
+            int: Nombre d'octets libérés (None si le cache est vide)
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            return size
+
+    def _touch(self, key):
+        # Marque une entrée comme récemment utilisée ; le verrou est déjà détenu par l'appelant
+        value, size, _ = self._entries.pop(key)
+        self._entries[key] = (value, size, time.time())
+        return value
+
+    def _evict(self):
+        # Le verrou est déjà détenu par l'appelant
+        while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self._entries) > 1):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+
+
+def shared_get_or_create(key, factory, ttl=None):
+    """
+    Renvoie une valeur du cache partagé entre réplicas, ou la crée avec factory() et l'y publie.
+    Sans cache partagé configuré (ou s'il est indisponible), la valeur est simplement créée.
+
+    Args:
+        key (str): Clé de l'entrée
+        factory (callable): Fonction sans argument produisant la valeur (octets)
+        ttl (float): Durée de validité dans le cache partagé en secondes (None : sans expiration)
+
+    Returns:
+        bytes: Valeur partagée ou nouvellement créée
+    """
+    if shared_backend is None:
+        return factory()
+    try:
+        value = shared_backend.get(key)
+    except Exception:
+        value = None
+    if value is not None:
+        return value
+    value = factory()
+    try:
+        shared_backend.set(key, value, ttl)
+    except Exception:
+        # Cache partagé indisponible : la valeur reste dans le cache du processus
+        pass
+    return value
+
+
+# Cache des fichiers d'export générés (octets), indexé par (empreinte, feuille, format)
+EXPORT_CACHE_MAX_ENTRIES = 64
+EXPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+export_cache = LRUCache(EXPORT_CACHE_MAX_ENTRIES, EXPORT_CACHE_MAX_BYTES)
+memory_governor.register("Exports", export_cache)
+
+# Durée de conservation des exports dans le cache partagé (en secondes)
+SHARED_EXPORT_TTL_SECONDS = 24 * 60 * 60
@@ -0,0 +1,465 @@
+# calendars.py
+"""
+Calendriers de cotation par place de marché pour l'application Finance Viewer.
+
+Le calendrier d'un actif est déduit de sa classe (crypto 7j/7, devises 5j/7) ou de sa place
+de cotation (suffixe du symbole, pays de l'indice). Il combine des jours ouvrés, des fériés
+connus par règle et des fermetures apprises : une séance attendue pour laquelle le fournisseur
+n'a renvoyé aucune barre est mémorisée comme fermeture de cet actif et n'est plus redemandée.
+Une fermeture n'est étendue à toute la place que si plusieurs actifs la constatent : la suspension
+d'un seul titre ne prive pas les autres de leurs séances.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import MO
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, EasterMonday, GoodFriday, Holiday, USLaborDay, USMartinLutherKingJr,
+    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday, sunday_to_monday, weekend_to_monday
+)
+
+from assets import index_categories
+
+# Années couvertes par les fériés calculés par règle
+HOLIDAY_YEARS = (1970, 2040)
+
+# Délai de publication des barres : les dates plus récentes ne sont jamais apprises comme fermetures
+CLOSURE_LEARNING_DELAY_DAYS = 2
+
+# Nombre d'actifs d'une place devant constater une même fermeture pour qu'elle s'applique à toute la place
+CLOSURE_QUORUM = 3
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Fériés de la bourse de New York.
+    """
+    rules = [
+        # Un 1er janvier tombant un samedi n'est pas reporté au vendredi 31 décembre, jour de séance
+        Holiday("Nouvel an", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr, USPresidentsDay, GoodFriday, USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Fête de l'indépendance", month=7, day=4, observance=nearest_workday),
+        USLaborDay, USThanksgivingDay,
+        Holiday("Noël", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+class EuropeHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Fériés communs aux bourses d'Europe continentale (Euronext, Xetra, SIX, Milan, Madrid, Nasdaq Nordic).
+    """
+    rules = [
+        Holiday("Nouvel an", month=1, day=1), GoodFriday, EasterMonday,
+        Holiday("Fête du travail", month=5, day=1),
+        Holiday("Noël", month=12, day=25), Holiday("Saint-Étienne", month=12, day=26),
+    ]
+
+
+class LondonHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Fériés de la bourse de Londres.
+    """
+    rules = [
+        Holiday("Nouvel an", month=1, day=1, observance=weekend_to_monday), GoodFriday, EasterMonday,
+        Holiday("Early May bank holiday", month=5, day=1, offset=pd.DateOffset(weekday=MO(1))),
+        Holiday("Spring bank holiday", month=5, day=31, offset=pd.DateOffset(weekday=MO(-1))),
+        Holiday("Summer bank holiday", month=8, day=31, offset=pd.DateOffset(weekday=MO(-1))),
+        Holiday("Noël", month=12, day=25), Holiday("Boxing Day", month=12, day=26),
+    ]
+
+
+class CMEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Fermetures complètes des marchés à terme américains (CME Globex) : ceux-ci cotent la plupart
+    des fériés de la bourse de New York (séances écourtées).
+    """
+    rules = [
+        Holiday("Nouvel an", month=1, day=1, observance=sunday_to_monday), GoodFriday,
+        Holiday("Noël", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+class NewYearHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Seul férié commun à toutes les places (les autres fermetures sont apprises).
+    """
+    rules = [Holiday("Nouvel an", month=1, day=1)]
+
+
+class BusinessDays:
+    """
+    Séances attendues d'un calendrier (jours ouvrés moins fermetures), pour les plages de dates.
+    Les sous-classes fournissent _calendar() (numpy.busdaycalendar).
+    """
+
+    def session_count(self, start_date, end_date):
+        """
+        Compte les séances attendues dans une plage.
+
+        Args:
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            int: Nombre de séances
+        """
+        if end_date <= start_date:
+            return 0
+        return int(np.busday_count(start_date, end_date, busdaycal=self._calendar()))
+
+    def session_counts(self, start_dates, end_dates):
+        """
+        Compte les séances attendues dans plusieurs plages à la fois.
+
+        Args:
+            start_dates (ndarray): Dates de début (incluses, datetime64[D])
+            end_dates (ndarray): Dates de fin (exclues, datetime64[D])
+
+        Returns:
+            ndarray: Nombre de séances de chaque plage (0 si la plage est vide)
+        """
+        return np.maximum(np.busday_count(start_dates, end_dates, busdaycal=self._calendar()), 0)
+
+    def has_sessions(self, start_date, end_date):
+        """
+        Indique si au moins une séance est attendue dans une plage.
+
+        Args:
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            bool: True si le marché ouvre au moins une fois
+        """
+        return self.session_count(start_date, end_date) > 0
+
+    def sessions(self, start_date, end_date):
+        """
+        Liste les séances attendues dans une plage.
+
+        Args:
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            ndarray: Dates des séances (datetime64[D])
+        """
+        days = np.arange(np.datetime64(start_date, "D"), np.datetime64(end_date, "D"))
+        return days[np.is_busday(days, busdaycal=self._calendar())]
+
+    def today(self):
+        """
+        Returns:
+            date: Date du jour dans le fuseau de la place (et non celui du serveur)
+        """
+        return datetime.now(ZoneInfo(self.timezone)).date()
+
+    def session_close(self, session_date):
+        """
+        Args:
+            session_date (date): Date de la séance
+
+        Returns:
+            float: Horodatage (secondes depuis 1970) de la clôture de la séance
+        """
+        return datetime.combine(session_date, self.close_time, tzinfo=ZoneInfo(self.timezone)).timestamp()
+
+
+class TradingCalendar(BusinessDays):
+    """
+    Jours de séance attendus d'une place de marché.
+    """
+
+    def __init__(self, name, weekmask="Mon Tue Wed Thu Fri", holiday_calendar=None, timezone="UTC",
+                 close_time=time.max):
+        """
+        Args:
+            name (str): Nom de la place
+            weekmask (str): Jours de la semaine ouvrés (format numpy.busday)
+            holiday_calendar (AbstractHolidayCalendar): Fériés connus par règle (None : aucun)
+            timezone (str): Fuseau horaire de la place (nom IANA), dans lequel sont datées les barres
+            close_time (time): Heure locale de clôture (time.max : marché ouvert jusqu'à minuit)
+        """
+        self.name = name
+        self.weekmask = weekmask
+        self.holiday_calendar = holiday_calendar
+        self.timezone = timezone
+        self.close_time = close_time
+        # Fermetures constatées par au moins CLOSURE_QUORUM actifs de la place
+        self.learned_closures = set()
+        # Incrémentée à chaque fermeture étendue à la place (les calendriers des actifs sont alors reconstruits)
+        self.version = 0
+        self._closure_tickers = defaultdict(set)
+        self._rule_holidays = None
+        self._busdaycalendar = None
+        self._ticker_calendars = {}
+        self._lock = threading.Lock()
+
+    def holidays(self):
+        """
+        Returns:
+            set: Fériés connus par règle et fermetures apprises de la place (dates)
+        """
+        with self._lock:
+            if self._rule_holidays is None:
+                self._rule_holidays = set()
+                if self.holiday_calendar is not None:
+                    start, end = HOLIDAY_YEARS
+                    rule_holidays = self.holiday_calendar.holidays(f"{start}-01-01", f"{end}-12-31")
+                    self._rule_holidays = set(rule_holidays.date)
+            return self._rule_holidays | self.learned_closures
+
+    def _calendar(self):
+        # Calendrier numpy construit à la demande, puis reconstruit après chaque fermeture étendue à la place
+        with self._lock:
+            busdaycalendar = self._busdaycalendar
+        if busdaycalendar is None:
+            busdaycalendar = build_busdaycalendar(self.weekmask, self.holidays())
+            with self._lock:
+                self._busdaycalendar = busdaycalendar
+        return busdaycalendar
+
+    def for_ticker(self, ticker_symbol):
+        """
+        Renvoie le calendrier d'un actif de la place (un seul par symbole).
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            TickerCalendar: Calendrier de l'actif
+        """
+        with self._lock:
+            calendar = self._ticker_calendars.get(ticker_symbol)
+            if calendar is None:
+                calendar = TickerCalendar(self, ticker_symbol)
+                self._ticker_calendars[ticker_symbol] = calendar
+            return calendar
+
+    def report_closures(self, ticker_symbol, closures):
+        """
+        Enregistre les fermetures constatées par un actif ; celles que CLOSURE_QUORUM actifs ont
+        constatées s'appliquent désormais à toute la place.
+
+        Args:
+            ticker_symbol (str): Symbole de l'actif
+            closures (iterable): Dates des séances sans barre
+
+        Returns:
+            int: Nombre de fermetures étendues à la place
+        """
+        promoted = 0
+        with self._lock:
+            for closure in closures:
+                tickers = self._closure_tickers[closure]
+                tickers.add(ticker_symbol)
+                if len(tickers) >= CLOSURE_QUORUM and closure not in self.learned_closures:
+                    self.learned_closures.add(closure)
+                    promoted += 1
+            if promoted:
+                self._busdaycalendar = None
+                self.version += 1
+        return promoted
+
+
+class TickerCalendar(BusinessDays):
+    """
+    Séances attendues d'un actif : celles de sa place, moins les fermetures apprises pour lui seul
+    (suspension, absence de cotation).
+    """
+
+    def __init__(self, exchange_calendar, ticker_symbol):
+        """
+        Args:
+            exchange_calendar (TradingCalendar): Calendrier de la place de cotation
+            ticker_symbol (str): Symbole Yahoo Finance
+        """
+        self.exchange_calendar = exchange_calendar
+        self.ticker_symbol = ticker_symbol
+        self.name = exchange_calendar.name
+        self.timezone = exchange_calendar.timezone
+        self.close_time = exchange_calendar.close_time
+        self.learned_closures = set()
+        self._busdaycalendar = None
+        self._exchange_version = None
+        self._lock = threading.Lock()
+
+    def _calendar(self):
+        # Reconstruit après un apprentissage de l'actif ou une fermeture étendue à sa place
+        exchange_version = self.exchange_calendar.version
+        with self._lock:
+            if self._busdaycalendar is not None and self._exchange_version == exchange_version:
+                return self._busdaycalendar
+            closures = set(self.learned_closures)
+        busdaycalendar = build_busdaycalendar(
+            self.exchange_calendar.weekmask, self.exchange_calendar.holidays() | closures
+        )
+        with self._lock:
+            self._busdaycalendar = busdaycalendar
+            self._exchange_version = exchange_version
+        return busdaycalendar
+
+    def learn_closures(self, start_date, end_date, bar_dates):
+        """
+        Mémorise comme fermetures de l'actif les séances attendues d'une plage téléchargée sans barre,
+        et les signale à sa place. Les dates trop récentes (barres pas encore publiées) sont ignorées.
+
+        Args:
+            start_date (date): Date de début de la plage téléchargée (incluse)
+            end_date (date): Date de fin de la plage téléchargée (exclue)
+            bar_dates (DatetimeIndex): Dates des barres reçues
+
+        Returns:
+            int: Nombre de fermetures apprises
+        """
+        end_date = min(end_date, date.today() - timedelta(days=CLOSURE_LEARNING_DELAY_DAYS))
+        if len(bar_dates) == 0 or end_date <= start_date:
+            # Une réponse vide peut venir d'une panne : rien n'est appris
+            return 0
+        expected = self.sessions(start_date, end_date)
+        received = np.asarray(bar_dates.tz_localize(None) if bar_dates.tz is not None else bar_dates,
+                              dtype="datetime64[D]")
+        closures = np.setdiff1d(expected, received)
+        # Avant la première barre, l'actif peut ne pas encore exister : rien n'est appris
+        closures = closures[closures > received.min()]
+        if len(closures) == 0:
+            return 0
+        closures = closures.astype(object)
+        with self._lock:
+            self.learned_closures.update(closures)
+            self._busdaycalendar = None
+        self.exchange_calendar.report_closures(self.ticker_symbol, closures)
+        return len(closures)
+
+
+def build_busdaycalendar(weekmask, holidays):
+    """
+    Args:
+        weekmask (str): Jours de la semaine ouvrés (format numpy.busday)
+        holidays (set): Dates de fermeture
+
+    Returns:
+        busdaycalendar: Calendrier numpy des jours de séance
+    """
+    return np.busdaycalendar(weekmask=weekmask, holidays=np.array(sorted(holidays), dtype="datetime64[D]"))
+
+
+# Calendriers par place de marché
+TRADING_CALENDARS = {
+    "CRYPTO": TradingCalendar("Crypto (24h/24, 7j/7)", weekmask="1111111"),
+    "FX": TradingCalendar("Devises (24h/24, 5j/7)", holiday_calendar=NewYearHolidayCalendar(),
+                          timezone="Europe/London"),
+    "NYSE": TradingCalendar("New York", holiday_calendar=NYSEHolidayCalendar(), timezone="America/New_York",
+                            close_time=time(16, 0)),
+    "FUTURES": TradingCalendar("Contrats à terme américains (CME)", holiday_calendar=CMEHolidayCalendar(),
+                               timezone="America/Chicago", close_time=time(16, 0)),
+    "EUROPE": TradingCalendar("Europe continentale", holiday_calendar=EuropeHolidayCalendar(),
+                              timezone="Europe/Paris", close_time=time(17, 35)),
+    "LSE": TradingCalendar("Londres", holiday_calendar=LondonHolidayCalendar(), timezone="Europe/London",
+                           close_time=time(16, 35)),
+    "MIDDLE_EAST_SUN_THU": TradingCalendar("Golfe (dimanche-jeudi)", weekmask="Sun Mon Tue Wed Thu",
+                                           holiday_calendar=NewYearHolidayCalendar(), timezone="Asia/Riyadh",
+                                           close_time=time(15, 10)),
+}
+
+# Places sans fériés connus par règle : jours ouvrés et fermetures apprises ; fuseau et heure locale de clôture
+for exchange, (timezone, close_time) in {
+    "TSX": ("America/Toronto", time(16, 0)),
+    "TOKYO": ("Asia/Tokyo", time(15, 30)),
+    "SHANGHAI": ("Asia/Shanghai", time(15, 0)),
+    "HONG_KONG": ("Asia/Hong_Kong", time(16, 10)),
+    "KOREA": ("Asia/Seoul", time(15, 30)),
+    "TAIWAN": ("Asia/Taipei", time(13, 30)),
+    "SINGAPORE": ("Asia/Singapore", time(17, 16)),
+    "AUSTRALIA": ("Australia/Sydney", time(16, 12)),
+    "INDIA": ("Asia/Kolkata", time(15, 30)),
+    "BRAZIL": ("America/Sao_Paulo", time(18, 0)),
+    "MEXICO": ("America/Mexico_City", time(15, 0)),
+    "ARGENTINA": ("America/Argentina/Buenos_Aires", time(17, 0)),
+    "JOHANNESBURG": ("Africa/Johannesburg", time(17, 0)),
+    "ISTANBUL": ("Europe/Istanbul", time(18, 10)),
+    "MOSCOW": ("Europe/Moscow", time(18, 50)),
+    "TEL_AVIV": ("Asia/Jerusalem", time(17, 25)),
+    "UAE": ("Asia/Dubai", time(15, 0)),
+}.items():
+    TRADING_CALENDARS[exchange] = TradingCalendar(
+        exchange, holiday_calendar=NewYearHolidayCalendar(), timezone=timezone, close_time=close_time
+    )
+
+# Place de cotation selon le suffixe du symbole Yahoo Finance
+SUFFIX_EXCHANGES = {
+    ".PA": "EUROPE", ".DE": "EUROPE", ".F": "EUROPE", ".MI": "EUROPE", ".MC": "EUROPE", ".AS": "EUROPE",
+    ".BR": "EUROPE", ".HE": "EUROPE", ".SW": "EUROPE", ".ST": "EUROPE", ".OL": "EUROPE", ".CO": "EUROPE",
+    ".L": "LSE", ".TO": "TSX", ".V": "TSX", ".T": "TOKYO", ".SS": "SHANGHAI", ".SZ": "SHANGHAI",
+    ".HK": "HONG_KONG", ".KS": "KOREA", ".KQ": "KOREA", ".TW": "TAIWAN", ".SI": "SINGAPORE",
+    ".AX": "AUSTRALIA", ".NS": "INDIA", ".BO": "INDIA", ".SA": "BRAZIL", ".MX": "MEXICO",
+    ".JO": "JOHANNESBURG", ".IS": "ISTANBUL", ".ME": "MOSCOW", ".TA": "TEL_AVIV", ".SR": "MIDDLE_EAST_SUN_THU",
+}
+
+# Place de cotation des indices selon leur pays / région (clés de index_categories)
+COUNTRY_EXCHANGES = {
+    "États-Unis": "NYSE", "Canada": "TSX", "France": "EUROPE", "Allemagne": "EUROPE", "Royaume-Uni": "LSE",
+    "Italie": "EUROPE", "Espagne": "EUROPE", "Pays-Bas": "EUROPE", "Belgique": "EUROPE", "Suisse": "EUROPE",
+    "Scandinavie": "EUROPE", "Europe": "EUROPE", "Japon": "TOKYO", "Chine": "SHANGHAI",
+    "Hong Kong": "HONG_KONG", "Corée du Sud": "KOREA", "Taïwan": "TAIWAN", "Singapour": "SINGAPORE",
+    "Australie": "AUSTRALIA", "Inde": "INDIA", "Brésil": "BRAZIL", "Mexique": "MEXICO",
+    "Argentine": "ARGENTINA", "Afrique du Sud": "JOHANNESBURG", "Turquie": "ISTANBUL", "Russie": "MOSCOW",
+}
+
+# Exceptions : indices d'une région multi-places
+TICKER_EXCHANGES = {
+    "^TA35.TA": "TEL_AVIV", "^QSI": "MIDDLE_EAST_SUN_THU", "^TASI.SR": "MIDDLE_EAST_SUN_THU",
+    "^DFMGI": "UAE", "^ADI": "UAE",
+}
+
+# Place de cotation de chaque indice du catalogue
+INDEX_EXCHANGES = {
+    ticker: COUNTRY_EXCHANGES[country]
+    for country, indices in index_categories.items() if country in COUNTRY_EXCHANGES
+    for ticker in indices.values()
+}
+
+
+def exchange_for_ticker(ticker_symbol):
+    """
+    Détermine la place de cotation (clé de TRADING_CALENDARS) d'un actif.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        str: Clé de TRADING_CALENDARS (NYSE par défaut : actions américaines et ADR)
+    """
+    if ticker_symbol.endswith("=X"):
+        return "FX"
+    if ticker_symbol.endswith("-USD"):
+        return "CRYPTO"
+    if ticker_symbol.endswith("=F"):
+        # Contrats à terme : ouverts pendant la plupart des fériés de New York
+        return "FUTURES"
+    if ticker_symbol in TICKER_EXCHANGES:
+        return TICKER_EXCHANGES[ticker_symbol]
+    if ticker_symbol in INDEX_EXCHANGES:
+        return INDEX_EXCHANGES[ticker_symbol]
+    if "." in ticker_symbol:
+        return SUFFIX_EXCHANGES.get("." + ticker_symbol.rsplit(".", 1)[1], "NYSE")
+    return "NYSE"
+
+
+def calendar_for_ticker(ticker_symbol):
+    """
+    Renvoie le calendrier de cotation d'un actif.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        TickerCalendar: Calendrier de la place de cotation, avec les fermetures apprises pour cet actif
+    """
+    return TRADING_CALENDARS[exchange_for_ticker(ticker_symbol)].for_ticker(ticker_symbol)
@@ -0,0 +1,198 @@
+# crossrates.py
+"""
+Paires de devises croisées pour l'application Finance Viewer.
+
+Une paire sans dollar (EUR/GBP, EUR/JPY, GBP/CHF, AUD/NZD...) se déduit des paires en dollar de
+ses deux devises (EUR/USD et USD/JPY pour EUR/JPY) : seules ces paires sont téléchargées et
+conservées dans le stockage, et chaque paire croisée est calculée localement sur les séries
+alignées. Toute paire de deux devises reliées au dollar est ainsi disponible sans téléchargement.
+La paire cotée n'est téléchargée qu'en repli (paire en dollar indisponible) ou pour vérifier
+la cohérence du calcul.
+"""
+
+import threading
+
+import numpy as np
+
+from currencies import FX_PAIRS, cross_legs, triangulate
+from ohlcv import OHLCVSeries
+from store import series_store
+from summaries import compute_summary, summary_index, summary_table
+
+
+class CrossRateEngine:
+    """
+    Lecture des séries du stockage, les paires croisées étant calculées à partir des paires en dollar.
+    Sûr entre threads.
+    """
+
+    def __init__(self, store, summary_index=None):
+        """
+        Args:
+            store (SeriesStore): Stockage des séries téléchargées
+            summary_index (SummaryIndex): Résumés des séries du stockage (None : aucun)
+        """
+        self.store = store
+        self.summary_index = summary_index
+        # Lectures de paires croisées calculées, et téléchargées directement faute de paire en dollar
+        self.stats = {"derived": 0, "direct": 0}
+        # Résumés des paires croisées : symbole -> (version des paires en dollar, résumé)
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def source_tickers(self, ticker_symbol):
+        """
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            list: Symboles réellement téléchargés pour cet actif (les paires en dollar d'une paire croisée)
+        """
+        legs = cross_legs(ticker_symbol)
+        return [ticker_symbol] if legs is None else [leg_ticker for leg_ticker, _ in legs]
+
+    def source_requests(self, requests):
+        """
+        Remplace les paires croisées d'une liste de demandes par leurs paires en dollar.
+
+        Args:
+            requests (list): Arguments (symbole, début, fin) des appels à fetch_data
+
+        Returns:
+            list: Demandes (symbole, début, fin) adressées au stockage, sans doublon
+        """
+        return list(dict.fromkeys(
+            (source_ticker, start_date, end_date)
+            for ticker_symbol, start_date, end_date in requests
+            for source_ticker in self.source_tickers(ticker_symbol)
+        ))
+
+    def get_range(self, ticker_symbol, start_date, end_date):
+        """
+        Renvoie la série d'un actif sur une plage (voir SeriesStore.get_range) ; une paire croisée est
+        calculée à partir de ses paires en dollar, ou téléchargée directement si l'une d'elles manque.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            DataFrame: Colonnes Open, High, Low, Close, Volume de la plage
+        """
+        legs = cross_legs(ticker_symbol)
+        if legs is None:
+            return self.store.get_range(ticker_symbol, start_date, end_date)
+        (base_ticker, base_invert), (quote_ticker, quote_invert) = legs
+        try:
+            base_data = self.store.get_range(base_ticker, start_date, end_date)
+            quote_data = self.store.get_range(quote_ticker, start_date, end_date)
+        except Exception:
+            base_data = quote_data = None
+        if base_data is None or base_data.empty or quote_data.empty:
+            # Paire en dollar indisponible : repli sur la paire cotée
+            self.stats["direct"] += 1
+            return self.store.get_range(ticker_symbol, start_date, end_date)
+        self.stats["derived"] += 1
+        return triangulate(base_data, base_invert, quote_data, quote_invert)
+
+    def refresh_tail(self, ticker_symbol):
+        """
+        Actualise la fin de la série d'un actif (des paires en dollar pour une paire croisée).
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            int: Nombre de barres reçues
+        """
+        return sum(self.store.refresh_tail(source_ticker) for source_ticker in self.source_tickers(ticker_symbol))
+
+    def summary(self, ticker_symbol):
+        """
+        Renvoie le résumé d'un actif ; celui d'une paire croisée est calculé sur l'historique en stockage
+        de ses paires en dollar, et recalculé seulement quand l'une d'elles reçoit des barres.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            dict: Résumé (voir summaries.compute_summary), None si la série n'a jamais été chargée
+        """
+        legs = cross_legs(ticker_symbol)
+        direct_summary = self.summary_index.get(ticker_symbol) if self.summary_index is not None else None
+        if legs is None:
+            return direct_summary
+        (base_ticker, base_invert), (quote_ticker, quote_invert) = legs
+        base_series = self.store.stored_series(base_ticker)
+        quote_series = self.store.stored_series(quote_ticker)
+        if base_series is None or base_series.is_empty or quote_series is None or quote_series.is_empty:
+            # Paires en dollar jamais chargées : résumé de la paire cotée si elle a été téléchargée en repli
+            return direct_summary
+        # Révision et nombre de barres de chaque paire en dollar (sans retenir les séries, qui restent évinçables)
+        version = tuple(
+            (self.store.revision(leg_ticker), len(series.timestamps))
+            for leg_ticker, series in [(base_ticker, base_series), (quote_ticker, quote_series)]
+        )
+        with self._lock:
+            cached = self._summaries.get(ticker_symbol)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        summary = compute_summary(OHLCVSeries.from_frame(
+            triangulate(base_series.to_frame(), base_invert, quote_series.to_frame(), quote_invert)
+        ))
+        with self._lock:
+            self._summaries[ticker_symbol] = (version, summary)
+        return summary
+
+    def summary_table(self, ticker_symbols=None):
+        """
+        Construit le tableau des résumés (voir summaries.summary_table), les paires croisées étant
+        résumées à partir de leurs paires en dollar.
+
+        Args:
+            ticker_symbols (list): Symboles à inclure (None : symboles résumés du stockage et paires
+                croisées du catalogue)
+
+        Returns:
+            DataFrame: Une ligne par symbole résumé
+        """
+        if ticker_symbols is None:
+            index_tickers = self.summary_index.tickers() if self.summary_index is not None else []
+            ticker_symbols = dict.fromkeys(
+                [ticker for ticker in index_tickers if cross_legs(ticker) is None]
+                + [ticker for ticker in FX_PAIRS.values() if cross_legs(ticker) is not None]
+            )
+        return summary_table({ticker: self.summary(ticker) for ticker in ticker_symbols})
+
+    def consistency(self, ticker_symbol, start_date, end_date):
+        """
+        Compare les clôtures calculées d'une paire croisée à celles de la paire cotée, téléchargée
+        pour l'occasion.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance de la paire croisée
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            dict: dates (nombre de dates comparées), mean_deviation et max_deviation (écarts relatifs
+                absolus en %, NaN si aucune date commune)
+        """
+        derived = self.get_range(ticker_symbol, start_date, end_date)
+        quoted = self.store.get_range(ticker_symbol, start_date, end_date)
+        common_dates = derived.index.intersection(quoted.index)
+        derived_closes = derived['Close'].reindex(common_dates).to_numpy(dtype=float)
+        quoted_closes = quoted['Close'].reindex(common_dates).to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            deviations = np.abs(derived_closes / quoted_closes - 1.0) * 100
+        deviations = deviations[np.isfinite(deviations)]
+        return {
+            "dates": len(deviations),
+            "mean_deviation": float(deviations.mean()) if len(deviations) else float("nan"),
+            "max_deviation": float(deviations.max()) if len(deviations) else float("nan"),
+        }
+
+
+# Moteur partagé par toutes les sessions du processus
+cross_rates = CrossRateEngine(series_store, summary_index)
@@ -0,0 +1,254 @@
+# currencies.py
+"""
+Devises de cotation des actifs et conversion des prix pour l'application Finance Viewer.
+"""
+
+import numpy as np
+import pandas as pd
+
+from assets import currency_assets, index_categories
+
+# Devise de cotation selon le suffixe du symbole Yahoo Finance
+SUFFIX_CURRENCIES = {
+    ".PA": "EUR", ".DE": "EUR", ".F": "EUR", ".MI": "EUR", ".MC": "EUR", ".AS": "EUR",
+    ".BR": "EUR", ".HE": "EUR", ".L": "GBP", ".SW": "CHF", ".ST": "SEK", ".OL": "NOK",
+    ".CO": "DKK", ".NS": "INR", ".BO": "INR", ".KS": "KRW", ".KQ": "KRW", ".T": "JPY",
+    ".HK": "HKD", ".SS": "CNY", ".SZ": "CNY", ".TW": "TWD", ".SI": "SGD", ".AX": "AUD",
+    ".TO": "CAD", ".V": "CAD", ".SA": "BRL", ".MX": "MXN", ".JO": "ZAR", ".ME": "RUB",
+    ".IS": "TRY", ".TA": "ILS", ".SR": "SAR",
+}
+
+# Devise des indices selon leur pays / région (clés de index_categories)
+COUNTRY_CURRENCIES = {
+    "États-Unis": "USD", "Canada": "CAD", "France": "EUR", "Allemagne": "EUR",
+    "Royaume-Uni": "GBP", "Italie": "EUR", "Espagne": "EUR", "Pays-Bas": "EUR",
+    "Belgique": "EUR", "Suisse": "CHF", "Europe": "EUR", "Japon": "JPY", "Chine": "CNY",
+    "Hong Kong": "HKD", "Corée du Sud": "KRW", "Taïwan": "TWD", "Singapour": "SGD",
+    "Australie": "AUD", "Inde": "INR", "Brésil": "BRL", "Mexique": "MXN", "Argentine": "ARS",
+    "Afrique du Sud": "ZAR", "Turquie": "TRY", "Russie": "RUB",
+}
+
+# Places cotant leurs actions en centièmes de la devise (pence GBp, cents ZAc, agorot ILA) :
+# suffixe -> facteur de passage à l'unité de la devise (les indices sont exprimés en points)
+MINOR_UNIT_SUFFIXES = {".L": 0.01, ".JO": 0.01, ".TA": 0.01}
+
+# Exceptions : régions multi-devises et indices cotés dans une autre devise que leur pays
+TICKER_CURRENCIES = {
+    "^OMX": "SEK", "^OMXC20": "DKK", "^OMXH25": "EUR", "^OSEOBX": "NOK",
+    "^TA35.TA": "ILS", "^QSI": "QAR", "^DFMGI": "AED", "^ADI": "AED", "^TASI.SR": "SAR",
+    "^RTSI": "USD",
+}
+
+# Symboles affichés en préfixe ; les autres devises sont affichées par leur code en suffixe
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+
+# Devise de chaque indice du catalogue
+INDEX_CURRENCIES = {
+    ticker: COUNTRY_CURRENCIES[country]
+    for country, indices in index_categories.items() if country in COUNTRY_CURRENCIES
+    for ticker in indices.values()
+}
+
+# Paires disponibles dans le catalogue : (devise de base, devise de cotation) -> symbole
+FX_PAIRS = {tuple(name.split("/")): ticker for name, ticker in currency_assets.items()}
+
+# Devises pour lesquelles une conversion est possible
+CONVERTIBLE_CURRENCIES = sorted({currency for pair in FX_PAIRS for currency in pair})
+
+# Devise pivot : une paire croisée (sans cette devise) se déduit des deux paires qui la contiennent
+PIVOT_CURRENCY = "USD"
+
+
+def native_currency(ticker_symbol):
+    """
+    Détermine la devise de cotation d'un actif à partir de son symbole.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        str: Code ISO de la devise (USD par défaut : actions américaines, ADR, cryptos, matières premières)
+    """
+    if ticker_symbol in TICKER_CURRENCIES:
+        return TICKER_CURRENCIES[ticker_symbol]
+    if ticker_symbol.endswith("=X"):
+        # Paire de devises : le prix est exprimé dans la devise de cotation (EURUSD=X -> USD)
+        return ticker_symbol[3:6]
+    if ticker_symbol in INDEX_CURRENCIES:
+        return INDEX_CURRENCIES[ticker_symbol]
+    if "." in ticker_symbol:
+        suffix = "." + ticker_symbol.rsplit(".", 1)[1]
+        return SUFFIX_CURRENCIES.get(suffix, "USD")
+    return "USD"
+
+
+def minor_unit_factor(ticker_symbol):
+    """
+    Détermine le facteur de passage des prix cotés à l'unité de leur devise de cotation.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        float: 0.01 pour une action cotée en centièmes (BARC.L en pence), 1.0 sinon
+    """
+    if ticker_symbol.startswith("^") or ticker_symbol in INDEX_CURRENCIES or ticker_symbol in TICKER_CURRENCIES:
+        return 1.0
+    if "." in ticker_symbol:
+        return MINOR_UNIT_SUFFIXES.get("." + ticker_symbol.rsplit(".", 1)[1], 1.0)
+    return 1.0
+
+
+def currency_affixes(currency):
+    """
+    Renvoie le préfixe et le suffixe d'affichage d'une devise.
+
+    Args:
+        currency (str): Code ISO de la devise
+
+    Returns:
+        tuple: (préfixe, suffixe), par exemple ("€", "") ou ("", " INR")
+    """
+    if currency in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[currency], ""
+    return "", f" {currency}"
+
+
+def _direct_leg(from_currency, to_currency):
+    # Paire du catalogue permettant de passer de from_currency à to_currency : (symbole, inverser)
+    if (from_currency, to_currency) in FX_PAIRS:
+        return FX_PAIRS[(from_currency, to_currency)], False
+    if (to_currency, from_currency) in FX_PAIRS:
+        return FX_PAIRS[(to_currency, from_currency)], True
+    return None
+
+
+def fx_route(from_currency, to_currency):
+    """
+    Détermine les paires du catalogue à enchaîner pour convertir une devise en une autre.
+    Utilise la paire directe (ou inverse) si elle existe, sinon passe par le dollar.
+
+    Args:
+        from_currency (str): Devise d'origine
+        to_currency (str): Devise cible
+
+    Returns:
+        list: Liste de (symbole de la paire, inverser) ; liste vide si les devises sont identiques,
+            None si aucune conversion n'est possible
+    """
+    if from_currency == to_currency:
+        return []
+    direct = _direct_leg(from_currency, to_currency)
+    if direct is not None:
+        return [direct]
+    first_leg = _direct_leg(from_currency, "USD")
+    second_leg = _direct_leg("USD", to_currency)
+    if first_leg is None or second_leg is None:
+        return None
+    return [first_leg, second_leg]
+
+
+def cross_legs(ticker_symbol):
+    """
+    Détermine les paires en dollar dont se déduit une paire croisée (EURJPY=X : EURUSD=X et USDJPY=X).
+    Toute paire de deux devises reliées au dollar par le catalogue est concernée, qu'elle figure
+    ou non dans currency_assets.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        tuple: ((symbole, inverser) de la devise de base, (symbole, inverser) de la devise de cotation),
+            chaque paire donnant le prix de la devise en dollars ; None si le symbole n'est pas une paire
+            croisée, ou si l'une des paires en dollar manque au catalogue
+    """
+    if len(ticker_symbol) != 8 or not ticker_symbol.endswith("=X"):
+        return None
+    base_currency, quote_currency = ticker_symbol[:3], ticker_symbol[3:6]
+    if PIVOT_CURRENCY in (base_currency, quote_currency) or base_currency == quote_currency:
+        return None
+    base_leg = _direct_leg(base_currency, PIVOT_CURRENCY)
+    quote_leg = _direct_leg(quote_currency, PIVOT_CURRENCY)
+    if base_leg is None or quote_leg is None:
+        return None
+    return base_leg, quote_leg
+
+
+def _pivot_prices(data, invert):
+    # Prix en dollars d'une unité de la devise (ouverture, plus haut, plus bas, clôture) ;
+    # une paire inversée (USD/JPY) échange son plus haut et son plus bas
+    opens, highs, lows, closes = (data[column].to_numpy(dtype=float) for column in ['Open', 'High', 'Low', 'Close'])
+    if invert:
+        return 1.0 / opens, 1.0 / lows, 1.0 / highs, 1.0 / closes
+    return opens, highs, lows, closes
+
+
+def triangulate(base_data, base_invert, quote_data, quote_invert):
+    """
+    Calcule une paire croisée à partir des paires en dollar de ses deux devises, en une passe
+    vectorisée : la seconde est alignée sur les dates de la première (dernier cours connu).
+    L'ouverture et la clôture sont exactes (rapport des cours en dollars) ; le plus haut et le plus
+    bas sont estimés par le rapport des extrêmes de même sens, bornés par l'ouverture et la clôture.
+
+    Args:
+        base_data (DataFrame): Paire en dollar de la devise de base (Open, High, Low, Close)
+        base_invert (bool): True si la paire cote le dollar dans la devise de base (USD/JPY)
+        quote_data (DataFrame): Paire en dollar de la devise de cotation (non vide)
+        quote_invert (bool): True si la paire cote le dollar dans la devise de cotation
+
+    Returns:
+        DataFrame: Colonnes Close, High, Low, Open et Volume (nul) de la paire croisée, aux dates
+            de base_data postérieures à la première cotation de quote_data
+    """
+    if not quote_data.empty:
+        # Avant la première cotation de la seconde paire, aucun taux n'est connu
+        base_data = base_data[base_data.index >= quote_data.index[0]]
+    base_prices = _pivot_prices(base_data, base_invert)
+    quote_prices = [
+        asof_rates(quote_data.index, values, base_data.index) for values in _pivot_prices(quote_data, quote_invert)
+    ]
+    opens, highs, lows, closes = (base / quote for base, quote in zip(base_prices, quote_prices))
+    return pd.DataFrame({
+        'Close': closes,
+        # Les extrêmes des deux paires ne sont pas simultanés : l'estimation englobe l'ouverture et la clôture
+        'High': np.fmax(highs, np.fmax(opens, closes)),
+        'Low': np.fmin(lows, np.fmin(opens, closes)),
+        'Open': opens,
+        'Volume': np.zeros(len(base_data), dtype=np.uint64),
+    }, index=base_data.index)
+
+
+def asof_rates(rate_index, rate_values, target_index):
+    """
+    Aligne une série de taux sur un autre calendrier (dernier taux connu à chaque date).
+    L'alignement est une recherche dichotomique vectorisée, sans boucle par ligne.
+
+    Args:
+        rate_index (DatetimeIndex): Dates de la série de taux (triées)
+        rate_values (ndarray): Valeurs des taux
+        target_index (DatetimeIndex): Dates sur lesquelles aligner
+
+    Returns:
+        ndarray: Taux aligné pour chaque date de target_index
+    """
+    rate_values = np.asarray(rate_values, dtype=float)
+    positions = np.searchsorted(rate_index.asi8, target_index.asi8, side="right") - 1
+    # Avant la première cotation du taux, utiliser le premier taux disponible
+    return rate_values[np.clip(positions, 0, len(rate_values) - 1)]
+
+
+def convert_ohlc(data, rates):
+    """
+    Convertit les colonnes de prix d'un DataFrame avec un taux par ligne (une seule opération).
+
+    Args:
+        data (DataFrame): Données avec les colonnes Open, High, Low, Close
+        rates (ndarray): Taux de conversion aligné sur l'index de data
+
+    Returns:
+        DataFrame: Copie de data avec les prix convertis (volume inchangé)
+    """
+    converted = data.copy()
+    price_columns = ['Open', 'High', 'Low', 'Close']
+    converted[price_columns] = data[price_columns].to_numpy(dtype=float) * np.asarray(rates)[:, None]
+    return converted
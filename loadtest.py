@@ -0,0 +1,515 @@
+# loadtest.py
+"""
+Test de charge de l'application Finance Viewer, sans navigateur ni accès au fournisseur.
+
+Pour chaque niveau de concurrence, un serveur `streamlit run app.py` est démarré en local et N
+sessions simulées s'y connectent comme des navigateurs (websocket /_stcore/stream) : elles partagent
+donc les caches, les verrous et l'interpréteur du serveur. Chaque session choisit au hasard un onglet,
+un actif de assets.py, une période ou une granularité, puis relance la page. Les données viennent
+du fournisseur synthétique (ou d'une cassette rejouée). Sont mesurés les percentiles de latence des
+exécutions, le débit, le temps CPU et la mémoire résidente du serveur (Linux : /proc).
+
+Exemple :
+    python loadtest.py --sessions 1,2,4,8 --reruns 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import date, timedelta
+
+# Onglets d'actifs (clé des widgets de display_asset_view)
+ASSET_TABS = ["crypto", "stock", "currency", "resource", "index"]
+
+# Durées de période proposées (en jours)
+PERIOD_DAYS = [30, 90, 365, 3 * 365, 10 * 365]
+
+# Interactions simulées et leur poids
+ACTIONS = {"asset": 5, "period": 3, "granularity": 2, "portfolio": 1, "comparison": 1}
+
+# Fin d'une exécution complète de la page (les exécutions de fragments et les relances sont ignorées)
+FINAL_RUN_STATUSES = {"FINISHED_SUCCESSFULLY", "FINISHED_WITH_COMPILE_ERROR"}
+
+
+def parse_args(argv=None):
+    """
+    Args:
+        argv (list): Arguments de la ligne de commande (None : sys.argv)
+
+    Returns:
+        Namespace: Options du test
+    """
+    parser = argparse.ArgumentParser(description="Test de charge de l'application Finance Viewer (hors ligne).")
+    parser.add_argument("--sessions", default="1,2,4,8",
+                        help="Niveaux de concurrence, séparés par des virgules (défaut : 1,2,4,8)")
+    parser.add_argument("--reruns", type=int, default=10, help="Exécutions mesurées par session (défaut : 10)")
+    parser.add_argument("--provider", choices=["synthetic", "replay"], default="synthetic",
+                        help="Données synthétiques ou cassette rejouée (FINANCE_VIEWER_CASSETTE)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Latence simulée de chaque appel au fournisseur (en secondes)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Mesurer aussi la première exécution de chaque session (caches vides)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des choix aléatoires")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Durée maximale d'une exécution (en secondes)")
+    parser.add_argument("--app", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                        help="Chemin de app.py")
+    return parser.parse_args(argv)
+
+
+def configure_provider(provider, latency):
+    """
+    Sélectionne le fournisseur hors ligne ; doit précéder tout import des modules de l'application.
+
+    Args:
+        provider (str): "synthetic" ou "replay"
+        latency (float): Latence simulée de chaque appel (en secondes)
+    """
+    if provider == "synthetic":
+        os.environ["FINANCE_VIEWER_PROVIDER"] = "synthetic"
+    else:
+        os.environ["FINANCE_VIEWER_CASSETTE_MODE"] = "replay"
+    os.environ["FINANCE_VIEWER_REPLAY_LATENCY"] = str(latency)
+
+
+def random_period(rng):
+    """
+    Args:
+        rng (Random): Générateur aléatoire de la session
+
+    Returns:
+        tuple: Dates de début et de fin
+    """
+    end_date = date.today() - timedelta(days=rng.randint(0, 30))
+    return end_date - timedelta(days=rng.choice(PERIOD_DAYS)), end_date
+
+
+class SessionClient:
+    """
+    Session simulée : une connexion websocket au serveur, comme un onglet de navigateur.
+    Les valeurs des widgets modifiés sont renvoyées à chaque exécution, comme le fait le navigateur.
+    """
+
+    def __init__(self, url, timeout):
+        """
+        Args:
+            url (str): Adresse websocket du serveur (ws://.../_stcore/stream)
+            timeout (float): Durée maximale d'une exécution (en secondes)
+        """
+        self.url = url
+        self.timeout = timeout
+        # Widgets de la dernière exécution : clé -> (type d'élément, message protobuf)
+        self.widgets = {}
+        self.widget_states = {}
+        self._websocket = None
+
+    async def connect(self):
+        """
+        Ouvre la connexion websocket de la session.
+        """
+        # Client websocket installé avec Streamlit
+        import websockets
+
+        self._websocket = await asyncio.wait_for(websockets.connect(self.url, max_size=None), self.timeout)
+
+    async def close(self):
+        """
+        Ferme la connexion (le serveur libère la session).
+        """
+        if self._websocket is not None:
+            await self._websocket.close()
+
+    async def run(self):
+        """
+        Relance la page et attend la fin de l'exécution.
+
+        Returns:
+            list: Erreurs affichées par la page (exceptions et st.error)
+        """
+        from streamlit.proto.Alert_pb2 import Alert
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        back_msg = BackMsg()
+        back_msg.rerun_script.query_string = ""
+        back_msg.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        await self._websocket.send(back_msg.SerializeToString())
+
+        widgets, errors = {}, []
+        deadline = time.monotonic() + self.timeout
+        while True:
+            forward_msg = ForwardMsg()
+            forward_msg.ParseFromString(
+                await asyncio.wait_for(self._websocket.recv(), max(deadline - time.monotonic(), 0))
+            )
+            message_type = forward_msg.WhichOneof("type")
+            if message_type == "script_finished":
+                if ForwardMsg.ScriptFinishedStatus.Name(forward_msg.script_finished) in FINAL_RUN_STATUSES:
+                    break
+            elif message_type == "delta" and forward_msg.delta.WhichOneof("type") == "new_element":
+                element = forward_msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                proto = getattr(element, element_type)
+                if element_type == "exception":
+                    errors.append(proto.message)
+                elif element_type == "alert" and proto.format == Alert.Format.ERROR:
+                    errors.append(proto.body[:200])
+                elif "id" in proto.DESCRIPTOR.fields_by_name and proto.id:
+                    # Identifiant de widget : $$ID-<empreinte>-<clé>
+                    widgets[proto.id.split("-", 2)[-1]] = (element_type, proto)
+        self.widgets = widgets
+        return errors
+
+    def set_value(self, key, values):
+        """
+        Modifie un widget de la dernière exécution (valeur envoyée à la prochaine exécution).
+
+        Args:
+            key (str): Clé du widget
+            values (list): Valeurs sérialisées (libellé d'option, dates AAAA-MM-JJ)
+        """
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        element_type, proto = self.widgets[key]
+        widget_state = WidgetState(id=proto.id)
+        if element_type == "selectbox":
+            widget_state.string_value = values[0]
+        else:
+            widget_state.string_array_value.data[:] = values
+        self.widget_states[key] = widget_state
+
+    def options(self, key):
+        """
+        Args:
+            key (str): Clé du widget
+
+        Returns:
+            list: Options proposées par le widget
+        """
+        return list(self.widgets[key][1].options)
+
+
+def simulate_interaction(session, rng):
+    """
+    Applique une interaction aléatoire aux widgets d'une session (sans relancer la page).
+
+    Args:
+        session (SessionClient): Session simulée
+        rng (Random): Générateur aléatoire de la session
+
+    Returns:
+        str: Nom de l'interaction
+    """
+    action = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+    tab_key = rng.choice(ASSET_TABS)
+    if action == "asset":
+        session.set_value(f"select_{tab_key}", [rng.choice(session.options(f"select_{tab_key}"))])
+    elif action == "period":
+        start_date, end_date = random_period(rng)
+        session.set_value(f"start_{tab_key}", [start_date.isoformat()])
+        session.set_value(f"end_{tab_key}", [end_date.isoformat()])
+    elif action == "granularity":
+        session.set_value(f"granularity_{tab_key}", [rng.choice(session.options(f"granularity_{tab_key}"))])
+    elif action == "portfolio":
+        start_date, end_date = random_period(rng)
+        session.set_value("start_portfolio", [start_date.isoformat()])
+        session.set_value("end_portfolio", [end_date.isoformat()])
+    else:
+        options = session.options("comparison_assets")
+        session.set_value("comparison_assets", rng.sample(options, rng.randint(2, 5)))
+    return action
+
+
+async def run_session(session, reruns, seed, cold):
+    """
+    Exécute les interactions mesurées d'une session connectée.
+
+    Args:
+        session (SessionClient): Session simulée (déjà exécutée une fois, sauf avec cold)
+        reruns (int): Nombre d'exécutions mesurées
+        seed (int): Graine de la session
+        cold (bool): True pour mesurer aussi l'exécution initiale
+
+    Returns:
+        dict: latencies (secondes) et failures de la session
+    """
+    rng = random.Random(seed)
+    latencies, failures = [], []
+
+    async def measured_run(action):
+        start = time.perf_counter()
+        try:
+            errors = await session.run()
+        except Exception as e:
+            failures.append(f"{action}: {type(e).__name__} {e}")
+            return False
+        latencies.append(time.perf_counter() - start)
+        failures.extend(f"{action}: {error}" for error in errors[:1])
+        return True
+
+    if cold and not await measured_run("initial"):
+        return {"latencies": latencies, "failures": failures}
+    for _ in range(reruns):
+        try:
+            action = simulate_interaction(session, rng)
+        except KeyError as e:
+            # Widget absent de la dernière exécution (page interrompue par une erreur)
+            failures.append(f"widget absent : {e}")
+            action = "rerun"
+        if not await measured_run(action):
+            # Connexion perdue ou exécution trop longue : la session s'arrête
+            break
+    return {"latencies": latencies, "failures": failures}
+
+
+async def run_sessions(url, options, session_count, server_pid):
+    """
+    Connecte les sessions d'un niveau (exécution initiale hors mesure, sauf avec --cold), puis
+    lance leurs interactions ensemble.
+
+    Args:
+        url (str): Adresse websocket du serveur
+        options (Namespace): Options du test
+        session_count (int): Nombre de sessions simultanées
+        server_pid (int): Processus du serveur, dont l'usage est relevé autour de la phase mesurée
+
+    Returns:
+        dict: sessions (mesures de run_session), failures (sessions non connectées), elapsed (durée de
+            la phase mesurée), usage_before et usage_after (voir process_usage)
+    """
+    sessions = [SessionClient(url, options.timeout) for _ in range(session_count)]
+
+    async def connect(session):
+        await session.connect()
+        if not options.cold:
+            # Mise en route hors mesure : imports et premiers téléchargements
+            await session.run()
+
+    # Une session qui ne se connecte pas est signalée, sans bloquer le départ des autres
+    connections = await asyncio.gather(*(connect(session) for session in sessions), return_exceptions=True)
+    failures = [
+        f"session {index} non connectée : {type(error).__name__} {error}"
+        for index, error in enumerate(connections) if isinstance(error, BaseException)
+    ]
+    connected = [session for session, error in zip(sessions, connections) if not isinstance(error, BaseException)]
+    usage_before = process_usage(server_pid)
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            run_session(session, options.reruns, options.seed * 1000 + index, options.cold)
+            for index, session in enumerate(connected)
+        ))
+    finally:
+        elapsed = time.perf_counter() - start
+        usage_after = process_usage(server_pid)
+        for session in sessions:
+            try:
+                await session.close()
+            except Exception:
+                pass
+    return {
+        "sessions": results, "failures": failures, "elapsed": elapsed,
+        "usage_before": usage_before, "usage_after": usage_after,
+    }
+
+
+def free_port():
+    """
+    Returns:
+        int: Port TCP local libre
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(app_path, timeout):
+    """
+    Démarre un serveur Streamlit neuf (caches vides) et attend qu'il réponde.
+
+    Args:
+        app_path (str): Chemin de app.py
+        timeout (float): Délai maximal de démarrage (en secondes)
+
+    Returns:
+        tuple: Processus du serveur, port
+
+    Raises:
+        RuntimeError: Le serveur s'est arrêté ou n'a pas répondu à temps (avec la fin de son journal)
+    """
+    port = free_port()
+    log_file = tempfile.TemporaryFile()
+    # Le serveur hérite de l'environnement (fournisseur hors ligne)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path, "--server.headless", "true",
+         "--server.address", "127.0.0.1", "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=log_file, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server, port
+        except OSError:
+            time.sleep(0.2)
+    stop_server(server)
+    log_file.seek(0)
+    log = log_file.read().decode("utf-8", "replace").strip().splitlines()
+    raise RuntimeError(f"serveur indisponible (code {server.returncode}) : {' | '.join(log[-3:])}")
+
+
+def stop_server(server):
+    """
+    Args:
+        server (Popen): Processus du serveur
+    """
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def process_usage(pid):
+    """
+    Args:
+        pid (int): Identifiant du processus (None : aucun)
+
+    Returns:
+        dict: cpu_seconds (utilisateur et système), rss_mb et peak_rss_mb (NaN hors Linux)
+    """
+    try:
+        if pid is None:
+            raise OSError("aucun processus")
+        with open(f"/proc/{pid}/stat") as stat_file:
+            # Champs 14 et 15 (après le nom du programme, entre parenthèses) : temps utilisateur et système
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as status_file:
+            status = dict(line.split(":", 1) for line in status_file if ":" in line)
+    except OSError:
+        return {"cpu_seconds": float("nan"), "rss_mb": float("nan"), "peak_rss_mb": float("nan")}
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"),
+        "rss_mb": int(status["VmRSS"].split()[0]) / 1024,
+        "peak_rss_mb": int(status["VmHWM"].split()[0]) / 1024,
+    }
+
+
+def percentile(values, fraction):
+    """
+    Args:
+        values (list): Valeurs triées
+        fraction (float): Rang relatif (0 à 1)
+
+    Returns:
+        float: Percentile par interpolation linéaire (NaN si aucune valeur)
+    """
+    if not values:
+        return float("nan")
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def run_level(options, session_count):
+    """
+    Mesure un niveau de concurrence : un serveur neuf, auquel les sessions se connectent ensemble.
+
+    Args:
+        options (Namespace): Options du test
+        session_count (int): Nombre de sessions simultanées
+
+    Returns:
+        dict: Mesures du niveau
+    """
+    unavailable = process_usage(None)
+    level = {"sessions": [], "failures": [], "elapsed": float("nan"), "usage_before": unavailable,
+             "usage_after": unavailable}
+    idle_usage = unavailable
+    try:
+        server, port = start_server(options.app, options.timeout)
+    except RuntimeError as e:
+        level["failures"].append(str(e))
+    else:
+        try:
+            idle_usage = process_usage(server.pid)
+            level = asyncio.run(run_sessions(f"ws://127.0.0.1:{port}/_stcore/stream", options, session_count,
+                                             server.pid))
+        finally:
+            stop_server(server)
+
+    sessions, elapsed, usage_after = level["sessions"], level["elapsed"], level["usage_after"]
+    latencies = sorted(latency for session in sessions for latency in session["latencies"])
+    failures = level["failures"] + [failure for session in sessions for failure in session["failures"]]
+    cpu_seconds = usage_after["cpu_seconds"] - level["usage_before"]["cpu_seconds"]
+    return {
+        "sessions": session_count,
+        "reruns": len(latencies),
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p90": percentile(latencies, 0.90) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "max": (latencies[-1] if latencies else float("nan")) * 1000,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else float("nan"),
+        "cpu_seconds": cpu_seconds,
+        "cpu_percent": cpu_seconds / elapsed * 100 if elapsed > 0 else float("nan"),
+        # Mémoire maximale du serveur, et part de chaque session au-delà du serveur au repos
+        "peak_rss_mb": usage_after["peak_rss_mb"],
+        "session_rss_mb": (usage_after["peak_rss_mb"] - idle_usage["rss_mb"]) / session_count,
+        "failures": failures,
+    }
+
+
+def print_report(results):
+    """
+    Affiche le tableau des mesures, un niveau de concurrence par ligne.
+
+    Args:
+        results (list): Mesures des niveaux (voir run_level)
+    """
+    header = (f"{'Sessions':>8} {'Exéc.':>6} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} "
+              f"{'Exéc./s':>8} {'CPU (s)':>8} {'CPU (%)':>8} {'RSS/session (Mo)':>16} {'RSS serveur (Mo)':>16} "
+              f"{'Erreurs':>8}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['sessions']:>8} {result['reruns']:>6} {result['p50']:>9.0f} {result['p90']:>9.0f} "
+              f"{result['p99']:>9.0f} {result['max']:>9.0f} {result['throughput']:>8.2f} "
+              f"{result['cpu_seconds']:>8.1f} {result['cpu_percent']:>8.0f} {result['session_rss_mb']:>16.0f} "
+              f"{result['peak_rss_mb']:>16.0f} {len(result['failures']):>8}")
+    for result in results:
+        for failure in result["failures"][:5]:
+            print(f"[{result['sessions']} sessions] {failure}", file=sys.stderr)
+
+
+def main(argv=None):
+    """
+    Args:
+        argv (list): Arguments de la ligne de commande (None : sys.argv)
+
+    Returns:
+        int: Code de sortie (1 si une exécution a échoué)
+    """
+    options = parse_args(argv)
+    # Le serveur de chaque niveau hérite de l'environnement
+    configure_provider(options.provider, options.latency)
+
+    results = []
+    for session_count in [int(level) for level in options.sessions.split(",") if level.strip()]:
+        result = run_level(options, session_count)
+        results.append(result)
+        print(f"{session_count} sessions : {result['reruns']} exécutions, p50 {result['p50']:.0f} ms, "
+              f"RSS serveur {result['peak_rss_mb']:.0f} Mo", file=sys.stderr)
+    print_report(results)
+    return 1 if any(result["failures"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# memory.py
+"""
+Budget mémoire du processus pour l'application Finance Viewer.
+
+Les séries du stockage, les étapes du pipeline en cache et les fichiers d'export générés sont
+comptabilisés comme des réserves (pools) ; au-delà du budget FINANCE_VIEWER_MEMORY_BUDGET_MB,
+les entrées les moins récemment utilisées, toutes réserves confondues, sont évincées. Les séries
+évincées sont déversées sur disque (FINANCE_VIEWER_SPILL_DIR) et rechargées sans téléchargement.
+Un processus peut ainsi tourner sous une limite mémoire fixe.
+
+Une réserve expose :
+- memory_usage() : taille en octets
+- oldest_access() : instant du dernier accès à son entrée la plus ancienne (None si rien à évincer)
+- evict_oldest() : évince cette entrée et renvoie le nombre d'octets libérés (None si impossible)
+"""
+
+import os
+import threading
+
+from backends import SQLiteBackend
+
+# Budget mémoire du processus (0 : sans limite)
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("FINANCE_VIEWER_MEMORY_BUDGET_MB", "0")) * 1024 * 1024) or None
+
+# Répertoire de déversement des séries évincées (vide : les séries évincées sont simplement oubliées)
+SPILL_DIR = os.environ.get("FINANCE_VIEWER_SPILL_DIR", "")
+
+# Affichage de l'occupation mémoire dans la barre latérale
+SHOW_MEMORY_USAGE = os.environ.get("FINANCE_VIEWER_DEBUG", "") not in ("", "0")
+
+
+class MemoryGovernor:
+    """
+    Répartit un budget mémoire entre des réserves, par éviction LRU globale.
+    Sûr entre threads : une seule éviction à la fois, les autres threads ne l'attendent pas.
+    """
+
+    def __init__(self, budget_bytes=None):
+        """
+        Args:
+            budget_bytes (int): Budget en octets (None : sans limite, l'occupation est seulement mesurée)
+        """
+        self.budget_bytes = budget_bytes
+        # Entrées évincées et octets libérés depuis le démarrage
+        self.stats = {"evictions": 0, "evicted_bytes": 0}
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, pool):
+        """
+        Ajoute une réserve au budget.
+
+        Args:
+            name (str): Libellé de la réserve
+            pool: Réserve (memory_usage, oldest_access, evict_oldest)
+        """
+        self._pools[name] = pool
+
+    def usage(self):
+        """
+        Mesure l'occupation de chaque réserve.
+
+        Returns:
+            dict: {libellé de la réserve: taille en octets}
+        """
+        return {name: pool.memory_usage() for name, pool in self._pools.items()}
+
+    def enforce(self):
+        """
+        Évince les entrées les moins récemment utilisées jusqu'à revenir sous le budget.
+        Sans effet si une éviction est déjà en cours dans un autre thread.
+
+        Returns:
+            int: Nombre d'octets libérés
+        """
+        if self.budget_bytes is None or not self._lock.acquire(blocking=False):
+            return 0
+        freed_total = 0
+        try:
+            total_bytes = sum(self.usage().values())
+            while total_bytes > self.budget_bytes:
+                candidates = [
+                    (accessed_at, name) for name, pool in self._pools.items()
+                    for accessed_at in [pool.oldest_access()] if accessed_at is not None
+                ]
+                if not candidates:
+                    break
+                _, name = min(candidates)
+                freed = self._pools[name].evict_oldest()
+                if freed is None:
+                    break
+                total_bytes -= freed
+                freed_total += freed
+                self.stats["evictions"] += 1
+                self.stats["evicted_bytes"] += freed
+        finally:
+            self._lock.release()
+        return freed_total
+
+
+class StageCachePool:
+    """
+    Réserve formée des caches Streamlit (st.cache_data) d'un ensemble de fonctions.
+    Streamlit ne donne pas l'instant d'accès de ses entrées (il évince lui-même les plus anciennes
+    au-delà de max_entries) : ces caches ne sont vidés qu'en dernier recours.
+    """
+
+    def __init__(self, functions):
+        """
+        Args:
+            functions (list): Fonctions décorées par st.cache_data
+        """
+        self.functions = list(functions)
+        self._cache_names = {f"{function.__module__}.{function.__qualname__}" for function in self.functions}
+
+    def __len__(self):
+        return len(self.functions)
+
+    def memory_usage(self):
+        """
+        Returns:
+            int: Taille des valeurs en cache en octets (0 si Streamlit ne publie pas ses statistiques)
+        """
+        try:
+            from streamlit.runtime.caching.cache_data_api import get_data_cache_stats_provider
+            stats = get_data_cache_stats_provider().get_stats()
+        except Exception:
+            return 0
+        return sum(
+            stat.byte_length for family in stats.values() for stat in family if stat.cache_name in self._cache_names
+        )
+
+    def oldest_access(self):
+        """
+        Returns:
+            float: +inf (évincé après toutes les autres réserves), None si les caches sont vides
+        """
+        return float("inf") if self.memory_usage() > 0 else None
+
+    def evict_oldest(self):
+        """
+        Vide les caches de toutes les fonctions.
+
+        Returns:
+            int: Nombre d'octets libérés
+        """
+        freed = self.memory_usage()
+        for function in self.functions:
+            function.clear()
+        return freed
+
+
+def spill_backend_from_dir(directory):
+    """
+    Crée le stockage de déversement du processus.
+
+    Args:
+        directory (str): Répertoire de déversement (vide : aucun déversement)
+
+    Returns:
+        SQLiteBackend: Fichier propre au processus, ou None
+    """
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return SQLiteBackend(os.path.join(directory, f"spill-{os.getpid()}.db"))
+
+
+# Budget partagé par toutes les sessions du processus (les réserves s'y inscrivent à leur création)
+memory_governor = MemoryGovernor(MEMORY_BUDGET_BYTES)
+
+# Stockage des séries évincées
+spill_backend = spill_backend_from_dir(SPILL_DIR)
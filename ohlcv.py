@@ -0,0 +1,183 @@
+# ohlcv.py
+"""
+Conteneur compact des séries OHLCV conservées en mémoire pour l'application Finance Viewer.
+
+Une série est stockée dans trois tableaux NumPy contigus (dates en nanosecondes depuis l'époque,
+prix en float32, volumes en uint64) au lieu d'un DataFrame : le catalogue complet tient dans un
+seul processus. Un DataFrame est reconstruit à la demande, avec des prix en float64 : affichage,
+indicateurs et exports calculent dans le même type qu'avec les séries du fournisseur.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colonnes de prix, dans l'ordre des colonnes renvoyées par le fournisseur
+PRICE_COLUMNS = ['Close', 'High', 'Low', 'Open']
+
+
+def _date_to_ns(value):
+    # Date (ou Timestamp) -> nanosecondes depuis l'époque
+    return pd.Timestamp(value).value
+
+
+class OHLCVSeries:
+    """
+    Série de barres triées par date, sans doublon.
+    Les tableaux sont en lecture seule : les vues pandas ne peuvent pas modifier la série.
+    """
+    __slots__ = ("timestamps", "prices", "volumes")
+
+    def __init__(self, timestamps, prices, volumes):
+        """
+        Args:
+            timestamps (ndarray): Dates en nanosecondes depuis l'époque (int64, croissantes)
+            prices (ndarray): Prix (float32, une ligne par barre, colonnes PRICE_COLUMNS)
+            volumes (ndarray): Volumes (uint64)
+        """
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        self.prices = np.ascontiguousarray(prices, dtype=np.float32).reshape(-1, len(PRICE_COLUMNS))
+        self.volumes = np.ascontiguousarray(volumes, dtype=np.uint64)
+        for array in (self.timestamps, self.prices, self.volumes):
+            array.flags.writeable = False
+
+    @classmethod
+    def empty(cls):
+        """
+        Returns:
+            OHLCVSeries: Série sans barre
+        """
+        return cls(np.empty(0), np.empty((0, len(PRICE_COLUMNS))), np.empty(0))
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Construit une série compacte à partir des barres du fournisseur.
+
+        Args:
+            data (DataFrame): Colonnes Open, High, Low, Close, Volume indexées par date
+
+        Returns:
+            OHLCVSeries: Série triée, la dernière barre l'emportant en cas de date en double
+        """
+        if data.empty:
+            return cls.empty()
+        index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+        # Volume absent ou manquant (devises) : 0
+        volumes = data['Volume'].fillna(0).to_numpy() if 'Volume' in data.columns else np.zeros(len(data))
+        return cls._sorted(
+            index.as_unit("ns").asi8, data[PRICE_COLUMNS].to_numpy(dtype=np.float32),
+            np.clip(volumes, 0, None).astype(np.uint64)
+        )
+
+    @classmethod
+    def _sorted(cls, timestamps, prices, volumes):
+        # Tri stable puis conservation de la dernière occurrence de chaque date
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        keep = np.r_[timestamps[1:] != timestamps[:-1], True]
+        return cls(timestamps[keep], prices[order][keep], volumes[order][keep])
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def is_empty(self):
+        """
+        Returns:
+            bool: True si la série ne contient aucune barre
+        """
+        return len(self.timestamps) == 0
+
+    @property
+    def nbytes(self):
+        """
+        Returns:
+            int: Taille des données en octets
+        """
+        return self.timestamps.nbytes + self.prices.nbytes + self.volumes.nbytes
+
+    def to_bytes(self):
+        """
+        Sérialise la série (nombre de barres puis tableaux bruts), sans pickle.
+
+        Returns:
+            bytes: Série sérialisée
+        """
+        return b"".join([
+            np.int64(len(self)).tobytes(), self.timestamps.tobytes(), self.prices.tobytes(), self.volumes.tobytes()
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reconstruit une série sérialisée par to_bytes (sans copie des tableaux).
+
+        Args:
+            data (bytes): Série sérialisée
+
+        Returns:
+            OHLCVSeries: Série
+        """
+        length = int(np.frombuffer(data, dtype=np.int64, count=1)[0])
+        offset = 8
+        timestamps = np.frombuffer(data, dtype=np.int64, count=length, offset=offset)
+        offset += timestamps.nbytes
+        prices = np.frombuffer(data, dtype=np.float32, count=length * len(PRICE_COLUMNS), offset=offset)
+        offset += prices.nbytes
+        volumes = np.frombuffer(data, dtype=np.uint64, count=length, offset=offset)
+        return cls(timestamps, prices, volumes)
+
+    def last_date(self):
+        """
+        Returns:
+            date: Date de la dernière barre (None si la série est vide)
+        """
+        if self.is_empty:
+            return None
+        return pd.Timestamp(self.timestamps[-1]).date()
+
+    def merge(self, other):
+        """
+        Fusionne de nouvelles barres ; en cas de doublon, la barre de other l'emporte.
+
+        Args:
+            other (OHLCVSeries): Barres à ajouter
+
+        Returns:
+            OHLCVSeries: Nouvelle série fusionnée
+        """
+        if other.is_empty:
+            return self
+        if self.is_empty:
+            return other
+        return self._sorted(
+            np.concatenate([self.timestamps, other.timestamps]),
+            np.concatenate([self.prices, other.prices]),
+            np.concatenate([self.volumes, other.volumes])
+        )
+
+    def slice(self, start_date, end_date):
+        """
+        Extrait les barres d'une plage de dates (vues sur les tableaux, sans copie).
+
+        Args:
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            OHLCVSeries: Barres de la plage
+        """
+        first, last = np.searchsorted(self.timestamps, [_date_to_ns(start_date), _date_to_ns(end_date)])
+        return OHLCVSeries(self.timestamps[first:last], self.prices[first:last], self.volumes[first:last])
+
+    def to_frame(self):
+        """
+        Construit un DataFrame à partir des tableaux de la série (prix convertis en float64).
+
+        Returns:
+            DataFrame: Colonnes Close, High, Low, Open (float64) et Volume (uint64), index Date
+        """
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), name="Date")
+        data = pd.DataFrame(self.prices.astype(np.float64), index=index, columns=PRICE_COLUMNS, copy=False)
+        data['Volume'] = self.volumes
+        return data
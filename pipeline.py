@@ -0,0 +1,625 @@
+# pipeline.py
+"""
+Pipeline d'affichage d'un actif pour l'application Finance Viewer.
+
+Étapes : récupération -> ajustement et conversion de devise -> dérivation -> agrégation -> indicateurs
+-> formatage -> export.
+Chaque étape est mise en cache sur ses propres entrées (sauf les indicateurs, peu coûteux, qui lisent
+le résumé courant de la série) : changer uniquement le profil d'affichage ne relance ni le
+téléchargement ni le calcul des colonnes dérivées.
+Les calculs de chaque étape sont des fonctions pures, réutilisées telles quelles par le mode direct.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from actions import actions_cache, adjust_frame, has_corporate_actions
+from calendars import calendar_for_ticker
+from portfolio import align_prices
+from quality import flag_labels, quality_flags
+from crossrates import cross_rates
+from currencies import asof_rates, convert_ohlc, currency_affixes, fx_route, minor_unit_factor, native_currency
+from memory import StageCachePool, memory_governor
+from store import series_store
+from summaries import RETURN_HORIZONS
+from utils import create_export, format_volumes
+
+# Durée de validité des étapes mises en cache (en secondes) et nombre maximal d'entrées par étape
+CACHE_TTL_SECONDS = 15 * 60
+CACHE_MAX_ENTRIES = 128
+
+# Historique supplémentaire chargé pour les taux de change, afin de disposer d'un taux
+# dès la première date de la période (week-ends, jours fériés)
+FX_LOOKBACK_DAYS = 10
+
+# Nombre maximal de téléchargements simultanés lors d'un chargement multi-actifs
+MAX_FETCH_WORKERS = 8
+
+# Historique chargé pour une liste de suivi (performance sur un an comprise) et fenêtre des tendances (en jours)
+WATCHLIST_HISTORY_DAYS = 380
+SPARKLINE_DAYS = 90
+
+# Première date demandée pour l'historique maximal (antérieure aux plus anciennes séries du fournisseur) ;
+# seule la plage à partir de la première barre de chaque actif est découpée en tranches (voir history_chunks)
+MAX_HISTORY_START = date(1920, 1, 1)
+
+# Granularités proposées : libellé -> fréquence pandas (None : barres quotidiennes telles que téléchargées)
+GRANULARITIES = {
+    "Quotidienne": None,
+    "Hebdomadaire": "W",
+    "Mensuelle": "M",
+    "Trimestrielle": "Q",
+    "Annuelle": "Y",
+}
+
+# Profils d'affichage par classe d'actif
+# currency_symbol : afficher le symbole de la devise de cotation même sans conversion
+FORMAT_PROFILES = {
+    # Actions, cryptos, ressources : prix dans leur devise de cotation
+    "price": {"prefix": "$", "suffix": "", "decimals": 2, "close_label": "Prix de clôture", "currency_symbol": True},
+    # Devises : 4 décimales, sans symbole
+    "fx": {"prefix": "", "suffix": "", "decimals": 4, "close_label": "Prix de clôture", "currency_symbol": False},
+    # Indices : en points
+    "points": {"prefix": "", "suffix": " pts", "decimals": 2, "close_label": "Clôture", "currency_symbol": False},
+}
+
+
+def fetch_data(ticker_symbol, start_date, end_date):
+    """
+    Étape 1 : renvoie les données quotidiennes d'un actif depuis le stockage partagé,
+    qui ne télécharge que les dates qu'il ne couvre pas encore. Une paire de devises croisée
+    est calculée à partir des paires en dollar de ses deux devises (voir crossrates.py).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+
+    Returns:
+        DataFrame: Colonnes Open, High, Low, Close, Volume indexées par date
+    """
+    return cross_rates.get_range(ticker_symbol, start_date, end_date)
+
+
+def fetch_requests(ticker_symbol, start_date, end_date, display_currency=None):
+    """
+    Liste les téléchargements nécessaires pour afficher un actif dans une devise :
+    la série de l'actif et, en cas de conversion, les paires de change du trajet.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+
+    Returns:
+        list: Arguments (symbole, début, fin) des appels à fetch_data
+    """
+    requests = [(ticker_symbol, start_date, end_date)]
+    if display_currency is not None:
+        route = fx_route(native_currency(ticker_symbol), display_currency) or []
+        requests += [(fx_ticker, start_date - timedelta(days=FX_LOOKBACK_DAYS), end_date) for fx_ticker, _ in route]
+    return requests
+
+
+def prefetch_data(requests):
+    """
+    Exécute en parallèle des appels à fetch_data pour remplir le stockage, ainsi que le chargement
+    des opérations sur titres des actifs demandés : les étapes suivantes ne font plus que lire les caches.
+    Les séries déjà couvertes sont servies immédiatement : ajouter un actif à une sélection
+    ne coûte qu'un seul téléchargement supplémentaire. Les paires croisées sont remplacées par
+    leurs paires en dollar, téléchargées une seule fois pour toutes les paires qui les partagent.
+
+    Args:
+        requests (list): Arguments (symbole, début, fin) des appels à fetch_data
+    """
+    tasks = [partial(fetch_data, *request) for request in cross_rates.source_requests(requests)]
+    tasks += [
+        partial(actions_cache.get, ticker_symbol)
+        for ticker_symbol in dict.fromkeys(ticker_symbol for ticker_symbol, _, _ in requests)
+        if has_corporate_actions(ticker_symbol)
+    ]
+    if len(tasks) < 2:
+        return
+
+    def run_task(task):
+        try:
+            task()
+        except Exception:
+            # L'erreur sera signalée lors de l'utilisation de la série
+            pass
+
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(tasks))) as executor:
+        list(executor.map(run_task, tasks))
+
+
+def fetch_history(requests, progress_callback=None):
+    """
+    Remplit le stockage pour de longues plages, par tranches téléchargées en parallèle.
+    Chaque tranche est conservée dès sa réception : après un échec, seul le reste est redemandé.
+
+    Args:
+        requests (list): Arguments (symbole, début, fin) des appels à fetch_data (voir fetch_requests)
+        progress_callback (callable): Fonction appelée avec (tranches terminées, nombre de tranches)
+
+    Returns:
+        list: Tranches en échec (symbole, début, fin), vide si tout a été téléchargé
+    """
+    chunks_by_ticker = {}
+    for ticker_symbol, start_date, end_date in cross_rates.source_requests(requests):
+        chunks = series_store.history_chunks(ticker_symbol, start_date, end_date)
+        if chunks:
+            chunks_by_ticker.setdefault(ticker_symbol, []).extend(chunks)
+
+    total_chunks = sum(len(chunks) for chunks in chunks_by_ticker.values())
+    completed_chunks = 0
+    failed_chunks = []
+    for ticker_symbol, chunks in chunks_by_ticker.items():
+        def report(completed, _total, offset=completed_chunks):
+            if progress_callback is not None:
+                progress_callback(offset + completed, total_chunks)
+
+        failed = series_store.fetch_chunks(ticker_symbol, chunks, progress_callback=report)
+        failed_chunks += [(ticker_symbol, chunk_start, chunk_end) for chunk_start, chunk_end in failed]
+        completed_chunks += len(chunks)
+    return failed_chunks
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def convert_data(ticker_symbol, start_date, end_date, display_currency=None, adjusted=True):
+    """
+    Étape 2 : ajuste les prix des opérations sur titres, puis les convertit dans la devise d'affichage.
+    Les séries de change sont téléchargées (et mises en cache) par fetch_data, puis alignées
+    sur les dates de l'actif avec le dernier taux connu.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+
+    Returns:
+        DataFrame: Données de fetch_data avec Open, High, Low, Close ajustés et convertis
+    """
+    data = adjust_frame(fetch_data(ticker_symbol, start_date, end_date), actions_cache.get(ticker_symbol), adjusted)
+    return convert_frame(data, ticker_symbol, start_date, end_date, display_currency)
+
+
+def convert_frame(data, ticker_symbol, start_date, end_date, display_currency=None):
+    """
+    Convertit les prix d'une série dans la devise d'affichage (calcul de l'étape 2).
+
+    Args:
+        data (DataFrame): Série de l'actif
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+
+    Returns:
+        DataFrame: Série avec Open, High, Low, Close convertis
+    """
+    source_currency = native_currency(ticker_symbol)
+    unit_factor = minor_unit_factor(ticker_symbol)
+    if display_currency is None or data.empty or (display_currency == source_currency and unit_factor == 1.0):
+        return data
+
+    route = fx_route(source_currency, display_currency)
+    if route is None:
+        raise ValueError(f"Aucune paire de devises ne permet de convertir {source_currency} en {display_currency}.")
+
+    # Cours en centièmes (pence, cents, agorot) ramenés à l'unité de la devise avant conversion
+    rates = np.full(len(data), unit_factor)
+    for fx_ticker, invert in route:
+        fx_data = fetch_data(fx_ticker, start_date - timedelta(days=FX_LOOKBACK_DAYS), end_date)
+        if fx_data.empty:
+            raise ValueError(f"Aucun taux de change disponible pour {fx_ticker}.")
+        leg_rates = asof_rates(fx_data.index, fx_data['Close'].to_numpy(), data.index)
+        rates = rates / leg_rates if invert else rates * leg_rates
+    return convert_ohlc(data, rates)
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def derive_data(ticker_symbol, start_date, end_date, display_currency=None, adjusted=True):
+    """
+    Étape 3 : ajoute les colonnes dérivées (variation quotidienne).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+
+    Returns:
+        DataFrame: Données converties avec les colonnes Daily_Change (en %) et Quality_Flags
+    """
+    return add_derived_columns(
+        convert_data(ticker_symbol, start_date, end_date, display_currency, adjusted), ticker_symbol
+    )
+
+
+def add_derived_columns(data, ticker_symbol):
+    """
+    Ajoute la variation quotidienne et les anomalies de qualité à une série (calcul de l'étape 3).
+    Les anomalies sont ainsi calculées une seule fois et mises en cache avec les données.
+
+    Args:
+        data (DataFrame): Série de l'actif
+        ticker_symbol (str): Symbole Yahoo Finance (calendrier de cotation des trous de cotation)
+
+    Returns:
+        DataFrame: Copie de la série avec les colonnes Daily_Change (en %) et Quality_Flags
+    """
+    data = data.copy()
+    # Calendrier de la place : une fermeture apprise pour ce seul actif (suspension) reste un trou de cotation
+    data['Quality_Flags'] = quality_flags(data, calendar_for_ticker(ticker_symbol).exchange_calendar)
+    # Pas de report des valeurs manquantes : une clôture absente donne une variation absente
+    data['Daily_Change'] = data['Close'].pct_change(fill_method=None) * 100
+    return data
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def resample_data(ticker_symbol, start_date, end_date, display_currency=None, granularity="Quotidienne",
+                  adjusted=True):
+    """
+    Étape 4 : agrège les barres quotidiennes à la granularité choisie, sans nouveau téléchargement.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        granularity (str): Clé de GRANULARITIES
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+
+    Returns:
+        DataFrame: Barres agrégées avec les colonnes dérivées
+    """
+    data = derive_data(ticker_symbol, start_date, end_date, display_currency, adjusted)
+    return resample_bars(data, GRANULARITIES[granularity])
+
+
+def resample_bars(data, frequency):
+    """
+    Agrège une série par période (calcul de l'étape 4) : premier cours d'ouverture, plus haut,
+    plus bas, dernière clôture et volume cumulé. Une période est signalée si l'une de ses barres
+    l'était, et la variation est recalculée d'une période à l'autre.
+
+    Args:
+        data (DataFrame): Série triée par date, avec ou sans colonnes dérivées
+        frequency (str): Fréquence pandas (None : série inchangée)
+
+    Returns:
+        DataFrame: Une barre par période, datée du début de la période
+    """
+    if frequency is None or data.empty:
+        return data
+    periods = data.index.to_period(frequency)
+    resampled = data.groupby(periods).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    )
+    resampled.index = resampled.index.to_timestamp().rename(data.index.name)
+
+    if 'Quality_Flags' in data.columns:
+        # Séries triées : chaque période est un bloc contigu de lignes
+        codes = pd.factorize(periods)[0]
+        period_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        resampled['Quality_Flags'] = np.bitwise_or.reduceat(data['Quality_Flags'].to_numpy(), period_starts)
+    if 'Daily_Change' in data.columns:
+        resampled['Daily_Change'] = resampled['Close'].pct_change(fill_method=None) * 100
+    return resampled[[column for column in data.columns if column in resampled.columns]]
+
+
+def compute_kpis(ticker_symbol, start_date, end_date, display_currency=None, granularity="Quotidienne",
+                 adjusted=True):
+    """
+    Étape 5 : calcule les indicateurs clés de la période ; dans la devise de cotation, la dernière
+    clôture et le dernier volume sont lus dans le résumé précalculé (voir kpis_from_data).
+    Non mise en cache : le résumé évolue à chaque actualisation de la fin de série, et le calcul
+    ne lit que deux clôtures de l'agrégation (elle-même en cache).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        granularity (str): Clé de GRANULARITIES
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+
+    Returns:
+        dict: latest_close, variation (en %) et latest_volume
+    """
+    return kpis_from_data(
+        resample_data(ticker_symbol, start_date, end_date, display_currency, granularity, adjusted),
+        ticker_summary(ticker_symbol) if display_currency is None else None
+    )
+
+
+def kpis_from_data(data, summary=None):
+    """
+    Calcule les indicateurs clés d'une série (calcul de l'étape 5).
+    Si la série se termine à la dernière barre du résumé précalculé, la dernière clôture et le dernier
+    volume sont lus dans le résumé : ils sont identiques en cours ajustés ou bruts, les ajustements
+    étant relatifs à la fin de la période. Seule la clôture de début de période est lue dans la série.
+
+    Args:
+        data (DataFrame): Série de l'actif
+        summary (dict): Résumé précalculé de l'actif dans la devise de la série (None : aucun)
+
+    Returns:
+        dict: latest_close, variation (en %) et latest_volume
+    """
+    # Première et dernière clôtures valides : une valeur manquante ne fausse pas la variation
+    closes = data['Close'].dropna()
+    if closes.empty:
+        raise ValueError("Aucune clôture valide dans la période sélectionnée.")
+    first_close_value = float(closes.iloc[0])
+    if summary is not None and closes.index[-1].date() == summary["last_date"]:
+        latest_close_value = summary["last_close"]
+        latest_volume_value = summary["last_volume"]
+    else:
+        volumes = data['Volume'].dropna()
+        latest_close_value = float(closes.iloc[-1])
+        latest_volume_value = float(volumes.iloc[-1]) if not volumes.empty else float("nan")
+    return {
+        "latest_close": latest_close_value,
+        "variation": ((latest_close_value - first_close_value) / first_close_value) * 100,
+        "latest_volume": latest_volume_value,
+    }
+
+
+def ticker_summary(ticker_symbol):
+    """
+    Renvoie le résumé précalculé d'un actif (mis à jour par le stockage à chaque ajout de barres,
+    ou, pour une paire croisée, à chaque ajout de barres à l'une de ses paires en dollar).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        dict: Résumé dans la devise de cotation (voir summaries.compute_summary), None si la série
+            n'a jamais été chargée
+    """
+    return cross_rates.summary(ticker_symbol)
+
+
+def watchlist_table(ticker_symbols):
+    """
+    Actualise les actifs d'une liste de suivi en une seule vague de téléchargements parallèles
+    (seules les dates non couvertes et les fins de séries périmées sont demandées), puis construit
+    le tableau de synthèse à partir des résumés précalculés.
+
+    Args:
+        ticker_symbols (list): Symboles Yahoo Finance
+
+    Returns:
+        DataFrame: Une ligne par symbole (devise, clôture, performances, tendance des derniers mois) ;
+            les symboles sans données ont des valeurs manquantes
+    """
+    end_date = date.today() + timedelta(days=1)
+    start_date = end_date - timedelta(days=WATCHLIST_HISTORY_DAYS)
+    prefetch_data([(ticker_symbol, start_date, end_date) for ticker_symbol in ticker_symbols])
+
+    rows = {}
+    for ticker_symbol in dict.fromkeys(ticker_symbols):
+        try:
+            # Plage déjà couverte par la vague de téléchargements : lecture du stockage seule
+            closes = fetch_data(ticker_symbol, end_date - timedelta(days=SPARKLINE_DAYS), end_date)['Close']
+        except Exception:
+            closes = pd.Series(dtype=float)
+        summary = ticker_summary(ticker_symbol)
+        rows[ticker_symbol] = {
+            "Devise": native_currency(ticker_symbol),
+            "Date": summary["last_date"] if summary else None,
+            "Clôture": summary["last_close"] if summary else np.nan,
+            **{
+                f"Perf. {label} (%)": summary["returns"][label] if summary else np.nan
+                for label in RETURN_HORIZONS
+            },
+            "Tendance": closes.astype(float).round(6).tolist(),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def display_profile(profile_name, ticker_symbol, display_currency=None):
+    """
+    Construit le profil d'affichage effectif d'un actif : symbole de la devise d'affichage
+    en cas de conversion, sinon symbole de la devise de cotation pour les profils qui l'affichent.
+
+    Args:
+        profile_name (str): Clé de FORMAT_PROFILES
+        ticker_symbol (str): Symbole Yahoo Finance
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+
+    Returns:
+        dict: Profil d'affichage (prefix, suffix, decimals, close_label)
+    """
+    profile = dict(FORMAT_PROFILES[profile_name])
+    if display_currency is not None:
+        profile["prefix"], profile["suffix"] = currency_affixes(display_currency)
+    elif profile["currency_symbol"]:
+        profile["prefix"], profile["suffix"] = currency_affixes(native_currency(ticker_symbol))
+    return profile
+
+
+def format_price(value, profile):
+    """
+    Formate un prix selon un profil d'affichage.
+
+    Args:
+        value (float): Prix à formater
+        profile (dict): Profil d'affichage (voir display_profile)
+
+    Returns:
+        str: Prix formaté
+    """
+    return f"{profile['prefix']}{value:.{profile['decimals']}f}{profile['suffix']}"
+
+
+def format_prices(values, profile):
+    """
+    Formate une série de prix selon un profil d'affichage (version vectorisée de format_price).
+
+    Args:
+        values (array-like): Prix à formater
+        profile (dict): Profil d'affichage (voir display_profile)
+
+    Returns:
+        ndarray: Prix formatés
+    """
+    values = np.asarray(values, dtype=float)
+    formatted = np.char.mod(f"%.{profile['decimals']}f", values)
+    return np.where(np.isnan(values), "N/A", np.char.add(np.char.add(profile['prefix'], formatted), profile['suffix']))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def format_display_data(ticker_symbol, start_date, end_date, profile_name, display_currency=None,
+                        granularity="Quotidienne", adjusted=True):
+    """
+    Étape 6 : construit le tableau formaté affiché à l'écran.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        profile_name (str): Clé de FORMAT_PROFILES
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        granularity (str): Clé de GRANULARITIES
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+
+    Returns:
+        DataFrame: Tableau de chaînes formatées indexé par date (sans l'heure)
+    """
+    data = resample_data(ticker_symbol, start_date, end_date, display_currency, granularity, adjusted)
+    return build_display_table(data, display_profile(profile_name, ticker_symbol, display_currency))
+
+
+def build_display_table(data, profile):
+    """
+    Construit le tableau formaté d'une série (calcul de l'étape 6).
+
+    Args:
+        data (DataFrame): Série avec la colonne Daily_Change
+        profile (dict): Profil d'affichage (voir display_profile)
+
+    Returns:
+        DataFrame: Tableau de chaînes formatées indexé par date (sans l'heure)
+    """
+    # Créer un DataFrame pour l'affichage avec l'index recréé sans l'heure
+    display_data = pd.DataFrame(index=data.index.date)
+
+    # Formater les prix
+    for column in ['Open', 'High', 'Low', 'Close']:
+        display_data[column] = format_prices(data[column].to_numpy(), profile)
+
+    # Formater la variation avec gestion des NaN
+    daily_change = data['Daily_Change'].to_numpy(dtype=float)
+    display_data['Variation (%)'] = np.where(
+        np.isnan(daily_change), "N/A", np.char.add(np.char.mod("%.2f", daily_change), "%")
+    )
+
+    # Formater le volume
+    display_data['Volume'] = format_volumes(data['Volume'].to_numpy())
+
+    # Signaler les anomalies de qualité, s'il y en a
+    if data['Quality_Flags'].any():
+        display_data['Qualité'] = flag_labels(data['Quality_Flags'].to_numpy())
+    return display_data
+
+
+def generate_export(ticker_symbol, start_date, end_date, sheet_name, export_format,
+                    display_currency=None, granularity="Quotidienne", adjusted=True, progress_callback=None):
+    """
+    Étape 7 : génère le fichier d'export (mis en cache par empreinte dans utils.create_export).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        sheet_name (str): Nom de la feuille Excel
+        export_format (str): Clé de utils.EXPORT_FORMATS
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        granularity (str): Clé de GRANULARITIES
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+        progress_callback (callable): Fonction appelée avec l'avancement (XLSX uniquement)
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    data = resample_data(ticker_symbol, start_date, end_date, display_currency, granularity, adjusted)
+    return create_export(data, sheet_name, export_format, progress_callback)
+
+
+def fetch_live_data(ticker_symbol, start_date, display_currency=None, granularity="Quotidienne", adjusted=True):
+    """
+    Mode direct : récupère uniquement les barres postérieures à la dernière barre en stockage,
+    puis renvoie la série à jour (jusqu'à aujourd'hui inclus) avec ses colonnes dérivées.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début
+        display_currency (str): Devise d'affichage (None pour la devise de cotation)
+        granularity (str): Clé de GRANULARITIES
+        adjusted (bool): True pour les cours ajustés des dividendes, False pour les cours bruts
+
+    Returns:
+        DataFrame: Série convertie et agrégée avec la colonne Daily_Change (en %)
+    """
+    cross_rates.refresh_tail(ticker_symbol)
+    end_date = date.today() + timedelta(days=1)
+    data = adjust_frame(fetch_data(ticker_symbol, start_date, end_date), actions_cache.get(ticker_symbol), adjusted)
+    data = add_derived_columns(
+        convert_frame(data, ticker_symbol, start_date, end_date, display_currency), ticker_symbol
+    )
+    return resample_bars(data, GRANULARITIES[granularity])
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_close_matrix(ticker_symbols, start_date, end_date, display_currency=None):
+    """
+    Construit la matrice alignée des clôtures de plusieurs actifs (ajustées des dividendes),
+    convertis dans une même devise.
+    Chaque série provient des étapes en cache ; l'alignement des calendriers est fait une seule fois.
+
+    Args:
+        ticker_symbols (tuple): Symboles Yahoo Finance
+        start_date (date): Date de début
+        end_date (date): Date de fin
+        display_currency (str): Devise commune (None pour les devises de cotation)
+
+    Returns:
+        tuple: (DataFrame des clôtures alignées dates x symboles, liste des symboles sans données)
+    """
+    # Téléchargements parallèles des séries absentes du cache (actifs et paires de change)
+    prefetch_data([
+        request for ticker_symbol in ticker_symbols
+        for request in fetch_requests(ticker_symbol, start_date, end_date, display_currency)
+    ])
+
+    closes = {}
+    missing = []
+    for ticker_symbol in ticker_symbols:
+        try:
+            data = convert_data(ticker_symbol, start_date, end_date, display_currency)
+        except ValueError:
+            data = None
+        if data is None or data.empty:
+            missing.append(ticker_symbol)
+        else:
+            closes[ticker_symbol] = data['Close']
+    if not closes:
+        return pd.DataFrame(), missing
+    return align_prices(closes), missing
+
+
+# Tables dérivées des étapes en cache, comptées dans le budget mémoire du processus
+memory_governor.register(
+    "Étapes", StageCachePool([convert_data, derive_data, resample_data, format_display_data, load_close_matrix])
+)
@@ -0,0 +1,175 @@
+# portfolio.py
+"""
+Calcul vectorisé de portefeuilles (valeur liquidative, rendements, drawdown, contributions)
+et comparaison d'actifs rebasés pour l'application Finance Viewer.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Fréquences de rééquilibrage proposées : libellé -> fréquence pandas (None : achat-conservation)
+REBALANCING_FREQUENCIES = {
+    "Aucun (achat-conservation)": None,
+    "Hebdomadaire": "W",
+    "Mensuel": "M",
+    "Trimestriel": "Q",
+    "Annuel": "Y",
+}
+
+# Nombre de séances par an pour annualiser la volatilité, faute d'historique suffisant pour le mesurer
+TRADING_DAYS_PER_YEAR = 252
+
+# Durée minimale (en jours) pour déduire des dates le nombre de périodes par an
+MIN_ANNUALIZATION_DAYS = 28
+
+
+def align_prices(closes):
+    """
+    Aligne des séries de clôture aux calendriers différents (cryptos 7j/7, actions, devises).
+    Les dates sont réunies, chaque prix est prolongé jusqu'à la cotation suivante, et la période
+    commence à la première date où tous les actifs ont un prix.
+
+    Args:
+        closes (dict): {symbole: Series de clôture indexée par date}
+
+    Returns:
+        DataFrame: Prix alignés (dates x symboles)
+    """
+    prices = pd.concat(closes, axis=1).sort_index().ffill()
+    return prices.dropna()
+
+
+def rebase_prices(prices, base_value=100.0):
+    """
+    Rebase des prix alignés à une valeur commune à la première date.
+
+    Args:
+        prices (DataFrame): Prix alignés (dates x symboles)
+        base_value (float): Valeur de départ commune
+
+    Returns:
+        DataFrame: Prix rebasés
+    """
+    return prices / prices.iloc[0] * base_value
+
+
+def returns_matrix(prices):
+    """
+    Calcule la matrice des rendements simples à partir de prix alignés.
+
+    Args:
+        prices (DataFrame): Prix alignés (dates x symboles)
+
+    Returns:
+        DataFrame: Rendements quotidiens (la première date est retirée)
+    """
+    return prices.pct_change().iloc[1:]
+
+
+def periods_per_year(index):
+    """
+    Mesure le nombre de dates par an d'un calendrier aligné : environ 252 pour des actions seules,
+    365 dès qu'un actif coté 7j/7 (crypto) fait entrer les week-ends dans le calendrier commun.
+
+    Args:
+        index (DatetimeIndex): Dates des rendements
+
+    Returns:
+        float: Nombre de périodes par an (TRADING_DAYS_PER_YEAR si la période est trop courte)
+    """
+    if len(index) < 2:
+        return float(TRADING_DAYS_PER_YEAR)
+    span_days = (index[-1] - index[0]).days
+    if span_days < MIN_ANNUALIZATION_DAYS:
+        return float(TRADING_DAYS_PER_YEAR)
+    # Chaque date couvre l'intervalle qui la sépare de la précédente
+    return (len(index) - 1) / span_days * 365.25
+
+
+def rebalancing_periods(index, frequency):
+    """
+    Attribue à chaque date le numéro de sa période de rééquilibrage.
+
+    Args:
+        index (DatetimeIndex): Dates des rendements
+        frequency (str): Fréquence pandas (None : une seule période)
+
+    Returns:
+        ndarray: Numéro de période pour chaque date
+    """
+    if frequency is None:
+        return np.zeros(len(index), dtype=np.int64)
+    periods = index.tz_localize(None).to_period(frequency)
+    return pd.factorize(periods)[0]
+
+
+def backtest(returns, weights, frequency=None, base_value=100.0):
+    """
+    Simule un portefeuille pondéré, rééquilibré aux poids cibles au début de chaque période.
+    Le calcul est une passe vectorisée sur la matrice des rendements :
+    croissance cumulée de chaque actif dans sa période, valeur du portefeuille par produit
+    matriciel, puis contributions à partir des poids dérivés de la veille.
+
+    Args:
+        returns (DataFrame): Rendements alignés (dates x symboles)
+        weights (array-like): Poids cibles, dans l'ordre des colonnes (normalisés à 1)
+        frequency (str): Fréquence pandas de rééquilibrage (None : achat-conservation)
+        base_value (float): Valeur liquidative initiale
+
+    Returns:
+        dict: nav (Series), returns (Series), drawdown (Series), contributions (Series, en %
+            de la valeur initiale, dont la somme est la performance totale), base_value
+    """
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+    asset_returns = returns.to_numpy(dtype=float)
+    periods = rebalancing_periods(returns.index, frequency)
+
+    # Croissance cumulée de chaque actif depuis le début de sa période
+    growth = pd.DataFrame(1.0 + asset_returns).groupby(periods).cumprod().to_numpy()
+
+    # Croissance de la veille (1 au premier jour de chaque période)
+    period_start = np.r_[True, periods[1:] != periods[:-1]]
+    previous_growth = np.vstack([np.ones((1, growth.shape[1])), growth[:-1]])
+    previous_growth[period_start] = 1.0
+
+    # Valeur relative du portefeuille dans la période, la veille et le jour même
+    previous_value = previous_growth @ weights
+    value = growth @ weights
+    portfolio_returns = value / previous_value - 1.0
+
+    # Contribution de chaque actif : poids dérivé de la veille x rendement du jour
+    daily_contributions = (previous_growth * weights) * asset_returns / previous_value[:, None]
+
+    nav_values = base_value * np.cumprod(1.0 + portfolio_returns)
+    previous_nav = np.r_[base_value, nav_values[:-1]]
+    # Pondérées par la valeur de la veille, les contributions s'additionnent exactement à la performance
+    total_contributions = (daily_contributions * previous_nav[:, None]).sum(axis=0) / base_value * 100
+
+    # Plus haut atteint depuis l'origine, valeur initiale comprise : une baisse dès le premier jour compte
+    running_peak = np.maximum.accumulate(np.r_[base_value, nav_values])[1:]
+
+    return {
+        "nav": pd.Series(nav_values, index=returns.index, name="NAV"),
+        "returns": pd.Series(portfolio_returns, index=returns.index, name="Rendement"),
+        "drawdown": pd.Series(nav_values / running_peak - 1.0, index=returns.index, name="Drawdown"),
+        "contributions": pd.Series(total_contributions, index=returns.columns, name="Contribution (%)"),
+        "base_value": base_value,
+    }
+
+
+def portfolio_statistics(result):
+    """
+    Calcule les indicateurs synthétiques d'un portefeuille simulé.
+
+    Args:
+        result (dict): Résultat de backtest
+
+    Returns:
+        dict: total_return, annualized_volatility, max_drawdown (en %)
+    """
+    return {
+        "total_return": (result["nav"].iloc[-1] / result["base_value"] - 1.0) * 100,
+        "annualized_volatility": result["returns"].std() * np.sqrt(periods_per_year(result["returns"].index)) * 100,
+        "max_drawdown": result["drawdown"].min() * 100,
+    }
@@ -0,0 +1,245 @@
+# profiling.py
+"""
+Outils de profilage de l'application Finance Viewer.
+
+Profil de démarrage (FINANCE_VIEWER_PROFILE_IMPORTS=1) : chaque premier import de module est
+chronométré (durée propre, hors sous-modules, et durée cumulée), pour mesurer le coût d'un
+démarrage à froid et vérifier que les dépendances lourdes ne sont chargées qu'à l'usage.
+
+Profil d'exécution, à la demande : une exécution de la page est profilée avec cProfile lorsque
+l'URL contient ?profile=1 (une seule exécution), ou à chaque exécution avec
+FINANCE_VIEWER_PROFILE_RERUNS=1. Le profil est écrit dans FINANCE_VIEWER_PROFILE_DIR :
+- fichier .prof (pstats), à ouvrir avec snakeviz ou à convertir en flame graph (flameprof)
+- résumé .txt des fonctions les plus coûteuses, précédé de l'actif et de la période affichés
+"""
+
+import builtins
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_IMPORTS = os.environ.get("FINANCE_VIEWER_PROFILE_IMPORTS", "") not in ("", "0")
+PROFILE_RERUNS = os.environ.get("FINANCE_VIEWER_PROFILE_RERUNS", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("FINANCE_VIEWER_PROFILE_DIR", "profiles")
+
+# Paramètre d'URL déclenchant le profil d'une seule exécution
+PROFILE_QUERY_PARAM = "profile"
+
+# Nombre de fonctions du résumé
+PROFILE_TOP_N = 30
+
+
+class ImportTimer:
+    """
+    Chronomètre des imports de modules, par remplacement de builtins.__import__.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.installed_at = None
+        self._original_import = None
+        self._local = threading.local()
+
+    def install(self):
+        """
+        Active le chronométrage des imports (sans effet s'il est déjà actif).
+        """
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        self.installed_at = time.perf_counter()
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        """
+        Rétablit l'import d'origine.
+        """
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, *args, **kwargs):
+        # Seuls les modules pas encore chargés sont chronométrés
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if name not in self.timings:
+                self.timings[name] = {"self": elapsed - children, "cumulative": elapsed}
+
+    def report(self, top_n=20):
+        """
+        Liste les imports les plus coûteux.
+
+        Args:
+            top_n (int): Nombre de modules à renvoyer
+
+        Returns:
+            list: Tuples (module, durée propre en ms, durée cumulée en ms), par durée cumulée décroissante
+        """
+        rows = sorted(self.timings.items(), key=lambda item: item[1]["cumulative"], reverse=True)[:top_n]
+        return [(name, timing["self"] * 1000, timing["cumulative"] * 1000) for name, timing in rows]
+
+    def loaded(self, module_names):
+        """
+        Indique quels modules sont déjà chargés dans le processus.
+
+        Args:
+            module_names (list): Noms de modules
+
+        Returns:
+            dict: {module: True si chargé}
+        """
+        return {name: name in sys.modules for name in module_names}
+
+
+import_timer = ImportTimer()
+if PROFILE_IMPORTS:
+    import_timer.install()
+
+
+class RerunProfile:
+    """
+    Profil cProfile d'une exécution de la page, avec les étiquettes (actif, période) de la vue affichée.
+    """
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.tags = {}
+        self.duration = None
+        self.paths = None
+
+    def tag(self, **tags):
+        """
+        Ajoute des étiquettes au profil (les valeurs d'une même clé sont cumulées).
+
+        Args:
+            **tags: Étiquettes (par exemple ticker, start, end)
+        """
+        for name, value in tags.items():
+            values = self.tags.setdefault(name, [])
+            if str(value) not in values:
+                values.append(str(value))
+
+    def label(self):
+        """
+        Returns:
+            str: Étiquettes au format clé=valeur, pour le résumé
+        """
+        return " ".join(f"{name}={','.join(values)}" for name, values in self.tags.items())
+
+    def top_functions(self, top_n=PROFILE_TOP_N, sort_key="cumulative"):
+        """
+        Liste les fonctions les plus coûteuses.
+
+        Args:
+            top_n (int): Nombre de fonctions
+            sort_key (str): Tri ("cumulative" : durée cumulée, "tottime" : durée propre)
+
+        Returns:
+            list: Tuples (fonction, appels, durée propre en ms, durée cumulée en ms)
+        """
+        stats = pstats.Stats(self.profiler).stats
+        column = 3 if sort_key == "cumulative" else 2
+        rows = sorted(stats.items(), key=lambda item: item[1][column], reverse=True)[:top_n]
+        return [
+            (f"{os.path.basename(filename)}:{line}({function})", calls, own * 1000, cumulative * 1000)
+            for (filename, line, function), (_, calls, own, cumulative, _) in rows
+        ]
+
+    def write(self, directory=PROFILE_DIR, top_n=PROFILE_TOP_N):
+        """
+        Écrit le profil (.prof) et son résumé (.txt).
+
+        Args:
+            directory (str): Répertoire des profils
+            top_n (int): Nombre de fonctions du résumé
+
+        Returns:
+            tuple: Chemins du profil et du résumé
+        """
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9=._-]+", "_", "_".join(
+            values[0] for values in self.tags.values() if values
+        ))[:60]
+        base_name = os.path.join(directory, f"rerun-{datetime.now():%Y%m%d-%H%M%S-%f}" + (f"-{slug}" if slug else ""))
+        self.profiler.dump_stats(base_name + ".prof")
+
+        summary = io.StringIO()
+        summary.write(f"Exécution profilée : {self.duration * 1000:.0f} ms\n")
+        summary.write(f"Vue : {self.label() or '-'}\n\n")
+        pstats.Stats(self.profiler, stream=summary).sort_stats("cumulative").print_stats(top_n)
+        pstats.Stats(self.profiler, stream=summary).sort_stats("tottime").print_stats(top_n)
+        with open(base_name + ".txt", "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary.getvalue())
+        self.paths = (base_name + ".prof", base_name + ".txt")
+        return self.paths
+
+
+_current_profiles = threading.local()
+
+# Un seul profil à la fois dans le processus : depuis Python 3.12, cProfile repose sur sys.monitoring,
+# qui n'accepte qu'un profileur actif
+_profiler_lock = threading.Lock()
+
+
+@contextmanager
+def profile_rerun(directory=PROFILE_DIR):
+    """
+    Profile le bloc (une exécution de la page) puis écrit le profil et son résumé.
+    Si une autre session est déjà profilée, le bloc s'exécute sans profil.
+
+    Args:
+        directory (str): Répertoire des profils
+
+    Yields:
+        RerunProfile: Profil en cours (complété à la sortie du bloc), None si le bloc n'est pas profilé
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        yield None
+        return
+    profile = RerunProfile()
+    try:
+        profile.profiler.enable()
+    except ValueError:
+        # Profileur déjà actif hors de l'application
+        _profiler_lock.release()
+        yield None
+        return
+    _current_profiles.profile = profile
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.profiler.disable()
+        profile.duration = time.perf_counter() - start
+        _current_profiles.profile = None
+        _profiler_lock.release()
+        profile.write(directory)
+
+
+def tag_rerun(**tags):
+    """
+    Étiquette le profil de l'exécution en cours (sans effet si l'exécution n'est pas profilée).
+
+    Args:
+        **tags: Étiquettes (par exemple ticker, start, end)
+    """
+    profile = getattr(_current_profiles, "profile", None)
+    if profile is not None:
+        profile.tag(**tags)
@@ -0,0 +1,237 @@
+# provider.py
+"""
+Accès au fournisseur de données de marché (Yahoo Finance) pour l'application Finance Viewer.
+Tous les téléchargements de l'application passent par ce module.
+
+Mode cassette (variables d'environnement), pour des exécutions déterministes et hors ligne :
+- FINANCE_VIEWER_CASSETTE_MODE=record : chaque réponse du fournisseur est ajoutée à la cassette
+- FINANCE_VIEWER_CASSETTE_MODE=replay : les réponses sont servies depuis la cassette, sans réseau
+- FINANCE_VIEWER_CASSETTE : chemin de la cassette (fichier pickle compressé en gzip)
+- FINANCE_VIEWER_REPLAY_LATENCY : latence simulée de chaque réponse rejouée ou synthétique (en secondes)
+
+Fournisseur synthétique (FINANCE_VIEWER_PROVIDER=synthetic), pour les tests de charge hors ligne :
+des barres déterministes sont générées pour n'importe quel symbole et n'importe quelle plage,
+sur les séances de son calendrier de cotation, sans cassette ni réseau.
+"""
+
+import gzip
+import os
+import pickle
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+CASSETTE_MODE = os.environ.get("FINANCE_VIEWER_CASSETTE_MODE", "").lower()
+CASSETTE_PATH = os.environ.get("FINANCE_VIEWER_CASSETTE", "provider_cassette.pkl.gz")
+REPLAY_LATENCY_SECONDS = float(os.environ.get("FINANCE_VIEWER_REPLAY_LATENCY", "0"))
+SYNTHETIC_PROVIDER = os.environ.get("FINANCE_VIEWER_PROVIDER", "").lower() == "synthetic"
+
+
+class Cassette:
+    """
+    Réponses enregistrées du fournisseur.
+    Chaque réponse est ajoutée au fichier comme un membre gzip distinct : l'enregistrement
+    ne réécrit jamais le fichier, et une exécution interrompue conserve les réponses déjà reçues.
+    Le fichier est désérialisé avec pickle : ne rejouer que des cassettes de confiance.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Chemin de la cassette
+        """
+        self.path = path
+        self._series = None
+        self._lock = threading.Lock()
+
+    def record(self, ticker_symbol, start_date, end_date, interval, data):
+        """
+        Ajoute une réponse du fournisseur à la cassette.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            start_date (date): Date de début demandée
+            end_date (date): Date de fin demandée
+            interval (str): Intervalle des barres
+            data (DataFrame): Réponse du fournisseur
+        """
+        record = {"ticker": ticker_symbol, "start": start_date, "end": end_date, "interval": interval, "data": data}
+        with self._lock:
+            with gzip.open(self.path, "ab") as cassette_file:
+                pickle.dump(record, cassette_file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._series = None
+
+    def replay(self, ticker_symbol, start_date, end_date, interval):
+        """
+        Sert les barres enregistrées d'un actif sur une plage. Toutes les réponses d'un même actif
+        sont réunies : une plage découpée autrement qu'à l'enregistrement est servie quand même.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            start_date (date): Date de début (incluse, None pour toute la série)
+            end_date (date): Date de fin (exclue)
+            interval (str): Intervalle des barres
+
+        Returns:
+            DataFrame: Barres enregistrées de la plage (vide si l'actif n'a pas été enregistré)
+        """
+        data = self._load().get((ticker_symbol, interval))
+        if data is None:
+            return pd.DataFrame()
+        if start_date is None:
+            return data.copy()
+        index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+        return data[(index >= pd.Timestamp(start_date)) & (index < pd.Timestamp(end_date))].copy()
+
+    def _load(self):
+        # Réunit une fois les réponses enregistrées par (symbole, intervalle)
+        with self._lock:
+            if self._series is None:
+                responses = {}
+                if os.path.exists(self.path):
+                    with gzip.open(self.path, "rb") as cassette_file:
+                        while True:
+                            try:
+                                record = pickle.load(cassette_file)
+                            except EOFError:
+                                break
+                            responses.setdefault((record["ticker"], record["interval"]), []).append(record["data"])
+                self._series = {}
+                for key, frames in responses.items():
+                    data = pd.concat([frame for frame in frames if not frame.empty] or frames)
+                    self._series[key] = data[~data.index.duplicated(keep="last")].sort_index()
+            return self._series
+
+
+cassette = Cassette(CASSETTE_PATH)
+
+
+def synthetic_history(ticker_symbol, start_date, end_date):
+    """
+    Génère des barres déterministes : chaque barre ne dépend que du symbole et de sa date, si bien
+    qu'une plage découpée en plusieurs demandes donne la même série qu'une demande unique.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début (incluse)
+        end_date (date): Date de fin (exclue)
+
+    Returns:
+        DataFrame: Colonnes Close, High, Low, Open, Volume indexées par date (séances du calendrier de l'actif)
+    """
+    from calendars import calendar_for_ticker
+
+    days = calendar_for_ticker(ticker_symbol).sessions(start_date, end_date)
+    seed = zlib.crc32(ticker_symbol.encode("utf-8"))
+    level = 10 + seed % 990
+    # Jours depuis 1970 : tendance, cycles et bruit pseudo-aléatoire fonctions de la seule date
+    ordinals = days.astype(np.int64).astype(float)
+    phase = (seed % 628) / 100
+    noise = np.sin(ordinals * 12.9898 + phase) * 43758.5453 % 1.0 - 0.5
+    closes = level * np.exp(
+        (ordinals - 18000) * 0.00015 + 0.15 * np.sin(ordinals / 60 + phase) + 0.05 * np.sin(ordinals / 9 + 2 * phase)
+        + 0.01 * noise
+    )
+    spread = 0.004 + 0.01 * np.abs(noise)
+    return pd.DataFrame({
+        "Close": closes,
+        "High": closes * (1 + spread),
+        "Low": closes * (1 - spread),
+        "Open": closes * (1 - 0.5 * spread * np.sign(noise)),
+        "Volume": np.round(1e6 * (1.5 + np.sin(ordinals / 7 + phase))),
+    }, index=pd.DatetimeIndex(days, name="Date"))
+
+
+def download_history(ticker_symbol, start_date, end_date, interval="1d"):
+    """
+    Télécharge l'historique d'un actif (ou le rejoue depuis la cassette).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+        start_date (date): Date de début (incluse)
+        end_date (date): Date de fin (exclue)
+        interval (str): Intervalle des barres
+
+    Returns:
+        DataFrame: Colonnes Open, High, Low, Close, Volume indexées par date ; les prix sont ajustés
+            des divisions d'actions mais pas des dividendes (voir actions.py)
+    """
+    if CASSETTE_MODE == "replay" or SYNTHETIC_PROVIDER:
+        if REPLAY_LATENCY_SECONDS > 0:
+            time.sleep(REPLAY_LATENCY_SECONDS)
+        if SYNTHETIC_PROVIDER:
+            return synthetic_history(ticker_symbol, start_date, end_date)
+        return cassette.replay(ticker_symbol, start_date, end_date, interval)
+
+    # yfinance n'est chargé qu'au premier téléchargement (jamais en mode rejeu)
+    import yfinance as yf
+
+    # Colonnes à un seul niveau, quelle que soit la version de yfinance ; l'ajustement des dividendes
+    # est appliqué localement, à partir des opérations sur titres (download_actions)
+    data = yf.download(
+        ticker_symbol, start=start_date, end=end_date, interval=interval, auto_adjust=False,
+        multi_level_index=False, progress=False
+    )
+    if CASSETTE_MODE == "record":
+        cassette.record(ticker_symbol, start_date, end_date, interval, data)
+    return data
+
+
+def first_available_date(ticker_symbol):
+    """
+    Détermine la première date disponible d'un actif en une seule requête (barres trimestrielles
+    de tout l'historique), pour ne pas demander l'historique antérieur barre par barre.
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        date: Début de la première barre trimestrielle (None si inconnue)
+    """
+    if CASSETTE_MODE == "replay" or SYNTHETIC_PROVIDER:
+        if SYNTHETIC_PROVIDER:
+            # Séries synthétiques définies sur toute plage
+            return None
+        data = cassette.replay(ticker_symbol, None, None, "3mo")
+    else:
+        import yfinance as yf
+
+        data = yf.download(
+            ticker_symbol, period="max", interval="3mo", auto_adjust=False, multi_level_index=False, progress=False
+        )
+        if CASSETTE_MODE == "record":
+            cassette.record(ticker_symbol, None, None, "3mo", data)
+    if data is None or data.empty:
+        return None
+    return data.index.min().date()
+
+
+def download_actions(ticker_symbol):
+    """
+    Télécharge l'historique complet des opérations sur titres d'un actif (ou le rejoue depuis la cassette).
+
+    Args:
+        ticker_symbol (str): Symbole Yahoo Finance
+
+    Returns:
+        DataFrame: Colonnes Dividends (par action) et Stock Splits (ratio, 0 si aucun) indexées par date
+    """
+    if CASSETTE_MODE == "replay" or SYNTHETIC_PROVIDER:
+        if REPLAY_LATENCY_SECONDS > 0:
+            time.sleep(REPLAY_LATENCY_SECONDS)
+        if SYNTHETIC_PROVIDER:
+            # Aucune opération sur titres : les cours synthétiques sont déjà « ajustés »
+            return pd.DataFrame(columns=["Dividends", "Stock Splits"])
+        return cassette.replay(ticker_symbol, None, None, "actions")
+
+    import yfinance as yf
+
+    data = yf.Ticker(ticker_symbol).actions
+    if data is None:
+        data = pd.DataFrame(columns=["Dividends", "Stock Splits"])
+    if CASSETTE_MODE == "record":
+        cassette.record(ticker_symbol, None, None, "actions", data)
+    return data
@@ -0,0 +1,129 @@
+# quality.py
+"""
+Contrôles de qualité des séries téléchargées pour l'application Finance Viewer.
+
+Chaque contrôle est vectorisé sur toute la série ; le résultat est un masque de bits par ligne
+(un bit par contrôle), conservé avec les données dans la colonne Quality_Flags.
+"""
+
+import numpy as np
+
+# Contrôles effectués : (nom, libellé affiché) ; l'ordre définit le bit de chaque contrôle
+QUALITY_CHECKS = [
+    ("missing", "Valeur manquante"),
+    ("gap", "Trou de cotation"),
+    ("outlier", "Rendement aberrant"),
+    ("ohlc", "Incohérence OHLC"),
+    ("zero_volume", "Volume nul"),
+]
+QUALITY_BITS = {name: np.uint8(1 << position) for position, (name, _) in enumerate(QUALITY_CHECKS)}
+
+# Séances attendues manquantes entre deux barres à partir desquelles la barre suivante signale un trou
+GAP_MISSING_SESSIONS = 1
+
+# Un rendement est aberrant s'il dépasse ce score robuste (écart à la médiane en MAD)...
+OUTLIER_ZSCORE = 10.0
+# ... et cette amplitude absolue (typiquement une division d'actions non ajustée)
+OUTLIER_MIN_RETURN = 0.15
+
+# Tolérance relative des contrôles de cohérence OHLC
+OHLC_TOLERANCE = 1e-6
+
+
+def quality_flags(data, calendar=None):
+    """
+    Calcule les anomalies de chaque ligne d'une série. Les dates en double n'ont pas à être
+    contrôlées : le stockage (OHLCVSeries) ne conserve qu'une barre par date.
+
+    Args:
+        data (DataFrame): Colonnes Open, High, Low, Close, Volume indexées par date
+        calendar (BusinessDays): Calendrier de cotation de la place de l'actif (None : du lundi au vendredi,
+            sans férié)
+
+    Returns:
+        ndarray: Masque de bits (uint8) par ligne, 0 si aucune anomalie
+    """
+    flags = np.zeros(len(data), dtype=np.uint8)
+    if data.empty:
+        return flags
+
+    open_prices = data['Open'].to_numpy(dtype=float)
+    high_prices = data['High'].to_numpy(dtype=float)
+    low_prices = data['Low'].to_numpy(dtype=float)
+    close_prices = data['Close'].to_numpy(dtype=float)
+    volumes = data['Volume'].to_numpy(dtype=float)
+    prices = np.column_stack([open_prices, high_prices, low_prices, close_prices])
+
+    # Valeurs manquantes
+    flags[np.isnan(prices).any(axis=1)] |= QUALITY_BITS["missing"]
+
+    # Trous de cotation : séances attendues sans barre entre la barre précédente et celle-ci
+    # (fériés et fermetures de la place exclus par le calendrier)
+    days = data.index.to_numpy().astype("datetime64[D]")
+    if calendar is not None:
+        missing_sessions = calendar.session_counts(days[:-1] + 1, days[1:])
+    else:
+        missing_sessions = np.maximum(np.busday_count(days[:-1] + 1, days[1:]), 0)
+    flags[1:][missing_sessions >= GAP_MISSING_SESSIONS] |= QUALITY_BITS["gap"]
+
+    # Rendements aberrants (score robuste médiane / MAD, insensible aux valeurs extrêmes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = close_prices[1:] / close_prices[:-1] - 1.0
+        finite_returns = returns[np.isfinite(returns)]
+        if len(finite_returns) > 0:
+            median_return = np.median(finite_returns)
+            mad = 1.4826 * np.median(np.abs(finite_returns - median_return))
+            zscores = np.abs(returns - median_return) / mad
+            outliers = (zscores > OUTLIER_ZSCORE) & (np.abs(returns) > OUTLIER_MIN_RETURN)
+            flags[1:][outliers] |= QUALITY_BITS["outlier"]
+
+    # Cohérence OHLC : le plus haut encadre les autres prix, le plus bas aussi, prix positifs
+    inconsistent = (
+        (high_prices < np.fmax(np.fmax(open_prices, close_prices), low_prices) * (1 - OHLC_TOLERANCE))
+        | (low_prices > np.fmin(np.fmin(open_prices, close_prices), high_prices) * (1 + OHLC_TOLERANCE))
+        | (prices <= 0).any(axis=1)
+    )
+    flags[inconsistent] |= QUALITY_BITS["ohlc"]
+
+    # Volume nul, seulement si le fournisseur publie un volume pour cet actif (pas les devises)
+    if np.nansum(volumes) > 0:
+        flags[volumes == 0] |= QUALITY_BITS["zero_volume"]
+
+    return flags
+
+
+def flag_labels(flags):
+    """
+    Convertit des masques d'anomalies en libellés lisibles.
+
+    Args:
+        flags (array-like): Masques de bits par ligne
+
+    Returns:
+        ndarray: Libellés séparés par des virgules ("" si aucune anomalie)
+    """
+    flags = np.asarray(flags, dtype=np.uint8)
+    labels = np.full(len(flags), "", dtype=object)
+    for name, label in QUALITY_CHECKS:
+        has_flag = (flags & QUALITY_BITS[name]) != 0
+        labels[has_flag] = labels[has_flag] + np.where(labels[has_flag] == "", "", ", ") + label
+    return labels
+
+
+def summarize_flags(flags):
+    """
+    Compte les lignes concernées par chaque anomalie.
+
+    Args:
+        flags (array-like): Masques de bits par ligne
+
+    Returns:
+        dict: {libellé: nombre de lignes}, uniquement pour les anomalies présentes
+    """
+    flags = np.asarray(flags, dtype=np.uint8)
+    summary = {}
+    for name, label in QUALITY_CHECKS:
+        count = int(((flags & QUALITY_BITS[name]) != 0).sum())
+        if count:
+            summary[label] = count
+    return summary
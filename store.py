@@ -0,0 +1,671 @@
+# store.py
+"""
+Stockage en mémoire des séries téléchargées pour l'application Finance Viewer.
+
+Chaque symbole est conservé une seule fois avec la plage de dates déjà couverte :
+une nouvelle demande ne télécharge que les dates manquantes, et le mode direct
+ne récupère que les barres postérieures à la dernière barre connue. Le calendrier de cotation
+de chaque actif évite de redemander des plages où le marché est fermé (week-ends, fériés).
+Les séries sont conservées sous forme compacte (OHLCVSeries) et converties en DataFrame à la lecture.
+
+Avec un cache partagé (backends.py), une plage absente en mémoire est d'abord cherchée dans le
+cache des autres réplicas, et chaque téléchargement y est publié : le trafic vers le fournisseur
+dépend du nombre de symboles distincts, pas du nombre de réplicas. L'en-tête de chaque série
+(date de téléchargement, plages couvertes) y est aussi publié seul : la série entière n'est lue
+que si elle apporte des barres absentes de la mémoire.
+
+La couverture d'une série est une liste de plages disjointes : un historique long est téléchargé
+par tranches parallèles, chacune ajoutée dès sa réception, et un échec ne coûte que sa tranche.
+
+Le stockage est une réserve du budget mémoire (memory.py) : les séries les moins récemment lues
+sont évincées au-delà du budget, et déversées sur disque si un répertoire est configuré.
+"""
+
+import struct
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from backends import shared_backend
+from calendars import calendar_for_ticker
+from memory import memory_governor, spill_backend
+from ohlcv import OHLCVSeries
+from provider import download_history, first_available_date
+from summaries import summary_index
+
+# Délai au-delà duquel la fin d'une série récente est considérée comme périmée (en secondes)
+TAIL_TTL_SECONDS = 15 * 60
+
+# Intervalle minimal entre deux actualisations de la fin d'une série, toutes sessions et réplicas confondus
+TAIL_MIN_INTERVAL_SECONDS = 5
+
+# Délai après la clôture au-delà duquel la barre de la séance est définitive (en secondes)
+BAR_SETTLEMENT_SECONDS = 15 * 60
+
+# Durée des tranches d'un téléchargement d'historique long (en années) et téléchargements simultanés
+HISTORY_CHUNK_YEARS = 10
+HISTORY_FETCH_WORKERS = 4
+
+# En-tête d'une série dans le cache partagé : date de téléchargement et nombre de plages couvertes,
+# suivis du début et de la fin (ordinaux) de chaque plage
+ENTRY_HEADER = struct.Struct("<dq")
+RANGE_STRUCT = struct.Struct("<qq")
+
+
+def add_range(ranges, start_date, end_date):
+    """
+    Ajoute une plage [début, fin) à une liste de plages disjointes, en fusionnant les plages
+    qui se chevauchent ou se touchent.
+
+    Args:
+        ranges (list): Plages (début, fin) triées et disjointes
+        start_date (date): Début de la plage ajoutée (inclus)
+        end_date (date): Fin de la plage ajoutée (exclue)
+
+    Returns:
+        list: Nouvelle liste de plages triées et disjointes
+    """
+    merged = []
+    for range_start, range_end in sorted(ranges + [(start_date, end_date)]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
+
+def subtract_ranges(start_date, end_date, ranges):
+    """
+    Liste les parties d'une plage [début, fin) non couvertes par des plages disjointes.
+
+    Args:
+        start_date (date): Début de la plage (inclus)
+        end_date (date): Fin de la plage (exclue)
+        ranges (list): Plages (début, fin) triées et disjointes
+
+    Returns:
+        list: Plages (début, fin) non couvertes, triées
+    """
+    uncovered = []
+    cursor = start_date
+    for range_start, range_end in ranges:
+        if range_end <= cursor:
+            continue
+        if range_start >= end_date:
+            break
+        if range_start > cursor:
+            uncovered.append((cursor, range_start))
+        cursor = max(cursor, range_end)
+    if cursor < end_date:
+        uncovered.append((cursor, end_date))
+    return uncovered
+
+
+def split_range(start_date, end_date, chunk_years=HISTORY_CHUNK_YEARS):
+    """
+    Découpe une plage en tranches alignées sur les 1er janvier des années multiples de chunk_years.
+
+    Args:
+        start_date (date): Début de la plage (inclus)
+        end_date (date): Fin de la plage (exclue)
+        chunk_years (int): Durée d'une tranche en années
+
+    Returns:
+        list: Tranches (début, fin), de la plus récente à la plus ancienne
+    """
+    chunks = []
+    chunk_end = end_date
+    while chunk_end > start_date:
+        boundary_year = (chunk_end.year - 1) // chunk_years * chunk_years
+        chunk_start = max(start_date, date(boundary_year, 1, 1))
+        chunks.append((chunk_start, chunk_end))
+        chunk_end = chunk_start
+    return chunks
+
+
+def tail_is_open(calendar, last_bar_date, fetched_at):
+    """
+    Indique si une série peut avoir évolué depuis sa dernière barre : barre téléchargée avant
+    la clôture de sa séance (barre partielle, même un vendredi ou une veille de férié), ou séance
+    attendue depuis, le jour étant celui du fuseau de la place.
+
+    Args:
+        calendar (TradingCalendar): Calendrier de cotation de l'actif
+        last_bar_date (date): Date de la dernière barre connue
+        fetched_at (float): Horodatage du téléchargement de la dernière barre
+
+    Returns:
+        bool: True si la fin de série doit être rafraîchie
+    """
+    if fetched_at < calendar.session_close(last_bar_date) + BAR_SETTLEMENT_SECONDS:
+        return True
+    today = calendar.today()
+    return calendar.has_sessions(last_bar_date + timedelta(days=1), today + timedelta(days=1))
+
+
+def encode_header(entry):
+    """
+    Sérialise l'en-tête d'une entrée (date de téléchargement et plages couvertes), publié aussi
+    seul dans le cache partagé pour comparer une série sans lire ses barres.
+
+    Args:
+        entry (dict): Entrée du stockage (ranges, fetched_at)
+
+    Returns:
+        bytes: En-tête sérialisé
+    """
+    return ENTRY_HEADER.pack(entry["fetched_at"], len(entry["ranges"])) + b"".join(
+        RANGE_STRUCT.pack(range_start.toordinal(), range_end.toordinal()) for range_start, range_end in entry["ranges"]
+    )
+
+
+def decode_header(blob):
+    """
+    Reconstruit l'en-tête d'une entrée sérialisée par encode_header (ou encode_entry).
+
+    Args:
+        blob (bytes): En-tête ou entrée sérialisés
+
+    Returns:
+        dict: En-tête (ranges, fetched_at)
+    """
+    fetched_at, range_count = ENTRY_HEADER.unpack_from(blob)
+    ranges = [
+        (date.fromordinal(start_ordinal), date.fromordinal(end_ordinal))
+        for start_ordinal, end_ordinal in RANGE_STRUCT.iter_unpack(
+            blob[ENTRY_HEADER.size:ENTRY_HEADER.size + range_count * RANGE_STRUCT.size]
+        )
+    ]
+    return {"ranges": ranges, "fetched_at": fetched_at}
+
+
+def encode_entry(entry):
+    """
+    Sérialise une série et ses plages couvertes pour le cache partagé.
+
+    Args:
+        entry (dict): Entrée du stockage (data, ranges, fetched_at)
+
+    Returns:
+        bytes: Entrée sérialisée
+    """
+    return encode_header(entry) + entry["data"].to_bytes()
+
+
+def decode_entry(blob):
+    """
+    Reconstruit une entrée sérialisée par encode_entry.
+
+    Args:
+        blob (bytes): Entrée sérialisée
+
+    Returns:
+        dict: Entrée (data, ranges, fetched_at)
+    """
+    entry = decode_header(blob)
+    entry["data"] = OHLCVSeries.from_bytes(blob[ENTRY_HEADER.size + len(entry["ranges"]) * RANGE_STRUCT.size:])
+    return entry
+
+
+def adds_to_entry(entry, shared):
+    """
+    Indique si une version partagée apporte quelque chose à une entrée en mémoire.
+
+    Args:
+        entry (dict): Entrée en mémoire (None si absente)
+        shared (dict): Entrée ou en-tête partagés (ranges, fetched_at)
+
+    Returns:
+        bool: True si la version partagée est plus récente ou couvre des dates absentes de l'entrée
+    """
+    return entry is None or shared["fetched_at"] > entry["fetched_at"] or any(
+        subtract_ranges(range_start, range_end, entry["ranges"]) for range_start, range_end in shared["ranges"]
+    )
+
+
+def combine_entries(first, second):
+    """
+    Réunit deux entrées d'un même symbole ; en cas de date en double, la barre la plus récemment
+    téléchargée l'emporte.
+
+    Args:
+        first (dict): Entrée (data, ranges, fetched_at)
+        second (dict): Entrée (data, ranges, fetched_at)
+
+    Returns:
+        dict: Entrée réunie
+    """
+    older, newer = (first, second) if first["fetched_at"] <= second["fetched_at"] else (second, first)
+    ranges = list(first["ranges"])
+    for range_start, range_end in second["ranges"]:
+        ranges = add_range(ranges, range_start, range_end)
+    # Date de téléchargement de la dernière barre de la série réunie
+    first_last, second_last = first["data"].last_date(), second["data"].last_date()
+    if first_last == second_last or first_last is None or second_last is None:
+        fetched_at = newer["fetched_at"]
+    else:
+        fetched_at = first["fetched_at"] if first_last > second_last else second["fetched_at"]
+    return {
+        "data": older["data"].merge(newer["data"]),
+        "ranges": ranges,
+        "fetched_at": fetched_at,
+    }
+
+
+class SeriesStore:
+    """
+    Séries quotidiennes par symbole, avec les plages couvertes et un numéro de révision.
+    Sûr entre threads : un seul téléchargement à la fois par symbole (hors historique par tranches).
+    """
+
+    def __init__(self, downloader=download_history, calendar_resolver=calendar_for_ticker, shared_backend=None,
+                 summary_index=None, governor=None, spill_backend=None, first_date_resolver=first_available_date):
+        """
+        Args:
+            downloader (callable): Fonction (symbole, début, fin) -> DataFrame
+            calendar_resolver (callable): Fonction (symbole) -> TradingCalendar
+            shared_backend: Cache partagé entre réplicas (None : mémoire du processus uniquement)
+            summary_index (SummaryIndex): Index des résumés mis à jour à chaque ajout de barres (None : aucun)
+            governor (MemoryGovernor): Budget mémoire appliqué après chaque téléchargement (None : aucun)
+            spill_backend: Stockage des séries évincées (None : les séries évincées sont oubliées)
+            first_date_resolver (callable): Fonction (symbole) -> première date disponible (None si inconnue)
+        """
+        self.downloader = downloader
+        self.first_date_resolver = first_date_resolver
+        self.calendar_resolver = calendar_resolver
+        self.shared_backend = shared_backend
+        self.summary_index = summary_index
+        self.governor = governor
+        self.spill_backend = spill_backend
+        # Appels au fournisseur effectués / évités (calendrier de cotation) / séries reprises du cache partagé,
+        # séries évincées / rechargées depuis le déversement
+        self.stats = {"downloads": 0, "skipped": 0, "shared_hits": 0, "evictions": 0, "spill_hits": 0}
+        self._entries = {}
+        self._spilled = set()
+        # Dernière révision des séries évincées, pour que leur numéro de révision ne revienne jamais en arrière
+        self._evicted_revisions = {}
+        self._lock = threading.Lock()
+        self._ticker_locks = defaultdict(threading.Lock)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def revision(self, ticker_symbol):
+        """
+        Renvoie le numéro de révision d'une série (incrémenté à chaque ajout de barres).
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            int: Numéro de révision (0 si la série est absente)
+        """
+        entry = self._entries.get(ticker_symbol)
+        return entry["revision"] if entry else self._evicted_revisions.get(ticker_symbol, 0)
+
+    def get_range(self, ticker_symbol, start_date, end_date):
+        """
+        Renvoie la série d'un actif sur une plage, en ne téléchargeant que les dates non couvertes.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+
+        Returns:
+            DataFrame: Colonnes Open, High, Low, Close, Volume de la plage
+        """
+        calendar = self.calendar_resolver(ticker_symbol)
+        with self._ticker_locks[ticker_symbol]:
+            self._load_spilled(ticker_symbol)
+            entry = self._entries.get(ticker_symbol)
+            missing_ranges = self._missing_ranges(entry, start_date, end_date, calendar)
+            if missing_ranges and self.shared_backend is not None:
+                # Un autre réplica a peut-être déjà téléchargé ces dates
+                self._load_shared(ticker_symbol)
+                entry = self._entries.get(ticker_symbol)
+                missing_ranges = self._missing_ranges(entry, start_date, end_date, calendar)
+            downloaded = False
+            for missing_start, missing_end in missing_ranges:
+                if calendar.has_sessions(missing_start, missing_end):
+                    self._download(ticker_symbol, calendar, missing_start, missing_end)
+                    downloaded = True
+                else:
+                    # Marché fermé sur toute la plage : elle est complète sans appel au fournisseur
+                    self.stats["skipped"] += 1
+                    self._add_bars(ticker_symbol, OHLCVSeries.empty(), missing_start, missing_end)
+            if downloaded:
+                self._publish_shared(ticker_symbol)
+            entry = self._entries.get(ticker_symbol)
+            entry["accessed_at"] = time.time()
+            data = entry["data"].slice(start_date, end_date).to_frame()
+        if downloaded:
+            self._enforce_budget()
+        return data
+
+    def refresh_tail(self, ticker_symbol):
+        """
+        Télécharge uniquement les barres à partir de la dernière barre connue (incluse, car la barre
+        du jour évolue en séance) jusqu'à aujourd'hui.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            int: Nombre de barres reçues
+        """
+        tomorrow = date.today() + timedelta(days=1)
+        calendar = self.calendar_resolver(ticker_symbol)
+        with self._ticker_locks[ticker_symbol]:
+            self._load_spilled(ticker_symbol)
+            if self.shared_backend is not None:
+                self._load_shared(ticker_symbol)
+            entry = self._entries.get(ticker_symbol)
+            if entry is None or entry["data"].is_empty:
+                tail_start = date.today() - timedelta(days=7)
+            else:
+                tail_start = entry["data"].last_date()
+                if not tail_is_open(calendar, tail_start, entry["fetched_at"]) or (
+                        entry["ranges"][-1][1] >= tomorrow
+                        and time.time() - entry["fetched_at"] < TAIL_MIN_INTERVAL_SECONDS):
+                    # Aucune séance depuis la dernière barre, ou fin de série actualisée à l'instant
+                    self.stats["skipped"] += 1
+                    return 0
+            new_bars = self._download(ticker_symbol, calendar, tail_start, tomorrow)
+            self._publish_shared(ticker_symbol)
+        self._enforce_budget()
+        return len(new_bars)
+
+    def stored_series(self, ticker_symbol):
+        """
+        Renvoie toutes les barres conservées d'un actif, sans rien télécharger.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            OHLCVSeries: Série en stockage (None si la série est absente)
+        """
+        with self._ticker_locks[ticker_symbol]:
+            self._load_spilled(ticker_symbol)
+            entry = self._entries.get(ticker_symbol)
+            return entry["data"] if entry else None
+
+    def history_chunks(self, ticker_symbol, start_date, end_date, chunk_years=HISTORY_CHUNK_YEARS):
+        """
+        Liste les tranches d'une longue plage qui restent à télécharger. Quand le début de la plage
+        manque, la première date disponible de l'actif est demandée une fois au fournisseur : la
+        plage antérieure est marquée couverte (sans barre) et n'est jamais découpée en tranches.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            start_date (date): Date de début (incluse)
+            end_date (date): Date de fin (exclue)
+            chunk_years (int): Durée d'une tranche en années
+
+        Returns:
+            list: Tranches (début, fin) non couvertes, de la plus récente à la plus ancienne
+        """
+        calendar = self.calendar_resolver(ticker_symbol)
+        with self._ticker_locks[ticker_symbol]:
+            self._load_spilled(ticker_symbol)
+            if self.shared_backend is not None:
+                self._load_shared(ticker_symbol)
+            missing_ranges = self._missing_ranges(self._entries.get(ticker_symbol), start_date, end_date, calendar)
+            if missing_ranges and missing_ranges[0][0] == start_date:
+                first_date = self._first_date(ticker_symbol)
+                if first_date is not None and first_date > start_date:
+                    # Avant la première barre de l'actif : plage complète sans téléchargement
+                    self._add_bars(ticker_symbol, OHLCVSeries.empty(), start_date, min(first_date, end_date))
+                    self._publish_shared(ticker_symbol)
+                    missing_ranges = self._missing_ranges(
+                        self._entries.get(ticker_symbol), start_date, end_date, calendar
+                    )
+        return [
+            chunk for missing_start, missing_end in reversed(missing_ranges)
+            for chunk in split_range(missing_start, missing_end, chunk_years)
+        ]
+
+    def fetch_chunks(self, ticker_symbol, chunks, max_workers=HISTORY_FETCH_WORKERS, progress_callback=None):
+        """
+        Télécharge des tranches en parallèle ; chaque tranche reçue est ajoutée (et publiée) aussitôt,
+        si bien qu'une nouvelle tentative ne redemande que les tranches en échec.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            chunks (list): Tranches (début, fin) à télécharger (voir history_chunks)
+            max_workers (int): Nombre maximal de téléchargements simultanés
+            progress_callback (callable): Fonction appelée dans le thread appelant avec
+                (tranches terminées, nombre de tranches)
+
+        Returns:
+            list: Tranches en échec (vide si tout a été téléchargé)
+        """
+        calendar = self.calendar_resolver(ticker_symbol)
+
+        def fetch_chunk(chunk):
+            chunk_start, chunk_end = chunk
+            if calendar.has_sessions(chunk_start, chunk_end):
+                new_bars = self._fetch_bars(ticker_symbol, calendar, chunk_start, chunk_end)
+            else:
+                with self._lock:
+                    self.stats["skipped"] += 1
+                new_bars = OHLCVSeries.empty()
+            with self._ticker_locks[ticker_symbol]:
+                self._load_spilled(ticker_symbol)
+                self._add_bars(ticker_symbol, new_bars, chunk_start, chunk_end)
+                self._publish_shared(ticker_symbol)
+            self._enforce_budget()
+
+        failed_chunks = []
+        if not chunks:
+            return failed_chunks
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            futures = {executor.submit(fetch_chunk, chunk): chunk for chunk in chunks}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                try:
+                    future.result()
+                except Exception:
+                    failed_chunks.append(futures[future])
+                if progress_callback is not None:
+                    progress_callback(completed, len(chunks))
+        return sorted(failed_chunks, reverse=True)
+
+    def memory_usage(self):
+        """
+        Renvoie la taille des séries conservées.
+
+        Returns:
+            int: Taille des données en octets
+        """
+        with self._lock:
+            return sum(entry["data"].nbytes for entry in self._entries.values())
+
+    def oldest_access(self):
+        """
+        Returns:
+            float: Instant de la dernière lecture de la série la moins récemment lue (None si le stockage est vide)
+        """
+        with self._lock:
+            return min((entry["accessed_at"] for entry in self._entries.values()), default=None)
+
+    def evict_oldest(self):
+        """
+        Évince la série la moins récemment lue parmi celles qu'aucun thread n'utilise, après l'avoir
+        déversée si un stockage de déversement est configuré.
+
+        Returns:
+            int: Nombre d'octets libérés (None si aucune série n'est évinçable)
+        """
+        with self._lock:
+            candidates = sorted(self._entries, key=lambda ticker: self._entries[ticker]["accessed_at"])
+        for ticker_symbol in candidates:
+            ticker_lock = self._ticker_locks[ticker_symbol]
+            # Série en cours de lecture ou de téléchargement : la suivante est évincée à sa place
+            if not ticker_lock.acquire(blocking=False):
+                continue
+            try:
+                with self._lock:
+                    entry = self._entries.pop(ticker_symbol, None)
+                    if entry is None:
+                        continue
+                    self._evicted_revisions[ticker_symbol] = entry["revision"]
+                    self.stats["evictions"] += 1
+                if self.spill_backend is not None:
+                    try:
+                        self.spill_backend.set(f"series:{ticker_symbol}", encode_entry(entry))
+                        self._spilled.add(ticker_symbol)
+                    except Exception:
+                        # Déversement impossible : la série sera téléchargée de nouveau si besoin
+                        pass
+                return entry["data"].nbytes
+            finally:
+                ticker_lock.release()
+        return None
+
+    def clear(self):
+        """
+        Vide le stockage.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._spilled.clear()
+            self._evicted_revisions.clear()
+        if self.summary_index is not None:
+            self.summary_index.clear()
+
+    def _download(self, ticker_symbol, calendar, start_date, end_date):
+        # Le verrou du symbole est détenu par l'appelant
+        new_bars = self._fetch_bars(ticker_symbol, calendar, start_date, end_date)
+        self._add_bars(ticker_symbol, new_bars, start_date, end_date)
+        return new_bars
+
+    def _fetch_bars(self, ticker_symbol, calendar, start_date, end_date):
+        # Téléchargement seul (sans ajout au stockage)
+        with self._lock:
+            self.stats["downloads"] += 1
+        new_bars = self.downloader(ticker_symbol, start_date, end_date)
+        calendar.learn_closures(start_date, end_date, new_bars.index)
+        return OHLCVSeries.from_frame(new_bars)
+
+    def _first_date(self, ticker_symbol):
+        # Première date disponible selon le fournisseur (None si inconnue ou en cas d'échec)
+        with self._lock:
+            self.stats["downloads"] += 1
+        try:
+            return self.first_date_resolver(ticker_symbol)
+        except Exception:
+            return None
+
+    def _enforce_budget(self):
+        # Hors de tout verrou de symbole : l'éviction peut porter sur n'importe quelle série
+        if self.governor is not None:
+            self.governor.enforce()
+
+    def _load_spilled(self, ticker_symbol):
+        # Recharge une série évincée ; le verrou du symbole est détenu par l'appelant
+        if ticker_symbol in self._spilled:
+            self._spilled.discard(ticker_symbol)
+            self._load_shared(ticker_symbol, self.spill_backend, "spill_hits")
+
+    def _load_shared(self, ticker_symbol, backend=None, stat="shared_hits"):
+        # Reprend la série du cache partagé (ou de backend) ; le verrou du symbole est détenu par l'appelant
+        try:
+            if backend is None:
+                # En-tête seul d'abord : la série entière n'est lue que si elle apporte quelque chose
+                header = self.shared_backend.get(f"series-header:{ticker_symbol}")
+                if header is not None and not adds_to_entry(self._entries.get(ticker_symbol), decode_header(header)):
+                    return
+            blob = (backend or self.shared_backend).get(f"series:{ticker_symbol}")
+        except Exception:
+            # Cache partagé indisponible : le stockage fonctionne en mémoire seule
+            return
+        if blob is None:
+            return
+        shared_entry = decode_entry(blob)
+        with self._lock:
+            entry = self._entries.get(ticker_symbol)
+            if entry is None:
+                combined = shared_entry
+            elif not adds_to_entry(entry, shared_entry):
+                # Rien de plus récent ni de plus étendu que la série en mémoire
+                return
+            else:
+                combined = combine_entries(entry, shared_entry)
+            combined["revision"] = (entry["revision"] if entry else self._evicted_revisions.get(ticker_symbol, 0)) + 1
+            combined["accessed_at"] = time.time()
+            self._entries[ticker_symbol] = combined
+            self.stats[stat] += 1
+        if self.summary_index is not None:
+            self.summary_index.update(ticker_symbol, combined["data"])
+
+    def _publish_shared(self, ticker_symbol):
+        # Publie la série dans le cache partagé ; le verrou du symbole est détenu par l'appelant
+        if self.shared_backend is None:
+            return
+        entry = self._entries[ticker_symbol]
+
+        def merge(current_blob):
+            if current_blob is None:
+                return encode_entry(entry)
+            # Réunion avec la version partagée (éventuellement écrite entre-temps par un autre réplica)
+            return encode_entry(combine_entries(decode_entry(current_blob), entry))
+
+        def merge_header(current_header):
+            # Réunion des en-têtes : l'en-tête publié ne recule jamais, quel que soit l'ordre des écritures
+            header = decode_header(current_header) if current_header is not None else {"ranges": [], "fetched_at": 0.0}
+            ranges = header["ranges"]
+            for range_start, range_end in entry["ranges"]:
+                ranges = add_range(ranges, range_start, range_end)
+            return encode_header({"ranges": ranges, "fetched_at": max(header["fetched_at"], entry["fetched_at"])})
+
+        try:
+            self.shared_backend.update(f"series:{ticker_symbol}", merge)
+            self.shared_backend.update(f"series-header:{ticker_symbol}", merge_header)
+        except Exception:
+            # Cache partagé indisponible : la série reste disponible en mémoire
+            pass
+
+    def _missing_ranges(self, entry, start_date, end_date, calendar):
+        # Plages [début, fin) à télécharger pour couvrir la demande
+        if entry is None:
+            return [(start_date, end_date)]
+        missing_ranges = subtract_ranges(start_date, end_date, entry["ranges"])
+        covered_end = entry["ranges"][-1][1]
+        if (end_date >= date.today() - timedelta(days=1) and end_date <= covered_end
+                and time.time() - entry["fetched_at"] > TAIL_TTL_SECONDS):
+            # Fin de série récente et ancienne : rafraîchir à partir de la dernière barre
+            last_date = entry["data"].last_date()
+            if last_date is not None and tail_is_open(calendar, last_date, entry["fetched_at"]):
+                missing_ranges = add_range(missing_ranges, last_date, covered_end)
+        return missing_ranges
+
+    def _add_bars(self, ticker_symbol, new_bars, start_date, end_date):
+        # Le verrou du symbole est détenu par l'appelant
+        with self._lock:
+            entry = self._entries.get(ticker_symbol)
+            if entry is None:
+                entry = {
+                    "data": OHLCVSeries.empty(), "ranges": [], "accessed_at": time.time(), "fetched_at": 0.0,
+                    "revision": self._evicted_revisions.get(ticker_symbol, 0),
+                }
+                self._entries[ticker_symbol] = entry
+            last_date = entry["data"].last_date()
+            if not new_bars.is_empty and (last_date is None or new_bars.last_date() >= last_date):
+                # Date de téléchargement de la dernière barre : une plage vide (marché fermé) ou plus ancienne
+                # ne la rafraîchit pas, sans quoi une barre partielle passerait pour définitive
+                entry["fetched_at"] = time.time()
+            entry["data"] = entry["data"].merge(new_bars)
+            entry["ranges"] = add_range(entry["ranges"], start_date, end_date)
+            entry["revision"] += 1
+        if self.summary_index is not None and not new_bars.is_empty:
+            self.summary_index.update(ticker_symbol, entry["data"])
+
+
+# Stockage partagé par toutes les sessions du processus (et par les réplicas si un cache partagé est configuré)
+series_store = SeriesStore(
+    shared_backend=shared_backend, summary_index=summary_index, governor=memory_governor, spill_backend=spill_backend
+)
+memory_governor.register("Séries", series_store)
@@ -0,0 +1,187 @@
+# summaries.py
+"""
+Index des résumés par symbole pour l'application Finance Viewer.
+
+Le résumé d'une série (dernière clôture, performances 1J/1S/1M/YTD/1A, plus haut et plus bas
+sur 52 semaines, volume moyen) est recalculé à chaque ajout de barres dans le stockage :
+les indicateurs, filtres et recherches le lisent ensuite en temps constant.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+# Horizons des performances : libellé -> durée (None : depuis la clôture précédente, "YTD" : depuis le 1er janvier)
+RETURN_HORIZONS = {
+    "1J": None,
+    "1S": timedelta(weeks=1),
+    "1M": timedelta(days=30),
+    "YTD": "YTD",
+    "1A": relativedelta(years=1),
+}
+
+# Tolérance de la clôture de référence d'un horizon : faute de clôture à la date de référence ou avant,
+# la première clôture de ce délai est retenue (historique commençant un week-end ou un jour férié)
+HORIZON_TOLERANCE = timedelta(days=7)
+
+# Fenêtre du plus haut / plus bas annuel et du volume moyen
+HIGH_LOW_WINDOW = timedelta(weeks=52)
+AVERAGE_VOLUME_WINDOW = timedelta(days=91)
+
+
+def _date_to_ns(value):
+    # Date -> nanosecondes depuis l'époque
+    return pd.Timestamp(value).value
+
+
+def compute_summary(series):
+    """
+    Calcule le résumé d'une série compacte (recherches dichotomiques, sans parcours de l'historique
+    pour les performances).
+
+    Args:
+        series (OHLCVSeries): Série triée par date
+
+    Returns:
+        dict: last_date, last_close, last_volume, returns ({horizon: % ou NaN si l'historique est trop court}),
+            high_52w, low_52w, average_volume ; None si la série est vide
+    """
+    if series.is_empty:
+        return None
+    timestamps = series.timestamps
+    closes = series.prices[:, 0].astype(float)
+    last_date = series.last_date()
+    last_close = closes[-1]
+
+    def close_before(limit_date):
+        # Dernière clôture strictement antérieure à limit_date (NaN si aucune)
+        position = np.searchsorted(timestamps, _date_to_ns(limit_date), side="left") - 1
+        return closes[position] if position >= 0 else np.nan
+
+    def close_at(reference_date):
+        # Dernière clôture à reference_date ou avant, sinon première clôture dans la tolérance (NaN si aucune)
+        reference = close_before(reference_date + timedelta(days=1))
+        if np.isnan(reference) and timestamps[0] <= _date_to_ns(reference_date + HORIZON_TOLERANCE):
+            reference = closes[0]
+        return reference
+
+    returns = {}
+    for label, horizon in RETURN_HORIZONS.items():
+        if horizon is None:
+            reference = closes[-2] if len(closes) > 1 else np.nan
+        elif horizon == "YTD":
+            reference = close_before(date(last_date.year, 1, 1))
+        else:
+            reference = close_at(last_date - horizon)
+        returns[label] = (last_close / reference - 1.0) * 100
+
+    window_start = np.searchsorted(timestamps, _date_to_ns(last_date - HIGH_LOW_WINDOW), side="right")
+    volume_start = np.searchsorted(timestamps, _date_to_ns(last_date - AVERAGE_VOLUME_WINDOW), side="right")
+    volumes = series.volumes[volume_start:]
+    return {
+        "last_date": last_date,
+        "last_close": float(last_close),
+        "last_volume": float(series.volumes[-1]),
+        "returns": returns,
+        "high_52w": float(np.nanmax(series.prices[window_start:, 1])),
+        "low_52w": float(np.nanmin(series.prices[window_start:, 2])),
+        "average_volume": float(volumes.mean()) if volumes.any() else float("nan"),
+    }
+
+
+def summary_table(summaries):
+    """
+    Construit le tableau de résumés de plusieurs symboles.
+
+    Args:
+        summaries (dict): {symbole: résumé (voir compute_summary), None si le symbole n'est pas résumé}
+
+    Returns:
+        DataFrame: Une ligne par symbole résumé (date, clôture, performances, plus haut et plus bas
+            sur 52 semaines, volume moyen)
+    """
+    rows = {
+        ticker: {
+            "Date": summary["last_date"], "Clôture": summary["last_close"],
+            **{f"Perf. {label} (%)": value for label, value in summary["returns"].items()},
+            "Plus haut 52s": summary["high_52w"], "Plus bas 52s": summary["low_52w"],
+            "Volume moyen": summary["average_volume"],
+        }
+        for ticker, summary in summaries.items() if summary is not None
+    }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+class SummaryIndex:
+    """
+    Résumés matérialisés par symbole, sûrs entre threads.
+    """
+
+    def __init__(self):
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def update(self, ticker_symbol, series):
+        """
+        Recalcule le résumé d'un symbole après un ajout de barres.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+            series (OHLCVSeries): Série complète du symbole
+        """
+        summary = compute_summary(series)
+        with self._lock:
+            if summary is None:
+                self._summaries.pop(ticker_symbol, None)
+            else:
+                self._summaries[ticker_symbol] = summary
+
+    def get(self, ticker_symbol):
+        """
+        Renvoie le résumé d'un symbole.
+
+        Args:
+            ticker_symbol (str): Symbole Yahoo Finance
+
+        Returns:
+            dict: Résumé (voir compute_summary), ou None si la série n'a jamais été chargée
+        """
+        return self._summaries.get(ticker_symbol)
+
+    def tickers(self):
+        """
+        Returns:
+            list: Symboles résumés
+        """
+        with self._lock:
+            return list(self._summaries)
+
+    def table(self, ticker_symbols=None):
+        """
+        Construit le tableau des résumés, pour filtrer ou trier des symboles.
+
+        Args:
+            ticker_symbols (list): Symboles à inclure (None : tous les symboles résumés)
+
+        Returns:
+            DataFrame: Une ligne par symbole résumé (voir summary_table)
+        """
+        with self._lock:
+            summaries = dict(self._summaries)
+        if ticker_symbols is not None:
+            summaries = {ticker: summaries[ticker] for ticker in ticker_symbols if ticker in summaries}
+        return summary_table(summaries)
+
+    def clear(self):
+        """
+        Vide l'index.
+        """
+        with self._lock:
+            self._summaries.clear()
+
+
+# Index partagé par toutes les sessions du processus, alimenté par le stockage des séries
+summary_index = SummaryIndex()
@@ -5,9 +5,20 @@ Fonctions utilitaires pour l'application Finance Viewer.
 
 import re
 import io
+import gzip
+import numpy as np
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+
+from cache import SHARED_EXPORT_TTL_SECONDS, export_cache, fingerprint_frame, shared_get_or_create
+from memory import memory_governor
+from quality import flag_labels
+
+
+# Colonnes exportées, identiques pour tous les formats
+EXPORT_COLUMNS = ['Price', 'High', 'Low', 'Open', 'Variation (%)', 'Volume']
+
+# Nombre de lignes écrites entre deux signalements d'avancement de l'export Excel
+EXCEL_PROGRESS_STEP = 500
 
 
 def clean_text(text):
@@ -25,13 +36,43 @@ def clean_text(text):
     return clean_name
 
 
-def create_excel(data, sheet_name="Data"):
+def prepare_export_data(data):
+    """
+    Prépare les données financières pour l'export (colonnes communes à tous les formats).
+
+    Args:
+        data (DataFrame): Données à exporter
+
+    Returns:
+        DataFrame: Données avec les colonnes Price, High, Low, Open, Variation (%), Volume,
+            et Qualité si des anomalies ont été détectées
+    """
+    export_data = data.copy()
+
+    # Calculer la variation quotidienne
+    export_data['Variation (%)'] = export_data['Close'].pct_change(fill_method=None) * 100
+
+    # Réorganiser les colonnes
+    export_data = export_data[['Close', 'High', 'Low', 'Open', 'Variation (%)', 'Volume']]
+
+    # Renommer les colonnes
+    export_data.columns = EXPORT_COLUMNS
+    export_data.index.name = 'Date'
+
+    # Signaler les anomalies de qualité, s'il y en a
+    if 'Quality_Flags' in data and data['Quality_Flags'].any():
+        export_data['Qualité'] = flag_labels(data['Quality_Flags'].to_numpy())
+    return export_data
+
+
+def create_excel(data, sheet_name="Data", progress_callback=None):
     """
     Crée un fichier Excel à partir des données financières.
 
     Args:
         data (DataFrame): Données à exporter
         sheet_name (str): Nom de la feuille Excel
+        progress_callback (callable): Fonction appelée avec l'avancement (0.0 à 1.0) pendant l'écriture
 
     Returns:
         bytes: Contenu du fichier Excel
@@ -39,28 +80,21 @@ def create_excel(data, sheet_name="Data"):
     output = io.BytesIO()
 
     # Formater les données pour l'export
-    export_data = data.copy()
-
-    # Calculer la variation quotidienne
-    export_data['Variation (%)'] = export_data['Close'].pct_change() * 100
+    export_data = prepare_export_data(data)
 
     # Convertir les indices en dates au format YYYY-MM-DD
     export_data.index = [d.strftime('%Y-%m-%d') for d in export_data.index]
     export_data.index.name = 'Date'
 
-    # Réorganiser les colonnes
-    export_data = export_data[['Close', 'High', 'Low', 'Open', 'Variation (%)', 'Volume']]
-
-    # Renommer les colonnes
-    export_data.columns = ['Price', 'High', 'Low', 'Open', 'Variation (%)', 'Volume']
-
     # Nettoyer le nom de la feuille
     clean_sheet_name = clean_text(sheet_name)
     # Limiter la longueur à 31 caractères (limite Excel)
     if len(clean_sheet_name) > 31:
         clean_sheet_name = clean_sheet_name[:31]
 
-    # Créer et configurer manuellement le fichier Excel
+    # Créer et configurer manuellement le fichier Excel (openpyxl n'est chargé qu'au premier export)
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
     workbook = Workbook()
     ws = workbook.active
     ws.title = clean_sheet_name
@@ -71,7 +105,12 @@ def create_excel(data, sheet_name="Data"):
         ws.cell(row=1, column=col_idx, value=header)
 
     # Ajouter les données
+    row_count = len(export_data)
     for row_idx, (date_idx, row_data) in enumerate(export_data.iterrows(), start=2):
+        # Signaler l'avancement par paquets de lignes
+        if progress_callback is not None and (row_idx - 2) % EXCEL_PROGRESS_STEP == 0:
+            progress_callback((row_idx - 2) / row_count)
+
         # Ajouter la date
         ws.cell(row=row_idx, column=1, value=date_idx)
 
@@ -92,9 +131,120 @@ def create_excel(data, sheet_name="Data"):
 
     workbook.save(output)
     processed_data = output.getvalue()
+    if progress_callback is not None:
+        progress_callback(1.0)
     return processed_data
 
 
+def create_csv(data):
+    """
+    Crée un fichier CSV compressé (gzip) à partir des données financières.
+
+    Args:
+        data (DataFrame): Données à exporter
+
+    Returns:
+        bytes: Contenu du fichier CSV compressé
+    """
+    export_data = prepare_export_data(data)
+    csv_text = export_data.to_csv(date_format='%Y-%m-%d')
+    # mtime fixé pour produire des octets identiques à données identiques
+    return gzip.compress(csv_text.encode('utf-8'), mtime=0)
+
+
+def create_parquet(data):
+    """
+    Crée un fichier Parquet à partir des données financières.
+
+    Args:
+        data (DataFrame): Données à exporter
+
+    Returns:
+        bytes: Contenu du fichier Parquet
+    """
+    output = io.BytesIO()
+    export_data = prepare_export_data(data).reset_index()
+    export_data.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def create_feather(data):
+    """
+    Crée un fichier Arrow/Feather à partir des données financières.
+
+    Args:
+        data (DataFrame): Données à exporter
+
+    Returns:
+        bytes: Contenu du fichier Feather
+    """
+    output = io.BytesIO()
+    # Feather n'accepte qu'un index par défaut : la date devient une colonne
+    export_data = prepare_export_data(data).reset_index()
+    export_data.to_feather(output)
+    return output.getvalue()
+
+
+# Formats de téléchargement proposés : libellé -> (extension, type MIME)
+EXPORT_FORMATS = {
+    "XLSX": ("xlsx", 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    "CSV (gzip)": ("csv.gz", 'application/gzip'),
+    "Parquet": ("parquet", 'application/vnd.apache.parquet'),
+    "Feather": ("feather", 'application/vnd.apache.arrow.file'),
+}
+
+
+def create_export(data, sheet_name="Data", export_format="XLSX", progress_callback=None):
+    """
+    Renvoie le contenu d'un fichier d'export dans le format demandé.
+    Le résultat est mis en cache selon l'empreinte des données, le nom de la feuille et le format :
+    un nouvel affichage des mêmes données ne refait pas la sérialisation, y compris sur un autre
+    réplica lorsqu'un cache partagé est configuré.
+
+    Args:
+        data (DataFrame): Données à exporter
+        sheet_name (str): Nom de la feuille Excel (XLSX uniquement)
+        export_format (str): Clé de EXPORT_FORMATS
+        progress_callback (callable): Fonction appelée avec l'avancement (XLSX uniquement)
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    cache_key = (fingerprint_frame(data), clean_text(sheet_name), export_format)
+    export_bytes = export_cache.get_or_create(cache_key, lambda: shared_get_or_create(
+        "export:" + ":".join(cache_key),
+        lambda: build_export(data, sheet_name, export_format, progress_callback),
+        SHARED_EXPORT_TTL_SECONDS
+    ))
+    memory_governor.enforce()
+    return export_bytes
+
+
+def build_export(data, sheet_name="Data", export_format="XLSX", progress_callback=None):
+    """
+    Crée le contenu d'un fichier d'export dans le format demandé, sans passer par le cache.
+
+    Args:
+        data (DataFrame): Données à exporter
+        sheet_name (str): Nom de la feuille Excel (XLSX uniquement)
+        export_format (str): Clé de EXPORT_FORMATS
+        progress_callback (callable): Fonction appelée avec l'avancement (XLSX uniquement)
+
+    Returns:
+        bytes: Contenu du fichier
+    """
+    if export_format == "XLSX":
+        return create_excel(data, sheet_name, progress_callback)
+    elif export_format == "CSV (gzip)":
+        return create_csv(data)
+    elif export_format == "Parquet":
+        return create_parquet(data)
+    elif export_format == "Feather":
+        return create_feather(data)
+    else:
+        raise ValueError(f"Format d'export inconnu : {export_format}")
+
+
 def format_volume(volume):
     """
     Formate un volume pour l'affichage (k, M, G).
@@ -106,7 +256,9 @@ def format_volume(volume):
         str: Volume formaté
     """
     vol = float(volume)
-    if vol >= 1e9:
+    if pd.isna(vol):
+        return "N/A"
+    elif vol >= 1e9:
         return f"{vol / 1e9:.2f} G"
     elif vol >= 1e6:
         return f"{vol / 1e6:.2f} M"
@@ -114,3 +266,20 @@ def format_volume(volume):
         return f"{vol / 1e3:.2f} k"
     else:
         return f"{vol:.2f}"
+
+
+def format_volumes(volumes):
+    """
+    Formate une série de volumes pour l'affichage (version vectorisée de format_volume).
+
+    Args:
+        volumes (array-like): Volumes à formater
+
+    Returns:
+        ndarray: Volumes formatés
+    """
+    vol = np.asarray(volumes, dtype=float)
+    conditions = [vol >= 1e9, vol >= 1e6, vol >= 1e3]
+    divisors = np.select(conditions, [1e9, 1e6, 1e3], default=1.0)
+    suffixes = np.select(conditions, [" G", " M", " k"], default="")
+    return np.where(np.isnan(vol), "N/A", np.char.add(np.char.mod("%.2f", vol / divisors), suffixes))
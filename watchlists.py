@@ -0,0 +1,113 @@
+# watchlists.py
+"""
+Listes de suivi enregistrées pour l'application Finance Viewer.
+
+Chaque utilisateur enregistre des listes nommées d'actifs (tous onglets confondus) dans un fichier
+JSON local, sous FINANCE_VIEWER_WATCHLIST_DIR. Les actifs sont désignés par leur libellé
+« Catalogue - Nom » de assets.all_assets.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+WATCHLIST_DIR = os.environ.get("FINANCE_VIEWER_WATCHLIST_DIR", "watchlists")
+
+
+def user_file_name(user_name):
+    """
+    Construit le nom de fichier des listes d'un utilisateur : nom simplifié, suivi d'une empreinte
+    du nom exact pour que deux noms simplifiés de la même façon (« a b » et « a_b ») restent distincts.
+
+    Args:
+        user_name (str): Nom de l'utilisateur
+
+    Returns:
+        str: Nom de fichier sans caractère spécial
+    """
+    name = user_name.strip()
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name.lower()).strip("._")
+    if not slug:
+        raise ValueError("Nom d'utilisateur invalide.")
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:12]
+    return f"{slug}-{digest}.json"
+
+
+class WatchlistStore:
+    """
+    Listes de suivi par utilisateur, un fichier JSON par utilisateur.
+    Sûr entre threads ; chaque écriture remplace le fichier de façon atomique.
+    """
+
+    def __init__(self, directory=WATCHLIST_DIR):
+        """
+        Args:
+            directory (str): Répertoire des fichiers de listes
+        """
+        self.directory = directory
+        self._user_locks = defaultdict(threading.Lock)
+
+    def load(self, user_name):
+        """
+        Lit les listes d'un utilisateur.
+
+        Args:
+            user_name (str): Nom de l'utilisateur
+
+        Returns:
+            dict: {nom de la liste: libellés des actifs} (vide si l'utilisateur n'a aucune liste)
+        """
+        path = os.path.join(self.directory, user_file_name(user_name))
+        with self._user_locks[path]:
+            if not os.path.exists(path):
+                return {}
+            with open(path, encoding="utf-8") as watchlist_file:
+                watchlists = json.load(watchlist_file)
+        return {name: list(labels) for name, labels in watchlists.items()}
+
+    def save(self, user_name, watchlist_name, labels):
+        """
+        Enregistre (ou remplace) une liste.
+
+        Args:
+            user_name (str): Nom de l'utilisateur
+            watchlist_name (str): Nom de la liste
+            labels (list): Libellés des actifs
+        """
+        watchlist_name = watchlist_name.strip()
+        if not watchlist_name:
+            raise ValueError("Le nom de la liste est obligatoire.")
+        self._update(user_name, lambda watchlists: {**watchlists, watchlist_name: list(labels)})
+
+    def delete(self, user_name, watchlist_name):
+        """
+        Supprime une liste.
+
+        Args:
+            user_name (str): Nom de l'utilisateur
+            watchlist_name (str): Nom de la liste
+        """
+        self._update(user_name, lambda watchlists: {
+            name: labels for name, labels in watchlists.items() if name != watchlist_name
+        })
+
+    def _update(self, user_name, change):
+        # Lecture-modification-écriture sous le verrou du fichier, remplacement atomique
+        path = os.path.join(self.directory, user_file_name(user_name))
+        with self._user_locks[path]:
+            watchlists = {}
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as watchlist_file:
+                    watchlists = json.load(watchlist_file)
+            os.makedirs(self.directory, exist_ok=True)
+            temporary_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as watchlist_file:
+                json.dump(change(watchlists), watchlist_file, ensure_ascii=False, indent=2)
+            os.replace(temporary_path, path)
+
+
+# Listes partagées par toutes les sessions du processus
+watchlist_store = WatchlistStore()